@@ -4,9 +4,9 @@ from core.db import DB
 from core.models.base import DATA_STATUS
 from core.models.article import Article,ArticleBase
 from sqlalchemy import and_, or_, desc
-from .base import success_response, error_response
+from .base import success_response, error_response, paginate
 from core.config import cfg
-from apis.base import format_search_kw
+from core.search import get_search_index
 from core.print import print_warning, print_info, print_error, print_success
 router = APIRouter(prefix=f"/articles", tags=["文章管理"])
 
@@ -77,6 +77,7 @@ async def get_articles(
     patent_id: str = Query(None),
     industry_id: str = Query(None),
     has_content:bool=Query(False),
+    cursor: str = Query(None, description="分页游标，传入时忽略offset"),
     current_user: dict = Depends(get_current_user)
 ):
     session = DB.get_session()
@@ -96,11 +97,10 @@ async def get_articles(
                 if search:
                     query = query.filter(PatentArticle.title.like(f'%{search}%'))
                     
-                # 获取总数
-                total = query.count()
+                # 获取总数，游标分页时不再统计
+                total = query.count() if not cursor else None
                 print(f"专利文章总数: {total}")
-                query = query.order_by(PatentArticle.publish_time.desc()).offset(offset).limit(limit)
-                articles = query.all()
+                articles, next_cursor = paginate(query, [PatentArticle.publish_time, PatentArticle.id], lambda a: (a.publish_time, a.id), limit, offset, cursor)
                 print(f"查询到专利文章数量: {len(articles)}")
                 
                 # 转换为统一格式
@@ -112,7 +112,8 @@ async def get_articles(
                 from .base import success_response
                 return success_response({
                     "list": article_list,
-                    "total": total
+                    "total": total,
+                    "next_cursor": next_cursor
                 })
             except Exception as e:
                 print(f"查询专利文章错误: {str(e)}")
@@ -135,11 +136,10 @@ async def get_articles(
                 if search:
                     query = query.filter(IndustryArticle.title.like(f'%{search}%'))
                     
-                # 获取总数
-                total = query.count()
+                # 获取总数，游标分页时不再统计
+                total = query.count() if not cursor else None
                 print(f"行业动态文章总数: {total}")
-                query = query.order_by(IndustryArticle.publish_time.desc()).offset(offset).limit(limit)
-                articles = query.all()
+                articles, next_cursor = paginate(query, [IndustryArticle.publish_time, IndustryArticle.id], lambda a: (a.publish_time, a.id), limit, offset, cursor)
                 print(f"查询到行业动态文章数量: {len(articles)}")
                 
                 # 转换为统一格式
@@ -151,7 +151,8 @@ async def get_articles(
                 from .base import success_response
                 return success_response({
                     "list": article_list,
-                    "total": total
+                    "total": total,
+                    "next_cursor": next_cursor
                 })
             except Exception as e:
                 print(f"查询行业动态文章错误: {str(e)}")
@@ -174,11 +175,10 @@ async def get_articles(
                 if search:
                     query = query.filter(LinkArticle.title.like(f'%{search}%'))
                     
-                # 获取总数
-                total = query.count()
+                # 获取总数，游标分页时不再统计
+                total = query.count() if not cursor else None
                 print(f"链接文章总数: {total}")
-                query = query.order_by(LinkArticle.publish_time.desc()).offset(offset).limit(limit)
-                articles = query.all()
+                articles, next_cursor = paginate(query, [LinkArticle.publish_time, LinkArticle.id], lambda a: (a.publish_time, a.id), limit, offset, cursor)
                 print(f"查询到链接文章数量: {len(articles)}")
                 
                 # 转换为统一格式
@@ -190,7 +190,8 @@ async def get_articles(
                 from .base import success_response
                 return success_response({
                     "list": article_list,
-                    "total": total
+                    "total": total,
+                    "next_cursor": next_cursor
                 })
             except Exception as e:
                 print(f"查询链接文章错误: {str(e)}")
@@ -209,20 +210,17 @@ async def get_articles(
             query = query.filter(Article.status != DATA_STATUS.DELETED)
         if mp_id:
             query = query.filter(Article.mp_id == mp_id)
+        # 首页搜索按相关度排序(相关度相同时按发布时间)，使用游标翻页时按发布时间
+        rank = bool(search) and not cursor
         if search:
-            query = query.filter(
-               format_search_kw(search)
-            )
+            query = get_search_index().apply(query, search, rank=rank)
         
-        # 获取总数
-        total = query.count()
-        query= query.order_by(Article.publish_time.desc()).offset(offset).limit(limit)
-        # query= query.order_by(Article.id.desc()).offset(offset).limit(limit)
+        # 获取总数，游标分页时不再统计
+        total = query.count() if not cursor else None
+        if rank:
+            query = query.order_by(Article.publish_time.desc())
         # 分页查询（按发布时间降序）
-        articles = query.all()
-        
-        # 打印生成的 SQL 语句（包含分页参数）
-        print_warning(query.statement.compile(compile_kwargs={"literal_binds": True}))
+        articles, next_cursor = paginate(query, [Article.publish_time, Article.id], lambda a: (a.publish_time, a.id), limit, offset, cursor, order=not rank)
                        
         # 查询公众号名称
         from core.models.feed import Feed
@@ -242,7 +240,8 @@ async def get_articles(
         from .base import success_response
         return success_response({
             "list": article_list,
-            "total": total
+            "total": total,
+            "next_cursor": next_cursor
         })
     except HTTPException as e:
         raise e
@@ -310,10 +309,16 @@ async def delete_article(
                 )
             )
         # 逻辑删除文章（更新状态为deleted）
+        mp_id = article.mp_id
         article.status = DATA_STATUS.DELETED
         if cfg.get("article.true_delete", False):
             session.delete(article)
         session.commit()
+        from core.cache import feed_cache, content_store
+        feed_cache.bump(mp_id)
+        get_search_index().remove_article(article_id)
+        if cfg.get("article.true_delete", False):
+            content_store.delete(article_id)
         
         return success_response(None, message="文章已标记为删除")
     except Exception as e:
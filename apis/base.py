@@ -25,6 +25,135 @@ def error_response(code: int, message: str, data=None):
 from sqlalchemy import and_,or_
 from core.models import Article
 def format_search_kw(keyword: str):
-    words = keyword.replace("-"," ").replace("|"," ").split(" ")
-    rule = or_(*[Article.title.like(f"%{w}%") for w in words])
-    return rule
\ No newline at end of file
+    """生成全文检索条件，多个词(空格、-、|分隔)之间为或关系"""
+    from core.search import get_search_index
+    return get_search_index().criterion(keyword)
+
+def make_etag(*parts) -> str:
+    """根据若干字段生成强ETag"""
+    import hashlib
+    raw = "|".join(str(p) for p in parts)
+    return '"' + hashlib.md5(raw.encode("utf-8")).hexdigest() + '"'
+
+def cache_headers(etag: str, last_modified: float = None) -> dict:
+    """生成条件请求所需的响应头"""
+    from email.utils import formatdate
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return headers
+
+def _strip_etag(tag: str) -> str:
+    """去掉弱校验前缀和预压缩版本后缀，同一内容的不同编码视为相同"""
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in ("-gzip\"", "-br\""):
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+def encoding_etag(etag: str, encoding: str) -> str:
+    """为预压缩版本生成ETag，在引号内追加编码后缀"""
+    return etag[:-1] + f"-{encoding}\"" if encoding else etag
+
+def choose_encoding(request, available) -> str:
+    """根据Accept-Encoding从可用的预压缩编码中选择，优先br，其次gzip，都不可用返回空字符串"""
+    accept = request.headers.get("accept-encoding", "")
+    weights = {}
+    for part in accept.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip().lower()] = q
+    best, best_q = "", 0.0
+    for encoding in ("br", "gzip"):
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if encoding in available and q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def middleware_encoding(request) -> str:
+    """GZipMiddleware会压缩流式响应时返回gzip，判断条件与中间件一致"""
+    from core.config import cfg
+    if int(cfg.get("server.gzip_min_size", 1024) or 0) <= 0:
+        return ""
+    return "gzip" if "gzip" in request.headers.get("accept-encoding", "") else ""
+
+def is_not_modified(request, etag: str, last_modified: float = None) -> bool:
+    """根据If-None-Match/If-Modified-Since判断客户端缓存是否仍然有效"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match优先，使用弱比较
+        tags = [_strip_etag(t.strip()) for t in if_none_match.split(",")]
+        return "*" in tags or _strip_etag(etag) in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        from email.utils import parsedate_to_datetime
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= int(since)
+    return False
+
+def encode_cursor(*values) -> str:
+    """把排序字段的值编码为不透明的分页游标"""
+    import json, base64
+    from datetime import datetime
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, columns) -> list:
+    """解析分页游标，并按字段类型还原取值"""
+    import json, base64, binascii
+    from datetime import datetime
+    from sqlalchemy import DateTime
+    from fastapi import HTTPException
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        return [datetime.fromisoformat(v) if isinstance(c.type, DateTime) and v is not None else v
+                for c, v in zip(columns, values)]
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error_response(code=40001, message="无效的分页游标")
+        )
+
+def keyset_after(columns, values):
+    """生成(c1, c2, ...) < (v1, v2, ...)的条件，展开为OR/AND以便使用索引"""
+    rules = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        rules.append(and_(*[c == v for c, v in zip(columns[:i], values[:i])], column < value))
+    return or_(*rules)
+
+def paginate(query, columns, key, limit: int, offset: int = 0, cursor: str = None, order: bool = True):
+    """按columns倒序分页，传入cursor时使用游标(keyset)分页，否则使用offset
+
+    key: 从结果行中取出排序字段值的函数
+    order: 为False时沿用query已有的排序(如按相关度)，此时不生成游标
+    排序字段为NULL的行无法用游标定位，不参与分页(数据库同步时已把这类字段补为默认值)
+    返回(当前页数据, 下一页游标)，没有下一页时游标为None
+    """
+    if order:
+        query = query.filter(*[c.isnot(None) for c in columns if c.nullable])
+    if cursor:
+        query = query.filter(keyset_after(columns, decode_cursor(cursor, columns)))
+    if order:
+        query = query.order_by(*[c.desc() for c in columns])
+    if not cursor and offset:
+        query = query.offset(offset)
+    # 多取一条判断是否还有下一页
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if order:
+            next_cursor = encode_cursor(*key(rows[-1]))
+    return rows, next_cursor
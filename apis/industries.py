@@ -3,7 +3,7 @@ from fastapi.responses import FileResponse
 from fastapi.background import BackgroundTasks
 from core.auth import get_current_user
 from core.db import DB
-from .base import success_response, error_response
+from .base import success_response, error_response, paginate
 from datetime import datetime
 from core.config import cfg
 import io
@@ -12,6 +12,9 @@ import json
 from typing import Optional, List
 from pydantic import BaseModel
 from core.crawler import crawl_website
+from core.crawl_profile import PROFILES
+from core.crawl_source import INDUSTRY_SOURCE
+from core.idgen import new_id
 from core.models.industries import Industry
 from core.models.industry_articles import IndustryArticle
 from sqlalchemy.orm import Session
@@ -23,6 +26,7 @@ class IndustryCreate(BaseModel):
     url: str
     avatar: Optional[str] = None
     description: Optional[str] = None
+    crawl_profile: Optional[str] = None
 
 class IndustryUpdate(BaseModel):
     name: Optional[str] = None
@@ -30,11 +34,13 @@ class IndustryUpdate(BaseModel):
     avatar: Optional[str] = None
     description: Optional[str] = None
     status: Optional[int] = None
+    crawl_profile: Optional[str] = None
 
 @router.get("", summary="获取行业动态链接列表")
 async def get_industries(
     limit: int = 10,
     offset: int = 0,
+    cursor: str = Query(None, description="分页游标，传入时忽略offset"),
     kw: str = Query("", description="搜索关键词"),
     current_user: dict = Depends(get_current_user)
 ):
@@ -49,11 +55,11 @@ async def get_industries(
                 (Industry.name.like(f"%{kw}%")) | (Industry.url.like(f"%{kw}%"))
             )
         
-        # 获取总数
-        total = query.count()
+        # 获取总数，游标分页时不再统计
+        total = query.count() if not cursor else None
         
         # 应用分页和排序
-        industries = query.order_by(Industry.updated_at.desc()).offset(offset).limit(limit).all()
+        industries, next_cursor = paginate(query, [Industry.updated_at, Industry.id], lambda r: (r.updated_at, r.id), limit, offset, cursor)
         
         # 转换为字典格式
         industry_list = [industry.to_dict() for industry in industries]
@@ -62,11 +68,14 @@ async def get_industries(
             'list': industry_list,
             'page': {
                 'limit': limit,
-                'offset': offset
+                'offset': offset,
+                'next_cursor': next_cursor
             },
             'total': total
         }
         return success_response(data)
+    except HTTPException as e:
+        raise e
     except Exception as e:
         print(f"获取行业动态链接列表错误: {str(e)}")
         raise HTTPException(
@@ -94,18 +103,26 @@ async def add_industry(
                 message="该行业动态链接已存在"
             )
         
+        if industry_data.crawl_profile and industry_data.crawl_profile not in PROFILES:
+            return error_response(
+                code=40002,
+                message=f"抓取配置不存在，可选: {', '.join(PROFILES)}"
+            )
+        
         # 爬取网站内容
-        crawl_result = await crawl_website(industry_data.url, max_articles=10)
+        crawl_result = await crawl_website(industry_data.url, max_articles=10, profile=industry_data.crawl_profile)
         
         # 创建新行业动态链接记录
         new_industry = Industry(
-            id=str(int(datetime.now().timestamp())),
+            id=new_id(),
             name=industry_data.name or crawl_result['website_info']['title'] or industry_data.url,
             url=industry_data.url,
             avatar=industry_data.avatar or "/static/logo.svg",
             description=industry_data.description or crawl_result['website_info']['description'] or "",
             status=1,
-            article_count=crawl_result['total_found']
+            article_count=crawl_result['total_found'],
+            crawl_profile=industry_data.crawl_profile or 'fast',
+            crawl_strategy=crawl_result.get('strategy')
         )
         
         # 保存到数据库
@@ -114,21 +131,7 @@ async def add_industry(
         
         # 保存爬取的文章到数据库
         if crawl_result['success'] and crawl_result['articles']:
-            import time
-            for i, article in enumerate(crawl_result['articles']):
-                # 生成唯一ID：时间戳 + 行业ID + 序号
-                unique_id = f"{new_industry.id}_{int(datetime.now().timestamp())}_{i}"
-                industry_article = IndustryArticle(
-                    id=unique_id,
-                    industry_id=new_industry.id,
-                    title=article.get('title', ''),
-                    url=article.get('url', ''),
-                    publish_time=int(datetime.now().timestamp()),
-                    status=1
-                )
-                session.add(industry_article)
-                # 避免同时间戳
-                time.sleep(0.001)
+            INDUSTRY_SOURCE.save_articles(session, new_industry.id, crawl_result['articles'])
         
         session.commit()
         
@@ -154,6 +157,49 @@ async def add_industry(
     finally:
         session.close()
 
+@router.put("/{industry_id}", summary="更新行业动态链接信息")
+async def update_industry(
+    industry_id: str,
+    industry_data: IndustryUpdate,
+    current_user: dict = Depends(get_current_user)
+):
+    session = DB.get_session()
+    try:
+        industry = session.query(Industry).filter(Industry.id == industry_id).first()
+        if not industry:
+            return error_response(
+                code=40004,
+                message="行业动态链接不存在"
+            )
+        
+        update_data = industry_data.model_dump(exclude_unset=True)
+        if update_data.get('crawl_profile') and update_data['crawl_profile'] not in PROFILES:
+            return error_response(
+                code=40002,
+                message=f"抓取配置不存在，可选: {', '.join(PROFILES)}"
+            )
+        for key, value in update_data.items():
+            if value is not None:
+                setattr(industry, key, value)
+        # 地址或抓取配置变化后重新探测抓取方式
+        if industry_data.url is not None or industry_data.crawl_profile is not None:
+            industry.crawl_strategy = None
+        session.commit()
+        
+        return success_response({"message": "行业动态链接更新成功", "data": industry.to_dict()})
+    except Exception as e:
+        session.rollback()
+        print(f"更新行业动态链接错误: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=error_response(
+                code=50004,
+                message=f"更新行业动态链接失败: {str(e)}",
+            )
+        )
+    finally:
+        session.close()
+
 @router.delete("/{industry_id}", summary="删除行业动态链接")
 async def delete_industry(
     industry_id: str,
@@ -209,6 +255,7 @@ async def update_industry_content(
 class CrawlTestRequest(BaseModel):
     url: str
     max_articles: int = 10
+    profile: Optional[str] = None
 
 @router.post("/crawl-test", summary="测试行业动态网站爬虫")
 async def test_industry_crawl(
@@ -217,7 +264,7 @@ async def test_industry_crawl(
 ):
     """测试爬取指定行业动态网站的内容"""
     try:
-        result = await crawl_website(request.url, request.max_articles)
+        result = await crawl_website(request.url, request.max_articles, request.profile)
         
         return success_response({
             "website_info": result['website_info'],
@@ -3,7 +3,7 @@ from fastapi.responses import FileResponse
 from fastapi.background import BackgroundTasks
 from core.auth import get_current_user
 from core.db import DB
-from .base import success_response, error_response
+from .base import success_response, error_response, paginate
 from datetime import datetime
 from core.config import cfg
 import io
@@ -12,6 +12,9 @@ import json
 from typing import Optional, List
 from pydantic import BaseModel
 from core.crawler import crawl_website
+from core.crawl_profile import PROFILES
+from core.crawl_source import LINK_SOURCE
+from core.idgen import new_id
 from core.models.links import Link
 from core.models.link_articles import LinkArticle
 from sqlalchemy.orm import Session
@@ -23,6 +26,7 @@ class LinkCreate(BaseModel):
     url: str
     avatar: Optional[str] = None
     description: Optional[str] = None
+    crawl_profile: Optional[str] = None
 
 class LinkUpdate(BaseModel):
     name: Optional[str] = None
@@ -30,11 +34,13 @@ class LinkUpdate(BaseModel):
     avatar: Optional[str] = None
     description: Optional[str] = None
     status: Optional[int] = None
+    crawl_profile: Optional[str] = None
 
 @router.get("", summary="获取链接列表")
 async def get_links(
     limit: int = 10,
     offset: int = 0,
+    cursor: str = Query(None, description="分页游标，传入时忽略offset"),
     kw: str = Query("", description="搜索关键词"),
     current_user: dict = Depends(get_current_user)
 ):
@@ -49,11 +55,11 @@ async def get_links(
                 (Link.name.like(f"%{kw}%")) | (Link.url.like(f"%{kw}%"))
             )
         
-        # 获取总数
-        total = query.count()
+        # 获取总数，游标分页时不再统计
+        total = query.count() if not cursor else None
         
         # 应用分页和排序
-        links = query.order_by(Link.updated_at.desc()).offset(offset).limit(limit).all()
+        links, next_cursor = paginate(query, [Link.updated_at, Link.id], lambda r: (r.updated_at, r.id), limit, offset, cursor)
         
         # 转换为字典格式
         link_list = [link.to_dict() for link in links]
@@ -62,11 +68,14 @@ async def get_links(
             'list': link_list,
             'page': {
                 'limit': limit,
-                'offset': offset
+                'offset': offset,
+                'next_cursor': next_cursor
             },
             'total': total
         }
         return success_response(data)
+    except HTTPException as e:
+        raise e
     except Exception as e:
         print(f"获取链接列表错误: {str(e)}")
         raise HTTPException(
@@ -94,18 +103,26 @@ async def add_link(
                 message="该链接已存在"
             )
         
+        if link_data.crawl_profile and link_data.crawl_profile not in PROFILES:
+            return error_response(
+                code=40002,
+                message=f"抓取配置不存在，可选: {', '.join(PROFILES)}"
+            )
+        
         # 爬取网站内容
-        crawl_result = await crawl_website(link_data.url, max_articles=10)
+        crawl_result = await crawl_website(link_data.url, max_articles=10, profile=link_data.crawl_profile)
         
         # 创建新链接记录
         new_link = Link(
-            id=str(int(datetime.now().timestamp())),
+            id=new_id(),
             name=link_data.name or crawl_result['website_info']['title'] or link_data.url,
             url=link_data.url,
             avatar=link_data.avatar or "/static/logo.svg",
             description=link_data.description or crawl_result['website_info']['description'] or "",
             status=1,
-            article_count=crawl_result['total_found']
+            article_count=crawl_result['total_found'],
+            crawl_profile=link_data.crawl_profile or 'fast',
+            crawl_strategy=crawl_result.get('strategy')
         )
         
         # 保存到数据库
@@ -114,22 +131,7 @@ async def add_link(
         
         # 保存爬取的文章到数据库
         if crawl_result['success'] and crawl_result['articles']:
-            import time
-            for i, article in enumerate(crawl_result['articles']):
-                # 生成唯一ID：时间戳 + 链接ID + 序号
-                unique_id = f"{new_link.id}_{int(datetime.now().timestamp())}_{i}"
-                link_article = LinkArticle(
-                    id=unique_id,
-                    link_id=new_link.id,
-                    title=article.get('title', ''),
-                    url=article.get('url', ''),
-                    description=article.get('title', ''),  # 暂时用title作为描述
-                    publish_time=int(datetime.now().timestamp()),
-                    status=1
-                )
-                session.add(link_article)
-                # 避免同时间戳
-                time.sleep(0.001)
+            LINK_SOURCE.save_articles(session, new_link.id, crawl_result['articles'])
         
         session.commit()
         
@@ -191,10 +193,32 @@ async def update_link(
     link_data: LinkUpdate,
     current_user: dict = Depends(get_current_user)
 ):
+    session = DB.get_session()
     try:
-        # TODO: 更新数据库中的链接信息
-        return success_response({"message": "链接更新成功"})
+        link = session.query(Link).filter(Link.id == link_id).first()
+        if not link:
+            return error_response(
+                code=40004,
+                message="链接不存在"
+            )
+        
+        update_data = link_data.model_dump(exclude_unset=True)
+        if update_data.get('crawl_profile') and update_data['crawl_profile'] not in PROFILES:
+            return error_response(
+                code=40002,
+                message=f"抓取配置不存在，可选: {', '.join(PROFILES)}"
+            )
+        for key, value in update_data.items():
+            if value is not None:
+                setattr(link, key, value)
+        # 地址或抓取配置变化后重新探测抓取方式
+        if link_data.url is not None or link_data.crawl_profile is not None:
+            link.crawl_strategy = None
+        session.commit()
+        
+        return success_response({"message": "链接更新成功", "data": link.to_dict()})
     except Exception as e:
+        session.rollback()
         print(f"更新链接错误: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -203,6 +227,8 @@ async def update_link(
                 message=f"更新链接失败: {str(e)}",
             )
         )
+    finally:
+        session.close()
 
 @router.delete("/{link_id}", summary="删除订阅链接")
 async def delete_link(
@@ -261,7 +287,8 @@ async def update_link_content(
         max_articles = (end_page - start_page + 1) * articles_per_page
         
         # 重新爬取网站内容
-        crawl_result = await crawl_website(link.url, max_articles=max_articles)
+        crawl_result = await crawl_website(link.url, max_articles=max_articles, profile=link.crawl_profile,
+                                           strategy=link.crawl_strategy)
         
         if not crawl_result['success']:
             return error_response(
@@ -271,32 +298,7 @@ async def update_link_content(
         
         # 删除旧文章（可选，这里选择保留旧文章，只添加新文章）
         # 保存新爬取的文章
-        new_articles_count = 0
-        if crawl_result['articles']:
-            import time
-            for i, article in enumerate(crawl_result['articles']):
-                # 检查文章是否已存在（通过URL去重）
-                existing = session.query(LinkArticle).filter(
-                    LinkArticle.link_id == link_id,
-                    LinkArticle.url == article.get('url', '')
-                ).first()
-                
-                if existing:
-                    continue  # 跳过已存在的文章
-                
-                # 生成唯一ID
-                unique_id = f"{link_id}_{int(datetime.now().timestamp())}_{i}"
-                link_article = LinkArticle(
-                    id=unique_id,
-                    link_id=link_id,
-                    title=article.get('title', ''),
-                    url=article.get('url', ''),
-                    publish_time=int(datetime.now().timestamp()),
-                    status=1
-                )
-                session.add(link_article)
-                new_articles_count += 1
-                time.sleep(0.001)
+        new_articles_count = LINK_SOURCE.save_articles(session, link_id, crawl_result['articles'])
         
         # 更新链接的文章数量和更新时间
         total_articles = session.query(LinkArticle).filter(
@@ -304,6 +306,7 @@ async def update_link_content(
             LinkArticle.status != 1000
         ).count()
         link.article_count = total_articles
+        link.crawl_strategy = crawl_result.get('strategy')
         
         session.commit()
         
@@ -365,6 +368,7 @@ async def export_links(
 class CrawlTestRequest(BaseModel):
     url: str
     max_articles: int = 10
+    profile: Optional[str] = None
 
 @router.post("/crawl-test", summary="测试网站爬虫")
 async def test_website_crawl(
@@ -373,7 +377,7 @@ async def test_website_crawl(
 ):
     """测试爬取指定网站的内容"""
     try:
-        result = await crawl_website(request.url, request.max_articles)
+        result = await crawl_website(request.url, request.max_articles, request.profile)
         
         return success_response({
             "website_info": result['website_info'],
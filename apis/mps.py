@@ -93,6 +93,7 @@ async def update_mps(
      mp_id: str,
      start_page: int = 0,
      end_page: int = 1,
+     deep: bool = Query(False, description="完整同步，忽略同步水位"),
     current_user: dict = Depends(get_current_user)
 ):
     session = DB.get_session()
@@ -116,13 +117,10 @@ async def update_mps(
                     data={"time_span":time_span}
                 )
         result=[]    
-        def UpArt(mp):
-            from core.wx import WxGather
-            wx=WxGather().Model()
-            wx.get_Articles(mp.faker_id,Mps_id=mp.id,Mps_title=mp.mp_name,CallBack=UpdateArticle,start_page=start_page,MaxPage=end_page)
-            result=wx.articles
-        import threading
-        threading.Thread(target=UpArt,args=(mp,)).start()
+        # 手动更新优先于定时采集执行，同一公众号不会同时采集
+        from core.queue import TaskQueue,PRIORITY_HIGH
+        from jobs.mps import update_feed
+        TaskQueue.add_task(update_feed,mp.id,start_page,end_page,deep,priority=PRIORITY_HIGH,concurrency_key=f"feed:{mp.id}",coalesce_key=f"update:{mp.id}")
         return success_response({
             "time_span":time_span,
             "list":result,
@@ -217,10 +215,10 @@ async def add_mp(
         feed = existing_feed if existing_feed else new_feed
          #在这里实现第一次添加获取公众号文章
         if not existing_feed:
-            from core.queue import TaskQueue
-            from core.wx import WxGather
+            from core.queue import TaskQueue,PRIORITY_HIGH
+            from jobs.mps import update_feed
             Max_page=int(cfg.get("max_page","2"))
-            TaskQueue.add_task( WxGather().Model().get_Articles,faker_id=feed.faker_id,Mps_id=feed.id,CallBack=UpdateArticle,MaxPage=Max_page,Mps_title=mp_name)
+            TaskQueue.add_task(update_feed,feed.id,0,Max_page,priority=PRIORITY_HIGH,concurrency_key=f"feed:{feed.id}",coalesce_key=f"update:{feed.id}")
             
         return success_response({
             "id": feed.id,
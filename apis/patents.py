@@ -3,7 +3,7 @@ from fastapi.responses import FileResponse
 from fastapi.background import BackgroundTasks
 from core.auth import get_current_user
 from core.db import DB
-from .base import success_response, error_response
+from .base import success_response, error_response, paginate
 from datetime import datetime
 from core.config import cfg
 import io
@@ -12,6 +12,9 @@ import json
 from typing import Optional, List
 from pydantic import BaseModel
 from core.crawler import crawl_website
+from core.crawl_profile import PROFILES
+from core.crawl_source import PATENT_SOURCE
+from core.idgen import new_id
 from core.models.patents import Patent
 from core.models.patent_articles import PatentArticle
 from sqlalchemy.orm import Session
@@ -23,6 +26,7 @@ class PatentCreate(BaseModel):
     url: str
     avatar: Optional[str] = None
     description: Optional[str] = None
+    crawl_profile: Optional[str] = None
 
 class PatentUpdate(BaseModel):
     name: Optional[str] = None
@@ -30,11 +34,13 @@ class PatentUpdate(BaseModel):
     avatar: Optional[str] = None
     description: Optional[str] = None
     status: Optional[int] = None
+    crawl_profile: Optional[str] = None
 
 @router.get("", summary="获取专利链接列表")
 async def get_patents(
     limit: int = 10,
     offset: int = 0,
+    cursor: str = Query(None, description="分页游标，传入时忽略offset"),
     kw: str = Query("", description="搜索关键词"),
     current_user: dict = Depends(get_current_user)
 ):
@@ -49,11 +55,11 @@ async def get_patents(
                 (Patent.name.like(f"%{kw}%")) | (Patent.url.like(f"%{kw}%"))
             )
         
-        # 获取总数
-        total = query.count()
+        # 获取总数，游标分页时不再统计
+        total = query.count() if not cursor else None
         
         # 应用分页和排序
-        patents = query.order_by(Patent.updated_at.desc()).offset(offset).limit(limit).all()
+        patents, next_cursor = paginate(query, [Patent.updated_at, Patent.id], lambda r: (r.updated_at, r.id), limit, offset, cursor)
         
         # 转换为字典格式
         patent_list = [patent.to_dict() for patent in patents]
@@ -62,11 +68,14 @@ async def get_patents(
             'list': patent_list,
             'page': {
                 'limit': limit,
-                'offset': offset
+                'offset': offset,
+                'next_cursor': next_cursor
             },
             'total': total
         }
         return success_response(data)
+    except HTTPException as e:
+        raise e
     except Exception as e:
         print(f"获取专利链接列表错误: {str(e)}")
         raise HTTPException(
@@ -94,18 +103,26 @@ async def add_patent(
                 message="该专利链接已存在"
             )
         
+        if patent_data.crawl_profile and patent_data.crawl_profile not in PROFILES:
+            return error_response(
+                code=40002,
+                message=f"抓取配置不存在，可选: {', '.join(PROFILES)}"
+            )
+        
         # 爬取网站内容
-        crawl_result = await crawl_website(patent_data.url, max_articles=10)
+        crawl_result = await crawl_website(patent_data.url, max_articles=10, profile=patent_data.crawl_profile)
         
         # 创建新专利链接记录
         new_patent = Patent(
-            id=str(int(datetime.now().timestamp())),
+            id=new_id(),
             name=patent_data.name or crawl_result['website_info']['title'] or patent_data.url,
             url=patent_data.url,
             avatar=patent_data.avatar or "/static/logo.svg",
             description=patent_data.description or crawl_result['website_info']['description'] or "",
             status=1,
-            article_count=crawl_result['total_found']
+            article_count=crawl_result['total_found'],
+            crawl_profile=patent_data.crawl_profile or 'fast',
+            crawl_strategy=crawl_result.get('strategy')
         )
         
         # 保存到数据库
@@ -114,21 +131,7 @@ async def add_patent(
         
         # 保存爬取的文章到数据库
         if crawl_result['success'] and crawl_result['articles']:
-            import time
-            for i, article in enumerate(crawl_result['articles']):
-                # 生成唯一ID：时间戳 + 专利ID + 序号
-                unique_id = f"{new_patent.id}_{int(datetime.now().timestamp())}_{i}"
-                patent_article = PatentArticle(
-                    id=unique_id,
-                    patent_id=new_patent.id,
-                    title=article.get('title', ''),
-                    url=article.get('url', ''),
-                    publish_time=int(datetime.now().timestamp()),
-                    status=1
-                )
-                session.add(patent_article)
-                # 避免同时间戳
-                time.sleep(0.001)
+            PATENT_SOURCE.save_articles(session, new_patent.id, crawl_result['articles'])
         
         session.commit()
         
@@ -154,6 +157,49 @@ async def add_patent(
     finally:
         session.close()
 
+@router.put("/{patent_id}", summary="更新专利链接信息")
+async def update_patent(
+    patent_id: str,
+    patent_data: PatentUpdate,
+    current_user: dict = Depends(get_current_user)
+):
+    session = DB.get_session()
+    try:
+        patent = session.query(Patent).filter(Patent.id == patent_id).first()
+        if not patent:
+            return error_response(
+                code=40004,
+                message="专利链接不存在"
+            )
+        
+        update_data = patent_data.model_dump(exclude_unset=True)
+        if update_data.get('crawl_profile') and update_data['crawl_profile'] not in PROFILES:
+            return error_response(
+                code=40002,
+                message=f"抓取配置不存在，可选: {', '.join(PROFILES)}"
+            )
+        for key, value in update_data.items():
+            if value is not None:
+                setattr(patent, key, value)
+        # 地址或抓取配置变化后重新探测抓取方式
+        if patent_data.url is not None or patent_data.crawl_profile is not None:
+            patent.crawl_strategy = None
+        session.commit()
+        
+        return success_response({"message": "专利链接更新成功", "data": patent.to_dict()})
+    except Exception as e:
+        session.rollback()
+        print(f"更新专利链接错误: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=error_response(
+                code=50004,
+                message=f"更新专利链接失败: {str(e)}",
+            )
+        )
+    finally:
+        session.close()
+
 @router.delete("/{patent_id}", summary="删除专利链接")
 async def delete_patent(
     patent_id: str,
@@ -211,7 +257,8 @@ async def update_patent_content(
         max_articles = (end_page - start_page + 1) * articles_per_page
         
         # 重新爬取网站内容
-        crawl_result = await crawl_website(patent.url, max_articles=max_articles)
+        crawl_result = await crawl_website(patent.url, max_articles=max_articles, profile=patent.crawl_profile,
+                                           strategy=patent.crawl_strategy)
         
         if not crawl_result['success']:
             return error_response(
@@ -220,32 +267,7 @@ async def update_patent_content(
             )
         
         # 保存新爬取的文章
-        new_articles_count = 0
-        if crawl_result['articles']:
-            import time
-            for i, article in enumerate(crawl_result['articles']):
-                # 检查文章是否已存在（通过URL去重）
-                existing = session.query(PatentArticle).filter(
-                    PatentArticle.patent_id == patent_id,
-                    PatentArticle.url == article.get('url', '')
-                ).first()
-                
-                if existing:
-                    continue  # 跳过已存在的文章
-                
-                # 生成唯一ID
-                unique_id = f"{patent_id}_{int(datetime.now().timestamp())}_{i}"
-                patent_article = PatentArticle(
-                    id=unique_id,
-                    patent_id=patent_id,
-                    title=article.get('title', ''),
-                    url=article.get('url', ''),
-                    publish_time=int(datetime.now().timestamp()),
-                    status=1
-                )
-                session.add(patent_article)
-                new_articles_count += 1
-                time.sleep(0.001)
+        new_articles_count = PATENT_SOURCE.save_articles(session, patent_id, crawl_result['articles'])
         
         # 更新专利链接的文章数量和更新时间
         total_articles = session.query(PatentArticle).filter(
@@ -253,6 +275,7 @@ async def update_patent_content(
             PatentArticle.status != 1000
         ).count()
         patent.article_count = total_articles
+        patent.crawl_strategy = crawl_result.get('strategy')
         
         session.commit()
         
@@ -283,6 +306,7 @@ async def update_patent_content(
 class CrawlTestRequest(BaseModel):
     url: str
     max_articles: int = 10
+    profile: Optional[str] = None
 
 @router.post("/crawl-test", summary="测试专利网站爬虫")
 async def test_patent_crawl(
@@ -291,7 +315,7 @@ async def test_patent_crawl(
 ):
     """测试爬取指定专利网站的内容"""
     try:
-        result = await crawl_website(request.url, request.max_articles)
+        result = await crawl_website(request.url, request.max_articles, request.profile)
         
         return success_response({
             "website_info": result['website_info'],
@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends, Query, HTTPException, Request,Response
 from fastapi import status
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from core.db import DB
 from core.rss import RSS
+from core.cache import feed_cache
 from core.models.feed import Feed
 import json
 from .base import success_response, error_response
 from core.auth import get_current_user
 from core.config import cfg
-from apis.base import format_search_kw
+from apis.base import format_search_kw, make_etag, cache_headers, is_not_modified, choose_encoding, encoding_etag, middleware_encoding, paginate, decode_cursor
+from urllib.parse import urlencode
 from core.print import print_error,print_success
 def verify_rss_access(current_user: dict = Depends(get_current_user)):
     """
@@ -35,9 +37,10 @@ async def get_rss_source(
     request: Request,
     limit: int = Query(100, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: str = Query(None),
     # current_user: dict = Depends(verify_rss_access)
 ):
-    return await get_mp_articles_source(request=request,feed_id=feed_id, limit=limit,offset=offset, is_update=True)
+    return await get_mp_articles_source(request=request,feed_id=feed_id, limit=limit,offset=offset,cursor=cursor)
 
 
 
@@ -100,8 +103,15 @@ async def get_rss_feeds(
         )
 
 @router.get("/content/{content_id}", summary="获取缓存的文章内容")
-async def get_rss_feed(content_id: str):
+async def get_rss_feed(content_id: str, request: Request):
     rss = RSS()
+    meta = rss.get_cached_content_meta(content_id)
+    headers = None
+    if meta is not None:
+        content_hash, updated = meta
+        headers = cache_headers(make_etag(content_id, content_hash), updated)
+        if is_not_modified(request, headers["ETag"], updated):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
     content = rss.get_cached_content(content_id)
       
     if content is None:
@@ -137,11 +147,12 @@ async def get_rss_feed(content_id: str):
     </body>
     </html>
     '''
-    text=rss.add_logo_prefix_to_urls(content['content'])
-    html=html.format(title=title,text=text,source=content['mp_name'],publish_time=content['publish_time'])
+    # 缓存的内容入库时已完成图片地址代理
+    html=html.format(title=title,text=content['content'],source=content['mp_name'],publish_time=content['publish_time'])
     return Response(
             content=html,
-            media_type="text/html"
+            media_type="text/html",
+            headers=headers
         )
 def UpdateArticle(art:dict):
             return DB.add_article(art)
@@ -153,6 +164,7 @@ async def update_rss_feeds(
     feed_id: str,
     limit: int = Query(100, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: str = Query(None),
     # current_user: dict = Depends(get_current_user)
 ):
         #如果需要放开授权，请只允许内网访问，防止 被利用攻击 放开授权办法，注释上面current_user: dict = Depends(get_current_user)
@@ -164,7 +176,7 @@ async def update_rss_feeds(
         # wx.get_Articles(mp.faker_id,Mps_id=mp.id,CallBack=UpdateArticle)
         # result=wx.articles
 
-        return await get_mp_articles_source(request=request,feed_id=feed_id, limit=limit,offset=offset, is_update=True)
+        return await get_mp_articles_source(request=request,feed_id=feed_id, limit=limit,offset=offset, is_update=True,cursor=cursor)
 
 
 
@@ -176,19 +188,40 @@ async def get_mp_articles_source(
     limit: int = Query(10, ge=1, le=100),
     offset: int = Query(0, ge=0),
     kw:str="",
-    is_update:bool=True,
+    is_update:bool=False,
     content_type:str=Query(None,alias="ctype"),
-    template:str=None
+    template:str=None,
+    cursor:str=None
     # current_user: dict = Depends(get_current_user)
 ):
-    rss=RSS(name=f'{feed_id}_{limit}_{offset}',ext=ext)
+    rss_domain=cfg.get("rss.base_url",str(request.base_url))
+    from core.models.article import Article
+    if cursor:
+        # 先校验游标，无效时直接返回400
+        decode_cursor(cursor,[Article.publish_time,Article.id])
+    # 缓存文件名包含订阅源版本号，有新文章入库时自动失效
+    meta=feed_cache.ensure_meta(feed_id)
+    cache_name=feed_cache.cache_name(feed_id,limit,offset,kw=kw,ctype=content_type,template=template,base_url=rss_domain,version=meta["version"],cursor=cursor,path=request.url.path)
+    # 版本号不变则内容不变，无需查询数据库即可判断304
+    headers=cache_headers(make_etag(cache_name,ext),meta["updated"])
+    if is_update==False and is_not_modified(request,headers["ETag"],meta["updated"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,headers=headers)
+    rss=RSS(name=cache_name,ext=ext)
     rss.set_content_type(content_type)
-    rss_xml = rss.get_cache()
-    if rss_xml is not None and is_update==False:
-         return Response(
-            content=rss_xml,
-            media_type=rss.get_type()
-        )
+    if is_update==False:
+        # 客户端支持时直接返回预压缩版本，避免每次请求重复压缩
+        encoding=choose_encoding(request,rss.cached_encodings())
+        cached=rss.get_cache_bytes(encoding)
+        if cached is not None:
+            headers["Vary"]="Accept-Encoding"
+            if encoding:
+                headers["Content-Encoding"]=encoding
+                headers["ETag"]=encoding_etag(headers["ETag"],encoding)
+            return Response(
+                content=cached,
+                media_type=rss.get_type(),
+                headers=headers
+            )
     session = DB.get_session()
     try:
         from core.models.article import Article
@@ -196,7 +229,6 @@ async def get_mp_articles_source(
         # 查询公众号信息
         feed = session.query(Feed)
         query=session.query(Feed, Article).join(Article, Feed.id == Article.mp_id)
-        rss_domain=cfg.get("rss.base_url",str(request.base_url))
         if feed_id!="all":
             feed=feed.filter(Feed.id == feed_id).first()
             query=query.filter(Article.mp_id == feed_id)
@@ -216,55 +248,58 @@ async def get_mp_articles_source(
             )
       
         # 查询文章列表
-        total = query.count()
-        # articles = query.order_by(Article.publish_time.desc()).limit(limit).offset(offset).all()
         if kw!="":
             query=query.filter(format_search_kw(kw))
-        articles =query.order_by(Article.publish_time.desc()).limit(limit).offset(offset).all()
+        articles,next_cursor=paginate(query,[Article.publish_time,Article.id],lambda row:(row[1].publish_time,row[1].id),limit,offset,cursor)
+        next_url=None
+        if next_cursor:
+            params=[(k,v) for k,v in request.query_params.multi_items() if k not in ("offset","cursor","is_update")]
+            next_url=f"{rss_domain or request.base_url}{request.url.path.lstrip('/')}?{urlencode(params+[('cursor',next_cursor)])}"
         # 转换为RSS格式数据
         import datetime
-        rss_list = [{
-            "id": str(article.id),
-            "title": article.title or "",
-            "link":  f"{rss_domain}rss/feed/{article.id}" if cfg.get("rss.local",False) else article.url,
-            "description": article.description if article.description != "" else article.title or "",
-            "content": article.content or "",
-            "image": article.pic_url or "",
-            "mp_name":_feed.mp_name or "",
-            "updated": datetime.datetime.fromtimestamp(article.publish_time),
-            "feed": {
-                    "id":_feed.id,
-                    "name":_feed.mp_name,
-                    "cover":_feed.mp_cover,
-                    "intro":_feed.mp_intro
-            }
-        } for _feed,article in articles]
-        
-
-        # 缓存文章内容
-        for _feed,article in articles:
-            content_data = {
-                "id": article.id,
-                "title": article.title,
-                "content": article.content,
-                "publish_time": article.publish_time,
-                "mp_id": article.mp_id,
-                "pic_url": article.pic_url,
-                "mp_name": _feed.mp_name
-            }
-            rss.cache_content(article.id, content_data)
-        # 生成RSS XML
-        rss_xml = rss.generate(rss_list,ext=ext, title=f"{feed.mp_name}",link=rss_domain,description=feed.mp_intro,image_url=feed.mp_cover,template=template)
-        
-        return Response(
-            content=rss_xml,
-            media_type=rss.get_type()
+        def rss_items():
+            # 逐条转换并缓存文章内容，避免同时持有整份条目列表
+            for _feed,article in articles:
+                content_data = {
+                    "id": article.id,
+                    "title": article.title,
+                    "content": article.content,
+                    "publish_time": article.publish_time,
+                    "mp_id": article.mp_id,
+                    "pic_url": article.pic_url,
+                    "mp_name": _feed.mp_name
+                }
+                rss.cache_content(article.id, content_data)
+                yield {
+                    "id": str(article.id),
+                    "title": article.title or "",
+                    "link":  f"{rss_domain}rss/feed/{article.id}" if cfg.get("rss.local",False) else article.url,
+                    "description": article.description if article.description != "" else article.title or "",
+                    "content": article.content or "",
+                    "image": article.pic_url or "",
+                    "mp_name":_feed.mp_name or "",
+                    "updated": datetime.datetime.fromtimestamp(article.publish_time),
+                    "feed": {
+                            "id":_feed.id,
+                            "name":_feed.mp_name,
+                            "cover":_feed.mp_cover,
+                            "intro":_feed.mp_intro
+                    }
+                }
+        # 流式生成RSS XML
+        rss_stream = rss.stream(rss_items(),ext=ext, title=f"{feed.mp_name}",link=rss_domain,description=feed.mp_intro,image_url=feed.mp_cover,template=template,next_url=next_url)
+        # 流式响应由GZipMiddleware压缩(中间件会加上Vary)，压缩后的内容使用带编码后缀的ETag，与预压缩命中时一致
+        headers["ETag"]=encoding_etag(headers["ETag"],middleware_encoding(request))
+        return StreamingResponse(
+            rss_stream,
+            media_type=rss.get_type(),
+            headers=headers
         )
     except Exception as e:
         print_error(f"获取RSS错误:{e}")
         # raise
         return Response(
-             content=rss_xml,
+             content=rss.get_cache(),
              media_type=rss.get_type()
         )
     
@@ -279,9 +314,10 @@ async def rss(
     offset: int = Query(0, ge=0),
     kw:str="",
     content_type:str=Query(None,alias="ctype"),
-    is_update:bool=True
+    is_update:bool=False,
+    cursor:str=None
 ):
-    return await get_mp_articles_source(request=request,feed_id=feed_id, limit=limit,offset=offset, is_update=is_update,ext=ext,kw=kw,content_type=content_type)
+    return await get_mp_articles_source(request=request,feed_id=feed_id, limit=limit,offset=offset, is_update=is_update,ext=ext,kw=kw,content_type=content_type,cursor=cursor)
 
 
 @feed_router.get("/search/{kw}/{feed_id}.{ext}", summary="获取公众号文章源")
@@ -293,7 +329,8 @@ async def rss(
     offset: int = Query(0, ge=0),
     kw:str="",
     content_type:str=Query(None,alias="ctype"),
-    is_update:bool=True
+    is_update:bool=False,
+    cursor:str=None
 ):
-    return await get_mp_articles_source(request=request,feed_id=feed_id, limit=limit,offset=offset, is_update=is_update,ext=ext,kw=kw,content_type=content_type)
+    return await get_mp_articles_source(request=request,feed_id=feed_id, limit=limit,offset=offset, is_update=is_update,ext=ext,kw=kw,content_type=content_type,cursor=cursor)
 
@@ -9,6 +9,8 @@ from .base import success_response, error_response
 from driver.token import wx_cfg
 from core.config import cfg
 from jobs.mps import TaskQueue
+from core.wx.extract import content_extractor
+from core.crawler import crawler_instance
 from driver.success import WX_LOGIN_ED,WX_LOGIN_INFO
 router = APIRouter(prefix="/sys", tags=["系统信息"])
 
@@ -102,6 +104,8 @@ async def get_system_info(
             },
             "article":laxArticle(),
             'queue':TaskQueue.get_queue_info(),
+            'extract':content_extractor.stats(),
+            'crawler':crawler_instance.pool.info(),
         }
         return success_response(data=system_info)
     except Exception as e:
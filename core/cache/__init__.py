@@ -0,0 +1,3 @@
+from .feed_cache import *
+from .content_store import *
+from .content_variants import *
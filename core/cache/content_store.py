@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+from core.print import print_error
+
+
+class ContentStore:
+    """文章内容存储
+
+    所有文章内容保存在一个SQLite文件中，以文章ID为主键。
+    写入时比较内容哈希，内容未变化时不重复写入；读取只需一次主键查询。
+    旧版本data/cache/content/{id}.json文件在首次读取时自动导入，也可通过migrate批量导入。
+    """
+
+    def __init__(self, db_path: str = "data/cache/content.db", legacy_dir: str = "data/cache/content"):
+        self.db_path = os.path.normpath(db_path)
+        self.legacy_dir = os.path.normpath(legacy_dir)
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _conn(self) -> sqlite3.Connection:
+        """每个线程使用独立连接，流式输出时生成器可能在不同线程中执行"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS content ("
+                        "id TEXT PRIMARY KEY, hash TEXT NOT NULL, mp_id TEXT, "
+                        "body BLOB NOT NULL, updated REAL NOT NULL)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_content_updated ON content(updated)")
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_content_mp_id ON content(mp_id)")
+                    # 入库时预先生成的内容格式(图片代理HTML/纯文本/Markdown)，以原始正文哈希为键
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS variants ("
+                        "hash TEXT NOT NULL, kind TEXT NOT NULL, body TEXT NOT NULL, "
+                        "PRIMARY KEY(hash, kind)) WITHOUT ROWID"
+                    )
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def put(self, content_id: str, content: dict) -> bool:
+        """保存文章内容，内容哈希未变化时跳过写入，返回是否实际写入"""
+        body = json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        digest = hashlib.md5(body).hexdigest()
+        conn = self._conn()
+        row = conn.execute("SELECT hash FROM content WHERE id=?", (str(content_id),)).fetchone()
+        if row is not None and row[0] == digest:
+            return False
+        conn.execute(
+            "INSERT INTO content(id, hash, mp_id, body, updated) VALUES(?,?,?,?,?) "
+            "ON CONFLICT(id) DO UPDATE SET hash=excluded.hash, mp_id=excluded.mp_id, "
+            "body=excluded.body, updated=excluded.updated",
+            (str(content_id), digest, content.get("mp_id"), body, time.time()),
+        )
+        return True
+
+    def put_many(self, contents) -> int:
+        """批量保存[(content_id, content), ...]，在一个事务中写入，返回实际写入的条数"""
+        conn = self._conn()
+        count = 0
+        conn.execute("BEGIN")
+        try:
+            for content_id, content in contents:
+                count += self.put(content_id, content)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return count
+
+    def get_variant(self, content_hash: str, kind: str) -> Optional[str]:
+        row = self._conn().execute("SELECT body FROM variants WHERE hash=? AND kind=?", (content_hash, kind)).fetchone()
+        return None if row is None else row[0]
+
+    def put_variants(self, items) -> None:
+        """批量保存[(content_hash, {kind: body}), ...]，在一个事务中写入"""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO variants(hash, kind, body) VALUES(?,?,?)",
+                [(content_hash, kind, body) for content_hash, variants in items for kind, body in variants.items()],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def variant_hashes(self, hashes, kinds) -> set:
+        """返回已生成全部kinds格式的哈希"""
+        hashes = list(hashes)
+        found = set()
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            rows = self._conn().execute(
+                f"SELECT hash FROM variants WHERE hash IN ({','.join('?' * len(chunk))}) "
+                f"GROUP BY hash HAVING COUNT(*)>=?", (*chunk, len(kinds))).fetchall()
+            found.update(row[0] for row in rows)
+        return found
+
+    def meta(self, content_id: str) -> Optional[tuple]:
+        """返回(哈希, 更新时间)，用于生成ETag/Last-Modified，不存在返回None"""
+        row = self._conn().execute("SELECT hash, updated FROM content WHERE id=?", (str(content_id),)).fetchone()
+        if row is None and self._import_legacy(content_id):
+            return self.meta(content_id)
+        return row
+
+    def get(self, content_id: str) -> Optional[dict]:
+        """读取文章内容，不存在返回None"""
+        row = self._conn().execute("SELECT body FROM content WHERE id=?", (str(content_id),)).fetchone()
+        if row is None:
+            if self._import_legacy(content_id):
+                return self.get(content_id)
+            return None
+        return json.loads(row[0])
+
+    def delete(self, content_id: str):
+        self._conn().execute("DELETE FROM content WHERE id=?", (str(content_id),))
+
+    def _legacy_path(self, content_id: str) -> str:
+        path = os.path.normpath(f"{self.legacy_dir}/{content_id}.json")
+        if not path.startswith(self.legacy_dir + os.sep):
+            raise ValueError("Invalid content path: Path traversal detected.")
+        return path
+
+    def _import_legacy(self, content_id: str) -> bool:
+        """从旧版本JSON文件导入单篇内容，导入后删除原文件"""
+        path = self._legacy_path(content_id)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                content = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+        self.put(content_id, content)
+        os.unlink(path)
+        return True
+
+    def migrate(self) -> int:
+        """把data/cache/content目录中的JSON文件全部导入，返回导入数量
+
+        只删除已导入的文件，无法解析的文件和目录保留，便于人工检查
+        """
+        if not os.path.isdir(self.legacy_dir):
+            return 0
+        imported = []
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            for filename in os.listdir(self.legacy_dir):
+                if not filename.endswith(".json"):
+                    continue
+                path = os.path.join(self.legacy_dir, filename)
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        content = json.load(f)
+                except ValueError as e:
+                    print_error(f"跳过无法解析的内容缓存 {filename}: {e}")
+                    continue
+                self.put(filename[:-len(".json")], content)
+                imported.append(path)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        # 提交成功后再删除已导入的旧文件
+        for path in imported:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        return len(imported)
+
+    def compact(self, max_age_days: float = None, max_items: int = None, keep_ids=None, keep_hashes=None) -> int:
+        """清理内容并压缩文件，返回删除数量
+
+        max_age_days: 删除超过该天数未更新的内容
+        max_items: 只保留最近更新的max_items条
+        keep_ids: 仅保留这些ID（如数据库中仍存在的文章），为None时不按ID清理
+        keep_hashes: 仅保留这些正文哈希的预生成格式，为None时不清理
+        """
+        conn = self._conn()
+        removed = 0
+        if max_age_days is not None:
+            removed += conn.execute("DELETE FROM content WHERE updated<?", (time.time() - max_age_days * 86400,)).rowcount
+        if max_items is not None:
+            removed += conn.execute(
+                "DELETE FROM content WHERE id NOT IN (SELECT id FROM content ORDER BY updated DESC LIMIT ?)",
+                (int(max_items),),
+            ).rowcount
+        if keep_ids is not None:
+            keep_ids = set(keep_ids)
+            orphans = [(row[0],) for row in conn.execute("SELECT id FROM content") if row[0] not in keep_ids]
+            conn.executemany("DELETE FROM content WHERE id=?", orphans)
+            removed += len(orphans)
+        if keep_hashes is not None:
+            keep_hashes = set(keep_hashes)
+            orphans = [(row[0],) for row in conn.execute("SELECT DISTINCT hash FROM variants") if row[0] not in keep_hashes]
+            conn.executemany("DELETE FROM variants WHERE hash=?", orphans)
+        conn.execute("VACUUM")
+        return removed
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM content").fetchone()[0]
+
+
+content_store = ContentStore()
+
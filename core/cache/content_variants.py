@@ -0,0 +1,78 @@
+from typing import Iterable, Optional
+from core.print import print_error
+from .content_store import content_store, ContentStore
+
+
+class ContentVariants:
+    """文章内容的预生成格式
+
+    入库时按原始正文哈希生成并保存三种格式，RSS/JSON/webhook只读取结果，不再每次请求都解析HTML：
+    - html: 图片地址经本站代理的HTML
+    - text: 纯文本
+    - markdown: Markdown
+    未预生成的内容在首次读取时只生成并保存所读取的格式，全部格式由入库和backfill批量补齐。
+    """
+    KINDS = ("html", "text", "markdown")
+
+    def __init__(self, store: ContentStore = content_store):
+        self.store = store
+
+    def render(self, content: str, kinds: Iterable[str] = KINDS) -> dict:
+        from core.content_format import proxy_images, render_content
+        return {kind: proxy_images(content) if kind == "html" else render_content(content, kind) for kind in kinds}
+
+    def put_many(self, contents: Iterable[str]) -> int:
+        """为尚未生成的正文生成全部格式，返回新生成的数量"""
+        from core.content_format import content_hash
+        pending = {}
+        for content in contents:
+            if content and content != "DELETED":
+                pending.setdefault(content_hash(content), content)
+        if not pending:
+            return 0
+        existing = self.store.variant_hashes(pending.keys(), self.KINDS)
+        items = [(key, self.render(content)) for key, content in pending.items() if key not in existing]
+        if items:
+            self.store.put_variants(items)
+        return len(items)
+
+    def put(self, content: str) -> int:
+        return self.put_many([content])
+
+    def get(self, content: str, kind: str) -> Optional[str]:
+        """读取正文的指定格式，未生成时只生成该格式并保存，避免在请求中转换Markdown等其他格式"""
+        from core.content_format import content_hash, proxy_images, render_content
+        if not content:
+            return content
+        key = content_hash(content)
+        try:
+            body = self.store.get_variant(key, kind)
+            if body is not None:
+                return body
+            variants = self.render(content, (kind,))
+            self.store.put_variants([(key, variants)])
+            return variants[kind]
+        except Exception as e:
+            print_error(f"读取内容格式失败: {e}")
+            return proxy_images(content) if kind == "html" else render_content(content, kind)
+
+    def backfill(self, batch_size: int = 200) -> int:
+        """为数据库中已有文章补齐预生成格式，返回新生成的数量"""
+        from core.db import DB
+        from core.models.article import Article
+        session = DB.get_session()
+        query = session.query(Article.content).filter(Article.content.isnot(None), Article.content != "") \
+            .execution_options(yield_per=batch_size)
+        count = 0
+        batch = []
+        for (content,) in query:
+            batch.append(content)
+            if len(batch) >= batch_size:
+                count += self.put_many(batch)
+                batch = []
+        if batch:
+            count += self.put_many(batch)
+        return count
+
+
+content_variants = ContentVariants()
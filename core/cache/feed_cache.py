@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Optional
+from core.print import print_error
+
+
+class FeedCache:
+    """RSS输出缓存
+    
+    缓存文件按(feed_id, ext, limit, offset, kw, ctype, template)命名，
+    文件名中带上订阅源的版本号。订阅源有新文章入库或采集结束时版本号加一，
+    旧版本的缓存文件不再被命中，直到下次清理时删除。
+    """
+    ALL_FEED = "all"
+
+    def __init__(self, cache_dir: str = "data/cache/rss"):
+        self.cache_dir = os.path.normpath(cache_dir)
+        self.version_dir = os.path.join(self.cache_dir, ".version")
+        self._lock = threading.Lock()
+        os.makedirs(self.version_dir, exist_ok=True)
+
+    def _version_path(self, feed_id: str) -> str:
+        name = hashlib.md5(str(feed_id).encode("utf-8")).hexdigest()
+        return os.path.join(self.version_dir, f"{name}.json")
+
+    def get_meta(self, feed_id: str) -> dict:
+        """读取订阅源的版本信息 {version, updated}"""
+        try:
+            with open(self._version_path(feed_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"version": 0, "updated": 0}
+
+    def version(self, feed_id: str) -> int:
+        return int(self.get_meta(feed_id).get("version", 0))
+
+    def ensure_meta(self, feed_id: str) -> dict:
+        """读取版本信息，尚无记录时以当前时间作为最后修改时间写入"""
+        meta = self.get_meta(feed_id)
+        if not meta.get("updated"):
+            meta = {"version": int(meta.get("version", 0)), "updated": int(time.time())}
+            try:
+                with self._lock:
+                    self._write_meta(feed_id, meta)
+            except Exception as e:
+                print_error(f"写入RSS缓存版本失败: {e}")
+        return meta
+
+    def _write_meta(self, feed_id: str, meta: dict) -> None:
+        path = self._version_path(feed_id)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+
+    def bump(self, feed_id: str, purge: bool = False) -> int:
+        """订阅源内容变化，版本号加一，同时使全部订阅源(all)的缓存失效
+        
+        Args:
+            feed_id: 订阅源ID
+            purge: 是否同时删除该订阅源已失效的缓存文件
+            
+        Returns:
+            新的版本号
+        """
+        version = 0
+        try:
+            with self._lock:
+                for fid in dict.fromkeys([str(feed_id), self.ALL_FEED]):
+                    meta = self.get_meta(fid)
+                    meta["version"] = int(meta.get("version", 0)) + 1
+                    meta["updated"] = int(time.time())
+                    self._write_meta(fid, meta)
+                    if fid == str(feed_id):
+                        version = meta["version"]
+            if purge:
+                self.purge(feed_id)
+        except Exception as e:
+            print_error(f"更新RSS缓存版本失败: {e}")
+        return version
+
+    def cache_name(self, feed_id: str, limit: int, offset: int, kw: str = "",
+                   ctype: Optional[str] = None, template: Optional[str] = None, base_url: str = "",
+                   version: Optional[int] = None, cursor: Optional[str] = None, path: str = "") -> str:
+        """生成缓存文件名(不含扩展名)，包含当前版本号
+
+        cursor和请求路径会影响输出中的下一页链接，也计入缓存键
+        """
+        from core.config import cfg
+        if version is None:
+            version = self.version(feed_id)
+        key = json.dumps([kw, ctype, template, str(base_url), cfg.get("rss", {}), cursor, path],
+                         ensure_ascii=False, sort_keys=True, default=str)
+        digest = hashlib.md5(key.encode("utf-8")).hexdigest()[:16]
+        return f"{feed_id}_{limit}_{offset}_{version}_{digest}"
+
+    def purge(self, feed_id: str) -> None:
+        """删除订阅源及全部订阅源(all)所有版本的缓存文件"""
+        from core.rss import RSS
+        rss = RSS(cache_dir=self.cache_dir)
+        rss.clear_cache(mp_id=feed_id)
+        if feed_id != self.ALL_FEED:
+            rss.clear_cache(mp_id=self.ALL_FEED)
+
+
+feed_cache = FeedCache()
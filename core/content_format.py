@@ -1,17 +1,25 @@
  
-from bs4 import BeautifulSoup
 import re
+import hashlib
+from core.html_content import html_to_text
 from core.log import logger
-def format_content(content:str,content_format:str='html'):
-    #格式化内容
-    # content_format: 'text' or 'markdown' or 'html'
-    # content: str
-    # return: str
+# 图片地址加上/static/res/logo/前缀，经本站代理访问
+_IMG_SRC_PATTERN = re.compile(r'(<img[^>]*src=["\'])(?!\/static\/res\/logo\/)([^"\']*)', re.IGNORECASE)
+def proxy_images(text:str)->str:
+    """在所有img的src前添加/static/res/logo/前缀，已添加的不重复处理"""
+    try:
+        return _IMG_SRC_PATTERN.sub(r'\1/static/res/logo/\2', text)
+    except Exception:
+        return text
+def content_hash(content:str)->str:
+    """原始正文的哈希，用作预生成格式的键"""
+    return hashlib.md5((content or "").encode("utf-8")).hexdigest()
+def render_content(content:str,content_format:str='html'):
+    """直接转换内容格式，不读取预生成结果"""
     try:
         if content_format == 'text':
             # 去除HTML标签，保留纯文本
-            soup = BeautifulSoup(content, 'html.parser')
-            text = soup.get_text().strip()
+            text = html_to_text(content).strip()
             content = re.sub(r'\n\s*\n', '\n\n', text)
         elif content_format == 'markdown':
             from markdownify import markdownify as md
@@ -22,4 +30,14 @@ def format_content(content:str,content_format:str='html'):
             content = re.sub(r'\n+', '\n', content)
     except Exception as e:
         logger.error('format_content error: %s',e)
-    return content
\ No newline at end of file
+    return content
+def format_content(content:str,content_format:str='html'):
+    #格式化内容
+    # content_format: 'text' or 'markdown' or 'html'
+    # content: str
+    # return: str
+    # text/markdown优先读取入库时预生成的结果
+    if content and content_format in ('text','markdown'):
+        from core.cache.content_variants import content_variants
+        return content_variants.get(content,content_format)
+    return content
@@ -0,0 +1,76 @@
+# core/crawl_source.py - 链接/专利/行业来源及其文章的保存
+import time
+import hashlib
+from datetime import datetime
+from typing import Dict, List
+from core.db import DB
+from core.idgen import new_id
+from core.models.links import Link
+from core.models.link_articles import LinkArticle
+from core.models.patents import Patent
+from core.models.patent_articles import PatentArticle
+from core.models.industries import Industry
+from core.models.industry_articles import IndustryArticle
+
+
+def url_hash(url: str) -> str:
+    """文章URL的MD5，用于(来源ID, url_hash)唯一索引"""
+    return hashlib.md5(url.encode('utf-8')).hexdigest()
+
+
+class CrawlSource:
+    """一类网站来源：来源表、文章表和文章表中指向来源的外键列"""
+
+    def __init__(self, name: str, model, article_model, source_key: str):
+        self.name = name
+        self.model = model
+        self.article_model = article_model
+        self.source_key = source_key
+
+    def save_articles(self, session, source_id: str, articles: List[Dict]) -> int:
+        """保存爬取到的文章，返回新增数量，不提交事务
+
+        先用一次IN查询排除已有的URL，再一条语句批量插入；
+        文章表上(来源ID, url_hash)唯一，并发写入同一篇文章时由INSERT IGNORE跳过，
+        所以新增数量以插入语句实际影响的行数为准。
+        """
+        article_model = self.article_model
+        source_key = getattr(article_model, self.source_key)
+        articles = {url_hash(a['url']): a for a in articles if a.get('url')}
+        if not articles:
+            return 0
+        existing = {h for (h,) in session.query(article_model.url_hash).filter(
+            source_key == source_id, article_model.url_hash.in_(list(articles)))}
+        now = datetime.now().replace(microsecond=0)
+        publish_time = int(time.time())
+        rows = [{
+            'id': new_id(),
+            self.source_key: source_id,
+            'title': article.get('title', ''),
+            'url': article['url'],
+            'url_hash': h,
+            'publish_time': publish_time,
+            'status': 1,
+            'created_at': now,
+            'updated_at': now,
+        } for h, article in articles.items() if h not in existing]
+        if hasattr(article_model, 'description'):
+            # 链接文章暂时用标题作为描述
+            for row in rows:
+                row['description'] = row['title']
+        if not rows:
+            return 0
+        # 走Core层executemany才能拿到影响行数，ORM批量插入的结果没有rowcount
+        return session.connection().execute(DB.insert_ignore(article_model), rows).rowcount
+
+    def count_articles(self, session, source_id: str) -> int:
+        article_model = self.article_model
+        return session.query(article_model).filter(
+            getattr(article_model, self.source_key) == source_id, article_model.status != 1000).count()
+
+
+LINK_SOURCE = CrawlSource('link', Link, LinkArticle, 'link_id')
+PATENT_SOURCE = CrawlSource('patent', Patent, PatentArticle, 'patent_id')
+INDUSTRY_SOURCE = CrawlSource('industry', Industry, IndustryArticle, 'industry_id')
+
+SOURCES = [LINK_SOURCE, PATENT_SOURCE, INDUSTRY_SOURCE]
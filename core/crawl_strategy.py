@@ -0,0 +1,229 @@
+# core/crawl_strategy.py - 链接爬虫的HTTP抓取方式（RSS/站点地图/静态HTML）
+import asyncio
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+import httpx
+from bs4 import BeautifulSoup
+from core.crawler_pool import DEFAULT_USER_AGENT
+import logging
+try:
+    import lxml
+except ImportError:
+    lxml = None
+
+logger = logging.getLogger(__name__)
+
+# 单个响应最多读取的字节数，避免超大站点地图占满内存
+MAX_BODY_BYTES = 5 * 1024 * 1024
+# 站点地图索引最多跟进的子站点地图数
+MAX_CHILD_SITEMAPS = 2
+
+FEED_TYPES = ('application/rss+xml', 'application/atom+xml', 'application/feed+json', 'application/xml', 'text/xml')
+
+STRATEGY_FEED = 'feed'
+STRATEGY_SITEMAP = 'sitemap'
+STRATEGY_HTTP = 'http'
+STRATEGY_BROWSER = 'browser'
+
+
+def split_strategy(strategy: Optional[str]) -> Tuple[str, str]:
+    """记录的抓取方式形如 feed:地址、sitemap:地址、http、browser"""
+    name, _, target = (strategy or '').partition(':')
+    return name, target
+
+
+def _local(tag) -> str:
+    """去掉XML命名空间"""
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+
+def _child_text(node, name: str) -> str:
+    for child in node:
+        if _local(child.tag) == name:
+            return (child.text or '').strip()
+    return ''
+
+
+def parse_feed(body: bytes) -> List[Dict]:
+    """解析RSS/Atom，返回[{'text','href'}]"""
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError:
+        return []
+    if _local(root.tag) not in ('rss', 'feed', 'RDF'):
+        return []
+    items = []
+    for node in root.iter():
+        if _local(node.tag) not in ('item', 'entry'):
+            continue
+        href = ''
+        for child in node:
+            if _local(child.tag) != 'link':
+                continue
+            if child.text and child.text.strip():
+                href = child.text.strip()
+                break
+            if child.get('href') and child.get('rel', 'alternate') == 'alternate':
+                href = child.get('href')
+                break
+        items.append({'text': _child_text(node, 'title'), 'href': href or _child_text(node, 'guid')})
+    return items
+
+
+def parse_sitemap(body: bytes) -> Tuple[List[Dict], List[str]]:
+    """解析站点地图，返回(带标题的文章[{'text','href'}], 子站点地图地址)
+
+    普通站点地图只有地址没有标题，只采用新闻站点地图(news:title)中的条目，按lastmod倒序。
+    """
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError:
+        return [], []
+    kind = _local(root.tag)
+    if kind == 'sitemapindex':
+        children = []
+        for node in root:
+            loc = _child_text(node, 'loc')
+            if loc:
+                children.append((_child_text(node, 'lastmod'), loc))
+        children.sort(reverse=True)
+        return [], [loc for _, loc in children]
+    if kind != 'urlset':
+        return [], []
+    entries = []
+    for node in root:
+        loc = _child_text(node, 'loc')
+        title = ''
+        lastmod = _child_text(node, 'lastmod')
+        for child in node:
+            if _local(child.tag) == 'news':
+                title = _child_text(child, 'title')
+                lastmod = _child_text(child, 'publication_date') or lastmod
+        if loc and title:
+            entries.append((lastmod, loc, title))
+    entries.sort(key=lambda e: e[0], reverse=True)
+    return [{'text': title, 'href': loc} for _, loc, title in entries], []
+
+
+def parse_page(body: bytes, encoding: Optional[str] = None):
+    return BeautifulSoup(body, 'lxml' if lxml is not None else 'html.parser', from_encoding=encoding)
+
+
+def page_info(soup, url: str) -> Dict[str, str]:
+    info = {'url': url, 'title': '', 'description': ''}
+    if soup.title and soup.title.string:
+        info['title'] = soup.title.string.strip()
+    meta = soup.find('meta', attrs={'name': 'description'})
+    if meta and meta.get('content'):
+        info['description'] = meta['content'].strip()
+    return info
+
+
+def is_site_root(url: str) -> bool:
+    """站点首页才使用整站的/feed和/sitemap.xml，栏目页只使用页面声明的订阅地址"""
+    path = urlparse(url).path.rstrip('/')
+    return path in ('', '/index.html', '/index.htm', '/index.php')
+
+
+def discover_feeds(soup, url: str) -> List[str]:
+    """页面声明的RSS/Atom地址，站点首页再加上默认的/feed"""
+    feeds = []
+    for link in soup.find_all('link', href=True):
+        rel = link.get('rel') or []
+        rel = rel if isinstance(rel, list) else rel.split()
+        if 'alternate' in [r.lower() for r in rel] and (link.get('type') or '').lower() in FEED_TYPES:
+            feeds.append(urljoin(url, link['href']))
+    if is_site_root(url):
+        feeds.append(urljoin(url, '/feed'))
+    return list(dict.fromkeys(feeds))
+
+
+def select_links(soup, selectors: List[str]) -> List[Dict]:
+    """按选择器顺序收集链接，同一元素只返回第一次匹配，格式与浏览器提取一致"""
+    seen = set()
+    result = []
+    for rank, selector in enumerate(selectors):
+        try:
+            nodes = soup.select(selector)
+        except Exception:
+            continue
+        for node in nodes:
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            result.append({'rank': rank, 'text': node.get_text(' ', strip=True), 'href': node.get('href')})
+    return result
+
+
+class HttpCrawler:
+    """不启动浏览器的抓取方式
+
+    依次尝试页面声明的RSS/Atom与/feed、/sitemap.xml中的新闻条目、静态HTML中的文章链接，
+    共用一个带连接池的httpx.AsyncClient。verify为False时不校验HTTPS证书(crawler.verify_ssl)。
+    """
+
+    def __init__(self, timeout: float = 15, max_connections: int = 20, verify: bool = True):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.verify = verify
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP客户端与事件循环绑定，在新的事件循环中使用时重新创建"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._loop = loop
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=5),
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                headers={'User-Agent': DEFAULT_USER_AGENT},
+                follow_redirects=True,
+                verify=self.verify,
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+
+    async def fetch(self, url: str) -> Tuple[Optional[bytes], Optional[str], str]:
+        """GET请求，返回(内容, 编码, Content-Type)，失败或非200时内容为None"""
+        try:
+            async with self.client.stream('GET', url) as response:
+                if response.status_code != 200:
+                    return None, None, ''
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body.extend(chunk)
+                    if len(body) > MAX_BODY_BYTES:
+                        break
+                return bytes(body), response.charset_encoding, response.headers.get('content-type', '').lower()
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            logger.debug(f"HTTP请求失败 {url}: {e}")
+            return None, None, ''
+
+    async def fetch_feed(self, url: str) -> List[Dict]:
+        body, _, _ = await self.fetch(url)
+        return parse_feed(body) if body else []
+
+    async def fetch_sitemap(self, url: str) -> List[Dict]:
+        body, _, _ = await self.fetch(url)
+        if not body:
+            return []
+        items, children = parse_sitemap(body)
+        for child in children[:MAX_CHILD_SITEMAPS]:
+            child_body, _, _ = await self.fetch(child)
+            if child_body:
+                items.extend(parse_sitemap(child_body)[0])
+        return items
+
+    async def fetch_page(self, url: str):
+        body, encoding, content_type = await self.fetch(url)
+        if not body or ('html' not in content_type and content_type):
+            return None
+        return parse_page(body, encoding)
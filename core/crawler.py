@@ -1,5 +1,5 @@
 # core/crawler.py - 链接管理爬虫服务
-from playwright.async_api import async_playwright, TimeoutError as PWTimeout
+from playwright.async_api import TimeoutError as PWTimeout
 import asyncio
 import time
 import os
@@ -7,28 +7,118 @@ import sys
 import shutil
 from typing import List, Dict, Optional
 from urllib.parse import urljoin, urlparse
+from core.config import cfg
+from core.crawler_pool import CrawlerPool
+from core.crawl_profile import CrawlProfile, get_profile
+from core.crawl_strategy import (HttpCrawler, split_strategy, page_info, discover_feeds, select_links, is_site_root,
+                                 STRATEGY_FEED, STRATEGY_SITEMAP, STRATEGY_HTTP, STRATEGY_BROWSER)
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 通用文章选择器策略（按优先级排序）
+ARTICLE_SELECTORS = [
+    # 新闻和博客网站常用选择器
+    'article h1 a, article h2 a, article h3 a',
+    'article a[href]',
+    '.post-title a, .entry-title a',
+    '.article-title a, .news-title a',
+    'h1 a, h2 a, h3 a',
+    '.title a',
+    # 列表页面选择器
+    'li a[href]',
+    'ul a[href]',
+    # 通用链接选择器
+    'a[href*="/article/"], a[href*="/post/"], a[href*="/news/"]',
+    'a[href*="blog"], a[href*="story"]',
+    'a[title][href]'
+]
+
+# 在页面内按选择器顺序收集链接，同一元素只返回第一次匹配
+EXTRACT_LINKS_JS = """
+(selectors) => {
+    const seen = new Set();
+    const result = [];
+    selectors.forEach((selector, rank) => {
+        let nodes;
+        try {
+            nodes = document.querySelectorAll(selector);
+        } catch (e) {
+            return;
+        }
+        for (const el of nodes) {
+            if (seen.has(el)) continue;
+            seen.add(el);
+            result.push({
+                rank: rank,
+                text: el.innerText || '',
+                href: el.getAttribute('href')
+            });
+        }
+    });
+    return result;
+}
+"""
+
+# DOM在quiet毫秒内没有变化或达到cap毫秒时返回
+WAIT_DOM_STABLE_JS = """
+([quiet, cap]) => new Promise((resolve) => {
+    let timer = null;
+    const observer = new MutationObserver(() => {
+        clearTimeout(timer);
+        timer = setTimeout(done, quiet);
+    });
+    function done() {
+        observer.disconnect();
+        resolve();
+    }
+    observer.observe(document, {childList: true, subtree: true, characterData: true});
+    timer = setTimeout(done, quiet);
+    setTimeout(done, cap);
+})
+"""
+
+# 常见cookie同意按钮，合并为一个选择器一次查找
+COOKIE_CONSENT_SELECTOR = ', '.join([
+    'button:has-text("Accept")',
+    'button:has-text("同意")',
+    'button:has-text("Agree")',
+    'button:has-text("确定")',
+    'button#onetrust-accept-btn-handler',
+    '.cookie-consent button',
+    '[data-testid="cookie-accept"]'
+])
+
 class LinkCrawler:
     """链接管理爬虫服务"""
     
-    def __init__(self, headless: bool = True, timeout: int = 300000):
+    def __init__(self, headless: bool = True, timeout: int = 300000, pool: Optional[CrawlerPool] = None):
         self.headless = headless
         self.timeout = timeout
         self.browser_executable = self._find_browser_executable()
+        # 浏览器常驻复用，每次爬取只新建页面
+        self.pool = pool or CrawlerPool(
+            size=int(cfg.get("crawler.pool_size", 2) or 2),
+            max_pages=int(cfg.get("crawler.max_pages", 50) or 50),
+            headless=headless,
+            executable_path=self.browser_executable,
+        )
+        # 只有明确配置为False时才跳过HTTPS证书校验
+        self.http = HttpCrawler(verify=cfg.get("crawler.verify_ssl", True) is not False)
         
-    async def crawl_website_articles(self, url: str, max_articles: int = 50) -> Dict:
+    async def crawl_website_articles(self, url: str, max_articles: int = 50, profile: Optional[str] = None,
+                                     strategy: Optional[str] = None) -> Dict:
         """
         爬取网站的文章列表
         
         Args:
             url: 目标网站URL
             max_articles: 最大抓取文章数
+            profile: 抓取配置名称(fast/js/full)，默认fast
+            strategy: 上次成功的抓取方式，先直接使用，没有结果时重新探测
             
         Returns:
-            Dict: 包含成功状态、文章列表和统计信息
+            Dict: 包含成功状态、文章列表、统计信息和本次成功的抓取方式strategy
         """
         result = {
             'success': False,
@@ -39,46 +129,32 @@ class LinkCrawler:
                 'title': '',
                 'description': ''
             },
-            'error': None
+            'error': None,
+            'strategy': None
         }
         
+        crawl_profile = get_profile(profile)
+        if crawl_profile.http_first and split_strategy(strategy)[0] != STRATEGY_BROWSER:
+            try:
+                if await self._crawl_http(result, url, max_articles, strategy):
+                    return result
+            except Exception as e:
+                logger.warning(f"HTTP抓取失败，改用浏览器: {e}")
+        
         try:
-            async with async_playwright() as p:
-                # 根据环境选择浏览器启动方式
-                if self.browser_executable:
-                    # 使用系统浏览器
-                    logger.info(f"使用系统浏览器: {self.browser_executable}")
-                    browser = await p.chromium.launch(
-                        executable_path=self.browser_executable,
-                        headless=self.headless,
-                        args=[
-                            '--no-sandbox',
-                            '--disable-dev-shm-usage',
-                            '--disable-gpu',
-                            '--disable-features=VizDisplayCompositor'
-                        ]
-                    )
-                else:
-                    # 使用Playwright内置浏览器
-                    logger.info("使用Playwright内置浏览器")
-                    browser = await p.chromium.launch(headless=self.headless)
-                
-                context = await browser.new_context(
-                    user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-                )
-                page = await context.new_page()
-                
-                logger.info(f"正在爬取网站: {url}")
+            async with self.pool.page(crawl_profile) as page:
+                logger.info(f"正在爬取网站: {url} ({crawl_profile.name})")
                 await page.goto(url, wait_until="domcontentloaded", timeout=self.timeout)
                 
-                # 等待页面加载
-                await asyncio.sleep(3)
+                # 等待页面渲染完成
+                await self._wait_for_page(page, crawl_profile)
                 
                 # 尝试关闭可能的cookie同意弹窗
                 await self._handle_cookie_consent(page)
                 
                 # 获取网站基本信息
-                result['website_info'] = await self._extract_website_info(page, url)
+                website_info = await self._extract_website_info(page, url)
+                result['website_info'] = {key: value or result['website_info'][key] for key, value in website_info.items()}
                 
                 # 爬取文章列表
                 articles = await self._extract_articles(page, url, max_articles)
@@ -87,17 +163,58 @@ class LinkCrawler:
                 result['total_found'] = len(articles)
                 result['success'] = len(articles) > 0
                 
-                if not articles:
+                if articles:
+                    result['strategy'] = STRATEGY_BROWSER
+                else:
                     result['error'] = "未找到符合条件的文章链接"
                 
-                await browser.close()
-                
         except Exception as e:
             logger.error(f"爬取网站时发生错误: {str(e)}")
             result['error'] = str(e)
             
         return result
     
+    async def _crawl_http(self, result: Dict, url: str, max_articles: int, strategy: Optional[str]) -> bool:
+        """不启动浏览器抓取：RSS/Atom -> 新闻站点地图 -> 静态HTML，成功时填充result"""
+        name, target = split_strategy(strategy)
+        
+        def fill(candidates: List[Dict], found: str, label: Optional[str] = None) -> bool:
+            articles = self._select_articles(candidates, url, max_articles, [label] if label else None)
+            if not articles:
+                return False
+            result.update(success=True, articles=articles, total_found=len(articles), error=None, strategy=found)
+            logger.info(f"使用{found}抓取网站: {url}")
+            return True
+        
+        # 上次通过RSS或站点地图成功时直接读取，不再请求页面
+        if name == STRATEGY_FEED and target and fill(await self.http.fetch_feed(target), strategy, target):
+            return True
+        if name == STRATEGY_SITEMAP and target and fill(await self.http.fetch_sitemap(target), strategy, target):
+            return True
+        
+        soup = await self.http.fetch_page(url)
+        if soup is not None:
+            result['website_info'] = page_info(soup, url)
+        if name == STRATEGY_HTTP and soup is not None:
+            if fill(select_links(soup, ARTICLE_SELECTORS), STRATEGY_HTTP):
+                return True
+        
+        # 重新探测
+        feeds = discover_feeds(soup, url) if soup is not None else []
+        for feed_url in feeds:
+            found = f"{STRATEGY_FEED}:{feed_url}"
+            if found != strategy and fill(await self.http.fetch_feed(feed_url), found, feed_url):
+                return True
+        if is_site_root(url):
+            sitemap_url = urljoin(url, '/sitemap.xml')
+            found = f"{STRATEGY_SITEMAP}:{sitemap_url}"
+            if found != strategy and fill(await self.http.fetch_sitemap(sitemap_url), found, sitemap_url):
+                return True
+        if soup is not None and name != STRATEGY_HTTP:
+            if fill(select_links(soup, ARTICLE_SELECTORS), STRATEGY_HTTP):
+                return True
+        return False
+    
     def _find_browser_executable(self) -> Optional[str]:
         """查找可用的浏览器可执行文件"""
         
@@ -127,27 +244,26 @@ class LinkCrawler:
         logger.info("开发环境，使用Playwright内置浏览器")
         return None
     
+    async def _wait_for_page(self, page, profile: CrawlProfile):
+        """按抓取配置等待网络空闲或DOM稳定，最多等待max_wait_ms"""
+        try:
+            if profile.wait == "networkidle":
+                await page.wait_for_load_state("networkidle", timeout=profile.max_wait_ms)
+            else:
+                await page.evaluate(WAIT_DOM_STABLE_JS, [profile.quiet_ms, profile.max_wait_ms])
+        except PWTimeout:
+            logger.debug(f"等待页面加载超过{profile.max_wait_ms}ms，直接提取")
+        except Exception as e:
+            logger.debug(f"等待页面加载失败: {e}")
+    
     async def _handle_cookie_consent(self, page):
         """处理cookie同意弹窗"""
-        cookie_selectors = [
-            'button:has-text("Accept")',
-            'button:has-text("同意")',
-            'button:has-text("Agree")',
-            'button:has-text("确定")',
-            'button#onetrust-accept-btn-handler',
-            '.cookie-consent button',
-            '[data-testid="cookie-accept"]'
-        ]
-        
-        for selector in cookie_selectors:
-            try:
-                count = await page.locator(selector).count()
-                if count > 0:
-                    await page.locator(selector).first.click(timeout=2000)
-                    await asyncio.sleep(1)
-                    break
-            except Exception:
-                continue
+        try:
+            button = page.locator(COOKIE_CONSENT_SELECTOR).filter(visible=True).first
+            if await button.count() > 0:
+                await button.click(timeout=2000)
+        except Exception:
+            pass
     
     async def _extract_website_info(self, page, url: str) -> Dict[str, str]:
         """提取网站基本信息"""
@@ -177,78 +293,66 @@ class LinkCrawler:
         return info
     
     async def _extract_articles(self, page, base_url: str, max_articles: int) -> List[Dict[str, str]]:
-        """提取文章列表"""
+        """提取文章列表
+
+        一次page.evaluate取回所有选择器匹配到的链接（选择器序号、文本、href、位置），
+        再在Python中按选择器优先级过滤去重，避免逐个元素与浏览器往返。
+        """
+        try:
+            candidates = await page.evaluate(EXTRACT_LINKS_JS, ARTICLE_SELECTORS)
+        except Exception as e:
+            logger.warning(f"提取页面链接失败: {e}")
+            return []
+        return self._select_articles(candidates, base_url, max_articles)
+    
+    def _select_articles(self, candidates: List[Dict], base_url: str, max_articles: int,
+                         labels: Optional[List[str]] = None) -> List[Dict[str, str]]:
+        """按rank分组依次过滤去重候选链接，labels为各组名称，默认是选择器"""
+        labels = labels or ARTICLE_SELECTORS
         articles = []
         
-        # 通用文章选择器策略（按优先级排序）
-        selectors = [
-            # 新闻和博客网站常用选择器
-            'article h1 a, article h2 a, article h3 a',
-            'article a[href]',
-            '.post-title a, .entry-title a',
-            '.article-title a, .news-title a',
-            'h1 a, h2 a, h3 a',
-            '.title a',
-            # 列表页面选择器
-            'li a[href]',
-            'ul a[href]',
-            # 通用链接选择器
-            'a[href*="/article/"], a[href*="/post/"], a[href*="/news/"]',
-            'a[href*="blog"], a[href*="story"]',
-            'a[title][href]'
-        ]
+        groups: List[List[Dict]] = [[] for _ in labels]
+        for item in candidates:
+            groups[item.get('rank', 0)].append(item)
         
         found_urls = set()
         
-        for selector in selectors:
-            try:
-                links = await page.query_selector_all(selector)
+        for label, links in zip(labels, groups):
+            if not links:
+                continue
                 
-                if not links:
-                    continue
+            logger.info(f"从 '{label}' 找到 {len(links)} 个潜在链接")
+            
+            for link in links:
+                if len(articles) >= max_articles:
+                    break
                     
-                logger.info(f"使用选择器 '{selector}' 找到 {len(links)} 个潜在链接")
+                title = (link.get('text') or '').strip()
+                href = link.get('href')
                 
-                for link in links:
-                    if len(articles) >= max_articles:
-                        break
-                        
-                    try:
-                        # 获取链接信息
-                        title = (await link.inner_text()).strip()
-                        href = await link.get_attribute('href')
-                        
-                        if not title or not href or len(title) < 5:
-                            continue
-                            
-                        # 处理相对链接
-                        full_url = self._normalize_url(href, base_url)
-                        
-                        if not full_url or full_url in found_urls:
-                            continue
-                            
-                        # 过滤无效链接
-                        if not self._is_valid_article_url(full_url, base_url):
-                            continue
-                            
-                        found_urls.add(full_url)
-                        articles.append({
-                            'title': title[:200],  # 限制标题长度
-                            'url': full_url,
-                            'extracted_at': time.strftime('%Y-%m-%d %H:%M:%S')
-                        })
-                        
-                    except Exception as e:
-                        logger.debug(f"处理单个链接时出错: {e}")
-                        continue
+                if not title or not href or len(title) < 5:
+                    continue
+                    
+                # 处理相对链接
+                full_url = self._normalize_url(href, base_url)
                 
-                # 如果已经找到足够的文章，停止尝试其他选择器
-                if len(articles) >= min(max_articles, 10):
-                    break
+                if not full_url or full_url in found_urls:
+                    continue
                     
-            except Exception as e:
-                logger.debug(f"选择器 '{selector}' 执行失败: {e}")
-                continue
+                # 过滤无效链接
+                if not self._is_valid_article_url(full_url, base_url):
+                    continue
+                    
+                found_urls.add(full_url)
+                articles.append({
+                    'title': title[:200],  # 限制标题长度
+                    'url': full_url,
+                    'extracted_at': time.strftime('%Y-%m-%d %H:%M:%S')
+                })
+            
+            # 如果已经找到足够的文章，停止尝试其他选择器
+            if len(articles) >= min(max_articles, 10):
+                break
         
         logger.info(f"共提取到 {len(articles)} 篇文章")
         return articles
@@ -306,15 +410,30 @@ class LinkCrawler:
 # 全局爬虫实例
 crawler_instance = LinkCrawler()
 
-async def crawl_website(url: str, max_articles: int = 50) -> Dict:
+async def crawl_website(url: str, max_articles: int = 50, profile: Optional[str] = None,
+                        strategy: Optional[str] = None) -> Dict:
     """
     爬取网站文章的便捷函数
     
     Args:
         url: 目标网站URL
         max_articles: 最大文章数
+        profile: 抓取配置名称
+        strategy: 上次成功的抓取方式
         
     Returns:
         爬取结果字典
     """
-    return await crawler_instance.crawl_website_articles(url, max_articles)
\ No newline at end of file
+    return await crawler_instance.crawl_website_articles(url, max_articles, profile, strategy)
+
+async def start_crawler():
+    """应用启动时预先启动爬虫浏览器，失败时在首次爬取时重试"""
+    try:
+        await crawler_instance.pool.start()
+    except Exception as e:
+        logger.warning(f"启动爬虫浏览器失败，将在首次爬取时重试: {e}")
+
+async def stop_crawler():
+    """应用退出时关闭爬虫浏览器和HTTP连接"""
+    await crawler_instance.pool.close()
+    await crawler_instance.http.close()
\ No newline at end of file
@@ -0,0 +1,189 @@
+# core/crawler_pool.py - 链接爬虫的Playwright浏览器池
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+from playwright.async_api import async_playwright, Error as PWError, TimeoutError as PWTimeout
+from core.crawl_profile import CrawlProfile, get_profile
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+class PooledContext:
+    """一个可复用的浏览器上下文，记录已打开的页面数，请求拦截规则由抓取配置决定"""
+
+    def __init__(self, index: int, context, profile: CrawlProfile):
+        self.index = index
+        self.context = context
+        self.profile = profile
+        self.pages = 0
+        self.broken = False
+
+    async def close(self) -> None:
+        try:
+            await self.context.close()
+        except Exception as e:
+            logger.debug(f"关闭浏览器上下文{self.index}失败: {e}")
+
+
+class CrawlerPool:
+    """Playwright Chromium浏览器池
+
+    整个进程共用一个常驻的Chromium，按抓取配置分别创建上下文并复用，同时最多size个页面在抓取；
+    每个上下文打开max_pages个页面后关闭重建，浏览器断开后自动重启。
+    由应用生命周期启动和关闭，未启动时首次使用自动启动。
+    """
+
+    def __init__(self, size: int = 2, max_pages: int = 50, headless: bool = True,
+                 executable_path: Optional[str] = None, user_agent: str = DEFAULT_USER_AGENT):
+        self.size = max(1, int(size))
+        self.max_pages = max(1, int(max_pages))
+        self.headless = headless
+        self.executable_path = executable_path
+        self.user_agent = user_agent
+        self._playwright = None
+        self._browser = None
+        self._idle: Dict[str, List[PooledContext]] = {}
+        self._created = 0
+        self._in_use = 0
+        self._loop = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def _alive(self) -> bool:
+        """是否还有未关闭的浏览器或正在使用的页面"""
+        return self._playwright is not None or self._browser is not None or self._in_use > 0
+
+    def _bind_loop(self) -> None:
+        """浏览器对象与事件循环绑定
+
+        旧事件循环中的浏览器已关闭时才能在新的事件循环中使用，否则抛出RuntimeError，
+        避免丢弃仍在运行的Chromium进程。
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None and self._alive:
+            raise RuntimeError("爬虫浏览器池仍在其他事件循环中运行，请先在原事件循环中调用close()")
+        self._loop = loop
+        self._lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(self.size)
+        self._playwright = None
+        self._browser = None
+        self._idle = {}
+        self._in_use = 0
+
+    async def start(self) -> None:
+        """启动浏览器，已启动且连接正常时直接返回"""
+        self._bind_loop()
+        async with self._lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            await self._shutdown()
+            self._playwright = await async_playwright().start()
+            if self.executable_path:
+                logger.info(f"使用系统浏览器: {self.executable_path}")
+                self._browser = await self._playwright.chromium.launch(
+                    executable_path=self.executable_path,
+                    headless=self.headless,
+                    args=[
+                        '--no-sandbox',
+                        '--disable-dev-shm-usage',
+                        '--disable-gpu',
+                        '--disable-features=VizDisplayCompositor'
+                    ]
+                )
+            else:
+                logger.info("使用Playwright内置浏览器")
+                self._browser = await self._playwright.chromium.launch(headless=self.headless)
+
+    async def _shutdown(self) -> None:
+        idle, self._idle = self._idle, {}
+        for contexts in idle.values():
+            for ctx in contexts:
+                await ctx.close()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logger.debug(f"关闭爬虫浏览器失败: {e}")
+            self._browser = None
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logger.debug(f"停止Playwright失败: {e}")
+            self._playwright = None
+
+    async def close(self) -> None:
+        """关闭所有上下文和浏览器，必须在启动浏览器的事件循环中调用"""
+        if self._loop is not asyncio.get_running_loop():
+            if self._loop is not None and self._alive:
+                raise RuntimeError("爬虫浏览器池只能在启动它的事件循环中关闭")
+            return
+        async with self._lock:
+            await self._shutdown()
+
+    async def _acquire(self, profile: CrawlProfile) -> PooledContext:
+        await self.start()
+        idle = self._idle.get(profile.name)
+        if idle:
+            return idle.pop()
+        context = await self._browser.new_context(user_agent=self.user_agent)
+        if profile.intercept:
+            async def route(route):
+                if profile.should_block(route.request.resource_type, route.request.url):
+                    await route.abort()
+                else:
+                    await route.continue_()
+            await context.route("**/*", route)
+        self._created += 1
+        return PooledContext(self._created, context, profile)
+
+    async def _release(self, ctx: PooledContext) -> None:
+        browser_ok = self._browser is not None and self._browser.is_connected()
+        if ctx.broken or ctx.pages >= self.max_pages or not browser_ok:
+            await ctx.close()
+        else:
+            self._idle.setdefault(ctx.profile.name, []).append(ctx)
+
+    @asynccontextmanager
+    async def page(self, profile: Optional[CrawlProfile] = None):
+        """按抓取配置取得一个新页面，用完关闭页面并归还上下文；超过并发数时排队等待"""
+        profile = profile or get_profile()
+        self._bind_loop()
+        async with self._semaphore:
+            ctx = await self._acquire(profile)
+            self._in_use += 1
+            page = None
+            try:
+                page = await ctx.context.new_page()
+                yield page
+            except PWTimeout:
+                raise
+            except PWError:
+                # 上下文或浏览器已崩溃，归还时关闭重建
+                ctx.broken = True
+                raise
+            finally:
+                self._in_use -= 1
+                ctx.pages += 1
+                if page is not None:
+                    try:
+                        await page.close()
+                    except Exception:
+                        ctx.broken = True
+                await self._release(ctx)
+
+    def info(self) -> dict:
+        return {
+            "started": self._browser is not None and self._browser.is_connected(),
+            "size": self.size,
+            "max_pages": self.max_pages,
+            "in_use": self._in_use,
+            "idle_contexts": {name: len(contexts) for name, contexts in self._idle.items()},
+            "contexts_created": self._created,
+        }
@@ -70,7 +70,7 @@ class Db:
             from datetime import datetime
             art = Article(**article_data)
             if art.id:
-               art.id=f"{str(art.mp_id)}-{art.id}".replace("MP_WXS_","")
+               art.id=self.article_id(art.mp_id, art.id)
             if art.created_at is None:
                 art.created_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             if art.updated_at is None:
@@ -83,6 +83,7 @@ class Db:
             session.add(art)
             # self._session.merge(art)
             sta=session.commit()
+            self._after_insert(session, [art])
             
         except Exception as e:
             if "UNIQUE" in str(e) or "Duplicate entry" in str(e):
@@ -92,6 +93,99 @@ class Db:
             return False
         return True    
         
+    @staticmethod
+    def article_id(mp_id, aid) -> str:
+        """由公众号ID和文章aid生成articles表主键"""
+        return f"{str(mp_id)}-{aid}".replace("MP_WXS_","")
+
+    def insert_ignore(self, model):
+        """生成遇到主键或唯一索引冲突时跳过的INSERT语句"""
+        dialect = self.engine.dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+            return insert(model).on_conflict_do_nothing()
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+            return insert(model).on_conflict_do_nothing()
+        from sqlalchemy import insert
+        stmt = insert(model)
+        if dialect in ("mysql", "mariadb"):
+            stmt = stmt.prefix_with("IGNORE")
+        return stmt
+
+    def add_articles(self, articles: List[dict], chunk_size: int = 500) -> Optional[set]:
+        """批量写入文章，已存在的文章直接跳过，返回实际新增的文章ID集合，写入出错时返回None
+
+        每批先查出已存在的ID，再用INSERT ... ON CONFLICT DO NOTHING(MySQL为INSERT IGNORE)一次写入，
+        不再依赖逐条提交和捕获UNIQUE异常判断重复。
+        """
+        from datetime import datetime
+        from core.models.base import DATA_STATUS
+        now = datetime.now().replace(microsecond=0)
+        columns = [c.name for c in Article.__table__.columns]
+        rows = {}
+        for data in articles:
+            row = {name: data.get(name) for name in columns}
+            if not row["id"]:
+                continue
+            row["id"] = self.article_id(row["mp_id"], row["id"])
+            for name in ("created_at", "updated_at"):
+                value = row[name]
+                if value is None:
+                    row[name] = now
+                elif isinstance(value, str):
+                    row[name] = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+            row["status"] = DATA_STATUS.ACTIVE
+            rows.setdefault(row["id"], row)
+        rows = list(rows.values())
+        new_rows = []
+        failed = False
+        session = self.get_session()
+        try:
+            stmt = self.insert_ignore(Article)
+            for i in range(0, len(rows), chunk_size):
+                chunk = rows[i:i + chunk_size]
+                existing = {r[0] for r in session.query(Article.id).filter(Article.id.in_([r["id"] for r in chunk]))}
+                chunk = [r for r in chunk if r["id"] not in existing]
+                if chunk:
+                    session.execute(stmt, chunk)
+                    session.commit()
+                    new_rows.extend(chunk)
+        except Exception as e:
+            session.rollback()
+            failed = True
+            print_error(f"Failed to add articles: {e}")
+        if new_rows:
+            self._after_insert(session, [Article(**row) for row in new_rows])
+        return None if failed else {row["id"] for row in new_rows}
+
+    def _after_insert(self, session, arts: List[Article]):
+        """新文章入库后：使RSS缓存失效、写入内容存储、更新检索索引"""
+        from core.cache import feed_cache
+        for mp_id in {art.mp_id for art in arts}:
+            feed_cache.bump(mp_id)
+        self.store_contents(session, arts)
+        from core.search import get_search_index
+        get_search_index().add_articles(arts)
+
+    def store_contents(self, session, arts: List[Article]):
+        """写入文章内容存储(入库或补全内容后)，之后RSS请求只在内容变化时才重写"""
+        try:
+            from core.rss import RSS
+            mp_ids = list({art.mp_id for art in arts})
+            names = dict(session.query(Feed.id, Feed.mp_name).filter(Feed.id.in_(mp_ids)).all())
+            RSS().cache_contents([(art.id, {
+                "id": art.id,
+                "title": art.title,
+                "content": art.content,
+                "publish_time": art.publish_time,
+                "mp_id": art.mp_id,
+                "pic_url": art.pic_url,
+                "mp_name": names.get(art.mp_id)
+            }) for art in arts])
+        except Exception as e:
+            print_error(f"Failed to store article content: {e}")
+
     def get_articles(self, id:str=None, limit:int=30, offset:int=0) -> List[Article]:
         try:
             data = self.get_session().query(Article).limit(limit).offset(offset)
@@ -0,0 +1,92 @@
+import re
+from bs4 import BeautifulSoup
+from core.log import logger
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+_WIDTH_PATTERN = re.compile(r'width\s*:\s*\d+\s*px')
+
+
+def _fix_images(images, attrs) -> None:
+    """图片使用data-src并统一宽度为1080px"""
+    for img in images:
+        img_attrs = attrs(img)
+        if 'data-src' in img_attrs:
+            img_attrs['src'] = img_attrs.pop('data-src')
+        style = img_attrs.get('style')
+        if style and 'px' in style:
+            img_attrs['style'] = _WIDTH_PATTERN.sub('width: 1080px', style)
+
+
+def _lxml_parse(text: str) -> str:
+    try:
+        doc = lxml.html.fromstring(text)
+    except ValueError:
+        # 带编码声明的字符串需要以bytes解析
+        doc = lxml.html.fromstring(text.encode('utf-8'))
+    nodes = doc.xpath('//div[@id="js_content"]')
+    if not nodes:
+        return ""
+    node = nodes[0]
+    # 移除style属性中的visibility: hidden;
+    node.attrib.pop('style', None)
+    _fix_images(node.iter('img'), lambda img: img.attrib)
+    node.tail = None
+    return lxml.html.tostring(node, encoding='unicode')
+
+
+def _lxml_fragment(text: str) -> str:
+    root = lxml.html.fragment_fromstring(text, create_parent='div')
+    _fix_images(root.iter('img'), lambda img: img.attrib)
+    return (root.text or '') + ''.join(lxml.html.tostring(child, encoding='unicode') for child in root)
+
+
+def _soup_parse(text: str) -> str:
+    node = BeautifulSoup(text, 'html.parser').find('div', {'id': 'js_content'})
+    if node is None:
+        return ""
+    node.attrs.pop('style', None)
+    _fix_images(node.find_all('img'), lambda img: img.attrs)
+    return str(node)
+
+
+def _soup_fragment(text: str) -> str:
+    soup = BeautifulSoup(text, 'html.parser')
+    _fix_images(soup.find_all('img'), lambda img: img.attrs)
+    return str(soup)
+
+
+def parse_js_content(text: str) -> str:
+    """从文章页面HTML中取出#js_content正文，找不到时返回空字符串
+
+    移除正文的隐藏样式，图片使用data-src并统一宽度；安装了lxml时使用lxml解析，否则使用BeautifulSoup。
+    """
+    if not text:
+        return ""
+    try:
+        return _lxml_parse(text) if lxml is not None else _soup_parse(text)
+    except Exception as e:
+        logger.error(e)
+    return ""
+
+
+def fix_content(text: str) -> str:
+    """整理浏览器取得的正文片段(#js_content的innerHTML)，图片处理与parse_js_content相同"""
+    if not text:
+        return ""
+    try:
+        return _lxml_fragment(text) if lxml is not None else _soup_fragment(text)
+    except Exception as e:
+        logger.error(e)
+    return text
+
+
+def html_to_text(content: str) -> str:
+    """去除HTML标签，保留纯文本"""
+    if not content:
+        return ""
+    if lxml is not None:
+        return lxml.html.fragment_fromstring(content, create_parent='div').text_content()
+    return BeautifulSoup(content, 'html.parser').get_text()
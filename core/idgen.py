@@ -0,0 +1,50 @@
+# core/idgen.py - 全局唯一、按时间排序的ID生成
+import os
+import threading
+import time
+
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+class UlidGenerator:
+    """ULID：48位毫秒时间戳 + 80位随机数，Crockford Base32编码为26个字符
+
+    按字符串排序即按生成时间排序。同一毫秒内在上一个ID的随机部分上加1，保证进程内多线程单调递增；
+    多进程/多实例之间依靠80位随机数避免冲突，fork后的子进程重新取随机数。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._last_rand = 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._last_ms = 0
+            self._last_rand = 0
+
+    def new(self) -> str:
+        with self._lock:
+            ms = int(time.time() * 1000)
+            if ms <= self._last_ms:
+                # 同一毫秒或时钟回拨：沿用上次时间，随机部分加1
+                ms = self._last_ms
+                rand = self._last_rand + 1
+                if rand >> 80:
+                    ms += 1
+                    rand = int.from_bytes(os.urandom(10), "big")
+            else:
+                rand = int.from_bytes(os.urandom(10), "big")
+            self._last_ms, self._last_rand = ms, rand
+        value = (ms << 80) | rand
+        return "".join(_CROCKFORD[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+
+_generator = UlidGenerator()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_generator.reset)
+
+
+def new_id() -> str:
+    """生成一个新的ULID"""
+    return _generator.new()
@@ -1,5 +1,7 @@
+import ast
 import re
-from typing import Any, Dict, List, Union
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 # """
 # 模板引擎使用示例
 
@@ -8,14 +10,270 @@ from typing import Any, Dict, List, Union
 # 2. 条件判断: {% if condition %}...{% endif %}
 # 3. 循环结构: {% for item in items %}...{% endfor %}
 # """
+
+_TOKEN_PATTERN = re.compile(
+    r'(?s:(\{\%.*?\%\}))|'  # control blocks {% ... %}, may span lines
+    r'(\{\{.*?\}\})'    # variables {{ ... }}
+)
+_PATH_PATTERN = re.compile(r'[A-Za-z_]\w*(\.[A-Za-z_]\w*)+')
+
+_SAFE_BUILTINS = {
+    'None': None,
+    'True': True,
+    'False': False,
+    'bool': bool,
+    'int': int,
+    'float': float,
+    'str': str,
+    'list': list,
+    'dict': dict,
+    'tuple': tuple,
+    'len': len,
+    'sum': sum,
+    'min': min,
+    'max': max,
+    'abs': abs,
+    'round': round
+}
+
+_FORBIDDEN_NAMES = frozenset([
+    'import', 'open', 'exec', 'eval', 'system', 'subprocess',
+    'getattr', 'setattr', 'delattr', 'compile',
+    'globals', 'locals', 'vars', 'dir', 'help', 'reload',
+    'input', 'file', 'execfile', 'exit', 'quit', 'breakpoint', 'type'
+])
+
+# AST nodes allowed in template expressions and condition blocks
+_ALLOWED_NODES = (
+    ast.Expression, ast.Module, ast.Expr, ast.Assign, ast.AugAssign, ast.If, ast.Pass,
+    ast.Name, ast.Load, ast.Store, ast.Attribute, ast.Subscript, ast.Slice, ast.Constant,
+    ast.BoolOp, ast.BinOp, ast.UnaryOp, ast.Compare, ast.IfExp, ast.Call, ast.keyword,
+    ast.List, ast.Tuple, ast.Dict, ast.Set, ast.JoinedStr, ast.FormattedValue,
+    ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp, ast.comprehension,
+    ast.boolop, ast.operator, ast.unaryop, ast.cmpop, ast.expr_context,
+)
+
+
+class _Expression:
+    """An expression or statement block validated and compiled once.
+
+    If validation fails the error is kept and raised on every evaluation,
+    so a bad expression renders the same way each time.
+    """
+    __slots__ = ('source', 'code', 'error')
+
+    def __init__(self, source: str, mode: str = 'eval'):
+        self.source = source
+        self.code = None
+        self.error: Optional[Exception] = None
+        try:
+            tree = ast.parse(source.strip() if mode == 'eval' else _dedent(source), mode=mode)
+            _validate(tree)
+            self.code = compile(tree, '<template>', mode)
+        except Exception as e:
+            self.error = e
+
+    def eval(self, scope, env: Dict[str, Any]) -> Any:
+        if self.error is not None:
+            raise self.error
+        return eval(self.code, env, scope)
+
+    def exec(self, scope, env: Dict[str, Any]) -> None:
+        if self.error is not None:
+            raise self.error
+        exec(self.code, env, scope)
+
+
+def _dedent(source: str) -> str:
+    """Strip the common indentation of a multi-line condition block."""
+    import textwrap
+    return textwrap.dedent(source.strip('\n')).strip()
+
+
+def _validate(tree: ast.AST) -> None:
+    """Reject anything outside the whitelist: imports, dunder access, lambdas, etc."""
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Unsupported syntax in template expression: {type(node).__name__}")
+        if isinstance(node, ast.Name):
+            if node.id in _FORBIDDEN_NAMES or (node.id.startswith('__') and node.id != '__result__'):
+                raise ValueError(f"Potentially dangerous expression detected: {node.id}")
+        elif isinstance(node, ast.Attribute) and node.attr.startswith('_'):
+            raise ValueError(f"Potentially dangerous expression detected: {node.attr}")
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(source: str, mode: str = 'eval') -> _Expression:
+    """Validate and compile an expression. Results are memoized by source text."""
+    return _Expression(source, mode)
+
+
+class _Scope(dict):
+    """A variable layer over a parent mapping. Lookups fall through to the parent,
+    assignments stay in this layer, so loop items never copy the context."""
+    __slots__ = ('parent',)
+
+    def __init__(self, parent, variables=()):
+        super().__init__(variables)
+        self.parent = parent
+
+    def __missing__(self, key):
+        return self.parent[key]
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self.parent
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class _Loop(dict):
+    """Loop info, usable as loop.index in expressions and {{ loop.index }} in output."""
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class _Node:
+    __slots__ = ()
+
+
+class _Text(_Node):
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _Var(_Node):
+    """{{ name }}, {{ a.b.c }} or {{= expr }}"""
+    __slots__ = ('kind', 'expr', 'path', 'code')
+
+    def __init__(self, source: str):
+        self.code = None
+        if source.startswith('='):
+            self.kind, self.expr, self.path = 'expr', source[1:], None
+            self.code = compile_expression(self.expr)
+        elif '.' in source:
+            self.kind, self.expr, self.path = 'path', source, tuple(source.split('.'))
+        else:
+            self.kind, self.expr, self.path = 'name', source, None
+
+
+class _If(_Node):
+    """{% if ... %}: a variable, a dotted path, an expression or a multi-line code block"""
+    __slots__ = ('condition', 'kind', 'path', 'code', 'body', 'orelse')
+
+    def __init__(self, condition: str):
+        self.condition = condition
+        self.path = None
+        self.code = None
+        if '\n' in condition.strip():
+            # Code block assigning __result__
+            self.kind = 'block'
+            self.code = compile_expression(condition, 'exec')
+        elif condition.startswith('='):
+            self.kind = 'expr'
+            self.code = compile_expression(condition[1:])
+        elif condition.isidentifier():
+            self.kind = 'name'
+            # Names missing from the context are evaluated (True/False/None)
+            self.code = compile_expression(condition)
+        elif _PATH_PATTERN.fullmatch(condition):
+            self.kind = 'path'
+            self.path = tuple(condition.split('.'))
+        else:
+            self.kind = 'expr'
+            self.code = compile_expression(condition)
+        self.body: List[_Node] = []
+        self.orelse: List[_Node] = []
+
+
+class _For(_Node):
+    __slots__ = ('var', 'iterable', 'code', 'body')
+
+    def __init__(self, var: str, iterable: str):
+        self.var = var
+        self.iterable = iterable
+        self.code = compile_expression(iterable)
+        self.body: List[_Node] = []
+
+
+@lru_cache(maxsize=256)
+def compile_template(template: str) -> Tuple[_Node, ...]:
+    """Compile a template into a node tree. Results are memoized by template text."""
+    root: List[_Node] = []
+    # Stack of (node, list currently receiving children)
+    stack: List[Tuple[Union[_If, _For, None], List[_Node]]] = [(None, root)]
+    for token in _TOKEN_PATTERN.split(template):
+        if not token:
+            continue
+        target = stack[-1][1]
+        if token.startswith('{{') and token.endswith('}}'):
+            target.append(_Var(token[2:-2].strip()))
+        elif token.startswith('{%') and token.endswith('%}'):
+            block = token[2:-2].strip()
+            keyword = block.split(None, 1)[0] if block else ''
+            if keyword == 'if' and block != 'if':
+                node = _If(block[2:].strip(' \t'))
+                target.append(node)
+                stack.append((node, node.body))
+            elif keyword == 'for' and ' in ' in block:
+                var, iterable = block[4:].split(' in ', 1)
+                node = _For(var.strip(), iterable.strip())
+                target.append(node)
+                stack.append((node, node.body))
+            elif block == 'else':
+                node = stack[-1][0]
+                if isinstance(node, _If):
+                    stack[-1] = (node, node.orelse)
+            elif block in ('endif', 'endfor'):
+                expected = _If if block == 'endif' else _For
+                # Close up to the nearest matching block, ignore stray end tags
+                for depth in range(len(stack) - 1, 0, -1):
+                    if isinstance(stack[depth][0], expected):
+                        del stack[depth:]
+                        break
+            # Unknown control blocks are ignored
+        else:
+            target.append(_Text(token))
+    return tuple(root)
+
+
+def _lookup_path(scope, path: Tuple[str, ...], default: Any) -> Any:
+    """Resolve a.b.c against dicts and objects, returning default on a missing part."""
+    current = scope.get(path[0], {})
+    for part_name in path[1:]:
+        if isinstance(current, dict):
+            current = current.get(part_name, default)
+        else:
+            current = getattr(current, part_name, default)
+        if current is None:
+            return default
+    return current
+
+
 class TemplateParser:
-    """A lightweight template engine supporting variables, conditions and loops."""
+    """A lightweight template engine supporting variables, conditions and loops.
+
+    Templates are compiled once into a node tree (cached by template text),
+    expressions are validated against an AST whitelist and compiled to code
+    objects at the same time. Rendering is a single pass over that tree.
+    """
     
     def __init__(self, template: str):
         """Initialize the template parser with a template string."""
         self.template = template
         self.compiled = None
         self.custom_functions = {}
+        self._env = None
         
     def register_function(self, name: str, func: callable) -> None:
         """
@@ -26,6 +284,7 @@ class TemplateParser:
             func: The function to register
         """
         self.custom_functions[name] = func
+        self._env = None
         
     def register_functions(self, functions: Dict[str, callable]) -> None:
         """
@@ -35,15 +294,11 @@ class TemplateParser:
             functions: Dictionary of function names to functions
         """
         self.custom_functions.update(functions)
+        self._env = None
 
     def compile_template(self) -> None:
-        """Compile the template into an intermediate representation."""
-        # Split template into static parts and control blocks
-        pattern = re.compile(
-            r'(\{\%.*?\%\})|'  # control blocks {% ... %}
-            r'(\{\{.*?\}\})'    # variables {{ ... }}
-        )
-        self.compiled = pattern.split(self.template)
+        """Compile the template into a node tree."""
+        self.compiled = compile_template(self.template)
         
     def render(self, context: Dict[str, Any]) -> str:
         """
@@ -61,441 +316,102 @@ class TemplateParser:
                 raise ValueError(f"Invalid context key: {key}. Keys must be valid Python identifiers")
         
         if self.compiled is None:
-            print("Compiling template...")
             self.compile_template()
+        if self._env is None:
+            self._env = self._get_safe_globals()
             
-        output = []
-        i = 0
-        while i < len(self.compiled):
-            part = self.compiled[i]
-            
-            if part is None:
-                i += 1
-                continue
-                
-            # Handle variables {{ var }} and nested {{ var.attr }} and eval expressions
-            if part.startswith('{{') and part.endswith('}}'):
-                # print(f"\nProcessing variable part: {part}")
-                var_expr = part[2:-2].strip()
-                # print(f"Extracted expression: {var_expr}")
-                
-                # Check if this is an eval expression (starts with =)
-                if var_expr.startswith('='):
-                    try:
-                        # Evaluate the expression (after =)
-                        expr = var_expr[1:]
-                        if not self._is_safe_expression(expr):
-                            raise ValueError("Potentially dangerous expression detected")
-                            
-                        # Create safe evaluation environment
-                        safe_globals = self._get_safe_globals()
-                        eval_globals = {**safe_globals, **self.custom_functions}
-                        
-                        result = eval(expr, eval_globals, context)
-                        output.append(str(result))
-                    except Exception as e:
-                        output.append(f'[Error: {str(e)}]')
-                elif '.' in var_expr:
-                    # print(f"DEBUG - Processing nested variable: {var_expr}")  # Debug
-                    # Handle nested attribute access
-                    parts = var_expr.split('.')
-                    current = context.get(parts[0], {})
-                    for part_name in parts[1:]:
-                        if isinstance(current, dict):
-                            current = current.get(part_name, '')
-                        else:
-                            current = getattr(current, part_name, '')
-                        if current is None:
-                            current = ''
-                            break
-                    output.append(str(current))
-                else:
-                    # Simple variable access
-                    output.append(str(context.get(var_expr, '')))
-                i += 1
-                
-            # Handle control blocks {% ... %}
-            elif part.startswith('{%') and part.endswith('%}'):
-                block = part[2:-2].strip()
-                
-                # Handle if condition
-                if block.startswith('if '):
-                    condition = block[3:].strip()
-                    result, updated_context = self._evaluate_condition(condition, context)
-                    # Merge all variables except special ones and functions
-                    for k, v in updated_context.items():
-                        if not k.startswith('__') and k not in self.custom_functions:
-                            # Only update context if the key doesn't exist or was modified
-                            if k not in context or context[k] != v:
-                                context[k] = v
-                    # Ensure final_price is available in context if it was calculated
-                    if 'final_price' in updated_context:
-                        context['final_price'] = updated_context['final_price']
-                    
-                    # Find matching endif using helper method
-                    endif_idx = self._skip_control_block(i, 'if', 'endif')
-                    if endif_idx == len(self.compiled):
-                        i += 1
-                        continue
-                    
-                    # Find else if exists
-                    else_idx = -1
-                    for j in range(i+1, endif_idx):
-                        part = self.compiled[j]
-                        if isinstance(part, str) and part.strip() in ('{% else %}', 'else'):
-                            else_idx = j
-                            break
-                    
-                    # print(f"DEBUG - Control block boundaries: else={else_idx}, endif={endif_idx}")
-                    
-                    # Process the appropriate block
-                    if result:
-                        # Process if block (from current position to else or endif)
-                        end_idx = else_idx if else_idx != -1 else endif_idx
-                        if_content = self.compiled[i+1:end_idx]
-                        # print(f"DEBUG - Processing if block from {i+1} to {end_idx}")
-                        
-                        if_parser = TemplateParser('')
-                        if_parser.compiled = if_content
-                        rendered = if_parser.render(context)
-                        output.append(rendered)
-                    elif else_idx != -1:
-                        # Process else block
-                        else_content = self.compiled[else_idx+1:endif_idx]
-                        # print(f"DEBUG - Processing else block from {else_idx+1} to {endif_idx}")
-                        
-                        else_parser = TemplateParser('')
-                        else_parser.compiled = else_content
-                        rendered = else_parser.render(context)
-                        output.append(rendered)
-                    
-                    # Skip to after endif
-                    i = endif_idx + 1
-                    
-                # Handle for loop
-                elif block.startswith('for ') and ' in ' in block:
-                    loop_var, iterable = self._parse_for_block(block)
-                    items = self._get_iterable(iterable, context)
-                    
-                    # Collect loop content
-                    loop_content = []
-                    j = i + 1
-                    while j < len(self.compiled):
-                        inner_part = self.compiled[j]
-                        if (isinstance(inner_part, str) and 
-                            inner_part.startswith('{% endfor %}')):
-                            break
-                        loop_content.append(str(inner_part) if inner_part else '')
-                        j += 1
-                        
-                    # Render loop
-                    # print(f"DEBUG - For loop items: {items}")  # Debug
-                    loop_output = []
+        output: List[str] = []
+        # Variables assigned by condition blocks go to the top layer, not the caller's dict
+        self._render_nodes(self.compiled, _Scope(context), output)
+        # Clean up the output by removing excessive newlines
+        return self._clean_output(''.join(output))
+
+    def _render_nodes(self, nodes, scope: _Scope, output: List[str]) -> None:
+        """Render compiled nodes into output."""
+        for node in nodes:
+            if isinstance(node, _Text):
+                output.append(node.text)
+            elif isinstance(node, _Var):
+                output.append(self._render_var(node, scope))
+            elif isinstance(node, _If):
+                branch = node.body if self._evaluate_condition(node, scope) else node.orelse
+                if branch:
+                    block_output: List[str] = []
+                    self._render_nodes(branch, scope, block_output)
+                    output.append(self._clean_output(''.join(block_output)))
+            elif isinstance(node, _For):
+                items = self._get_iterable(node, scope)
+                try:
+                    total_items = len(items)
+                except TypeError:
+                    items = list(items)
                     total_items = len(items)
-                    for item_idx, item in enumerate(items):
-                        loop_context = context.copy()
-                        loop_context[loop_var] = item
-                        
+                parent_loop = scope.get('loop')
+                loop_output = []
+                for item_idx, item in enumerate(items):
+                    # A fresh layer per item over the enclosing scope, no copying
+                    loop_scope = _Scope(scope, {
+                        node.var: item,
                         # Add loop variable with iteration info
-                        loop_context['loop'] = {
-                            'index': item_idx + 1,
-                            'index0': item_idx,
-                            'first': item_idx == 0,
-                            'last': item_idx == total_items - 1,
-                            'length': total_items,
-                            'parentloop': context.get('loop')  # Save parent loop context
-                        }
-                        
-                        # Render loop content with current item
-                        item_output = []
-                        j = 0
-                        while j < len(loop_content):
-                            part = loop_content[j]
-                            if part is None:
-                                j += 1
-                                continue
-                            
-                            # Handle if conditions inside for loop
-                            if (isinstance(part, str) and 
-                                part.startswith('{% if ') and 
-                                part.endswith('%}')):
-                                condition = part[6:-2].strip()
-                                result, _ = self._evaluate_condition(condition, loop_context)
-                                
-                                # Find matching endif
-                                endif_idx = j + 1
-                                nested_depth = 1
-                                while endif_idx < len(loop_content):
-                                    inner_part = loop_content[endif_idx]
-                                    if (isinstance(inner_part, str) and 
-                                        inner_part.startswith('{% if ') and 
-                                        inner_part.endswith('%}')):
-                                        nested_depth += 1
-                                    elif (isinstance(inner_part, str) and 
-                                          inner_part.startswith('{% endif %}')):
-                                        nested_depth -= 1
-                                        if nested_depth == 0:
-                                            break
-                                    endif_idx += 1
-                                
-                                # Process if block if condition is true
-                                if result:
-                                    if_content = loop_content[j+1:endif_idx]
-                                    rendered = self._render_parts(if_content, loop_context)
-                                    item_output.append(rendered)
-                                
-                                # Skip to after endif
-                                j = endif_idx + 1
-                            
-                            # Handle variable references
-                            elif isinstance(part, str) and part.startswith('{{') and part.endswith('}}'):
-                                var_expr = part[2:-2].strip()
-                                # print(f"DEBUG - Evaluating variable: {var_expr}")  # Debug
-                            
-                                if var_expr.startswith('='):
-                                    # Handle eval expressions
-                                    try:
-                                        expr = var_expr[1:]
-                                        if not self._is_safe_expression(expr):
-                                            raise ValueError("Potentially dangerous expression detected")
-                                        
-                                        safe_globals = self._get_safe_globals()
-                                        eval_globals = {**safe_globals, **self.custom_functions}
-                                    
-                                        result = eval(expr, eval_globals, loop_context)
-                                        value = str(result)
-                                    except Exception as e:
-                                        value = f'[Error: {str(e)}]'
-                                elif '.' in var_expr:
-                                    # Handle nested attributes
-                                    parts = var_expr.split('.')
-                                    current = loop_context.get(parts[0], {})
-                                    for part_name in parts[1:]:
-                                        if isinstance(current, dict):
-                                            current = current.get(part_name, '')
-                                        else:
-                                            current = getattr(current, part_name, '')
-                                        if current is None:
-                                            current = ''
-                                            break
-                                    value = str(current)
-                                else:
-                                    # Handle simple variable
-                                    value = str(loop_context.get(var_expr, ''))
-                            
-                                # print(f"DEBUG - Variable value: {value}")  # Debug
-                                item_output.append(value)
-                                j += 1
-                            
-                            else:
-                                # Handle literal text (preserve whitespace and newlines)
-                                item_output.append(str(part))
-                                j += 1
-                        
-                        rendered_item = ''.join(item_output)
-                        # print(f"DEBUG - Rendered item {item_idx}:\n{repr(rendered_item)}")  # Debug
-                        loop_output.append(rendered_item)
-                    
-                    if loop_output:
-                        # Join all loop items with newlines and add to output
-                        loop_result = '\n'.join(loop_output)
-                        output.append(loop_result)
-                    else:
-                        # print("DEBUG - No loop output generated")
-                        pass
-                    
-                    # Skip to end of loop
-                    i = j + 1
-                    
-                # Handle endif/endfor
-                elif block in ('endif', 'endfor'):
-                    i += 1
-                    
-                else:
-                    i += 1
-                    
-            # Static text
-            else:
-                output.append(str(part) if part else '')
-                i += 1
-                
-        # Clean up the output by removing excessive newlines
-        result = ''.join(output)
-        return self._clean_output(result)
+                        'loop': _Loop(
+                            index=item_idx + 1,
+                            index0=item_idx,
+                            first=item_idx == 0,
+                            last=item_idx == total_items - 1,
+                            length=total_items,
+                            parentloop=parent_loop  # Save parent loop context
+                        )
+                    })
+                    item_output: List[str] = []
+                    self._render_nodes(node.body, loop_scope, item_output)
+                    loop_output.append(''.join(item_output))
+                if loop_output:
+                    # Join all loop items with newlines
+                    output.append('\n'.join(loop_output))
+
+    def _render_var(self, node: _Var, scope: _Scope) -> str:
+        """Render a {{ ... }} node."""
+        if node.kind == 'expr':
+            try:
+                return str(node.code.eval(scope, self._env))
+            except Exception as e:
+                return f'[Error: {str(e)}]'
+        if node.kind == 'path':
+            # Handle nested attribute access
+            return str(_lookup_path(scope, node.path, ''))
+        return str(scope.get(node.expr, ''))
     
     def _get_safe_globals(self) -> Dict[str, Any]:
-        """Return a dictionary of safe builtins for eval/exec."""
-        safe_builtins = {
-            'None': None,
-            'True': True,
-            'False': False,
-            'bool': bool,
-            'int': int,
-            'float': float,
-            'str': str,
-            'list': list,
-            'dict': dict,
-            'tuple': tuple,
-            'len': len,
-            'sum': sum,
-            'min': min,
-            'max': max,
-            'abs': abs,
-            'round': round
-        }
-        return safe_builtins
-
-    def _is_safe_expression(self, expr: str) -> bool:
-        """Check if an expression contains potentially dangerous operations."""
-        forbidden = [
-            'import', 'open', 'exec', 'eval', 'system', 'subprocess',
-            '__import__', 'getattr', 'setattr', 'delattr', 'compile',
-            'globals', 'locals', 'vars', 'dir', 'help', 'reload',
-            'input', 'file', 'execfile', 'reload', 'exit', 'quit'
-        ]
-        expr_lower = expr.lower()
-        return not any(keyword in expr_lower for keyword in forbidden)
-
-    def _evaluate_condition(self, condition: str, context: Dict[str, Any]) -> tuple:
+        """Return the globals for evaluating template code: safe builtins and custom functions."""
+        return {'__builtins__': _SAFE_BUILTINS, **_SAFE_BUILTINS, **self.custom_functions}
+
+    def _evaluate_condition(self, node: _If, scope: _Scope) -> bool:
         """
-        Evaluate a condition expression or code block in the given context.
-        Returns (result, updated_context) where updated_context contains any new variables
-        created during evaluation.
+        Evaluate a compiled condition in the given scope.
+        Code blocks assign __result__; variables they create stay visible
+        in the current scope for the rest of the block.
         """
         try:
-            if not self._is_safe_expression(condition):
-                raise ValueError(f"Potentially dangerous expression: {condition}")
-                
-            # Special handling for loop variables
-            if 'loop.' in condition:
-                # Handle not conditions
-                has_not = 'not ' in condition
-                loop_var = condition.split('loop.')[-1].strip()
-                if has_not:
-                    loop_var = loop_var.replace('not ', '').strip()
-                
-                loop_info = context.get('loop', {})
-                result = False
-                
-                if loop_var == 'last':
-                    result = loop_info.get('last', False)
-                elif loop_var == 'first':
-                    result = loop_info.get('first', False)
-                elif loop_var == 'index':
-                    result = bool(loop_info.get('index', 0))
-                elif loop_var == 'index0':
-                    result = bool(loop_info.get('index0', 0))
-                
-                # Invert result if 'not' was present
-                return (not result if has_not else result), context
-                    
-            # Create safe evaluation environment
-            safe_globals = self._get_safe_globals()
-            eval_globals = {**safe_globals, **self.custom_functions}
-            
-            # Make a copy of context to avoid modifying the original
-            local_vars = context.copy()
-            
-            # Handle multi-line code blocks
-            if '\n' in condition.strip():
-                # Compile and execute the code block in restricted environment
-                code = compile(condition, '<string>', 'exec')
-                exec(code, eval_globals, local_vars)
-                # The last expression's value should be in __result__
-                result = bool(local_vars.get('__result__', False))
-                # Return result and updated context (excluding special vars)
-                updated_context = {k: v for k, v in local_vars.items() 
-                                 if not k.startswith('__') and k not in self.custom_functions}
-                
-                # Debug output
-                print(f"DEBUG - Condition evaluation result: {result}")
-                print(f"DEBUG - Local vars after execution: {local_vars.keys()}")
-                print(f"DEBUG - Updated context to return: {updated_context.keys()}")
-                
-                # Ensure all calculated variables are included
-                for k, v in local_vars.items():
-                    if (not k.startswith('__') and 
-                        k not in self.custom_functions and 
-                        k not in updated_context):
-                        updated_context[k] = v
-                        print(f"DEBUG - Added {k} to context: {v}")
-                
-                return result, updated_context
-            
-            # Handle function calls with = prefix
-            if condition.startswith('='):
-                result = bool(eval(condition[1:], eval_globals, local_vars))
-                return result, local_vars
-            
-            # Handle nested attribute access (e.g. user.is_admin)
-            if '.' in condition:
-                parts = condition.split('.')
-                current = local_vars.get(parts[0], {})
-                for part in parts[1:]:
-                    if isinstance(current, dict):
-                        current = current.get(part, None)
-                    else:
-                        current = getattr(current, part, None)
-                    if current is None:
-                        return False, local_vars
+            if node.kind == 'block':
+                node.code.exec(scope, self._env)
+                return bool(scope.pop('__result__', False))
+            if node.kind == 'path':
+                current = _lookup_path(scope, node.path, None)
+                if current is None:
+                    return False
                 # Handle empty collections
                 if isinstance(current, (list, dict, set)) and not current:
-                    return False, local_vars
-                return bool(current), local_vars
-            
-            # Handle direct variable reference
-            if condition in local_vars:
-                value = local_vars[condition]
+                    return False
+                return bool(current)
+            if node.kind == 'name' and node.condition in scope:
+                value = scope[node.condition]
                 if isinstance(value, (list, dict, set)):
-                    return len(value) > 0, local_vars
-                return bool(value), local_vars
-                
-            # Evaluate other expressions
-            result = bool(eval(condition, eval_globals, local_vars))
-            return result, local_vars
-            
+                    return len(value) > 0
+                return bool(value)
+            return bool(node.code.eval(scope, self._env))
         except Exception:
-            return False, context
-            
-    def _skip_control_block(self, start_idx: int, start_tag: str, end_tag: str) -> int:
-        """Skip a control block until matching end tag is found."""
-        if start_idx >= len(self.compiled):
-            return len(self.compiled)
-            
-        depth = 1
-        i = start_idx + 1
-        # print(f"DEBUG - Searching for {end_tag} starting from {start_idx}")
-        
-        while i < len(self.compiled):
-            part = self.compiled[i]
-            if isinstance(part, str) and part.startswith('{%') and part.endswith('%}'):
-                block = part[2:-2].strip()
-                # print(f"DEBUG - Token {i}: {block} (depth={depth})")
-                
-                # Handle nested blocks
-                if block.startswith('if ') or block.startswith('for '):
-                    depth += 1
-                    # print(f"DEBUG - Found nested block, depth increased to {depth}")
-                elif block == end_tag:
-                    depth -= 1
-                    # print(f"DEBUG - Found {end_tag}, depth decreased to {depth}")
-                    if depth == 0:
-                        # print(f"DEBUG - Found matching {end_tag} at {i}")
-                        return i
-                elif block == 'else' and depth == 1:
-                    # print(f"DEBUG - Found else at {i}")
-                    # Don't decrease depth for else blocks
-                    pass
-                elif block in ['endif', 'endfor'] and depth > 1:
-                    depth -= 1
-                    # print(f"DEBUG - Found closing tag in nested block, depth decreased to {depth}")
+            return False
             
-            i += 1
-        
-        # print(f"DEBUG - Error: Reached end without finding matching {end_tag} (current depth: {depth})")
-        # print(f"DEBUG - Last processed block: {self.compiled[i-1] if i > 0 else 'None'}")
-        return len(self.compiled)
-
     def _clean_output(self, output: str) -> str:
         """Clean up the final output by removing excessive newlines and whitespace."""
         lines = output.split('\n')
@@ -519,30 +435,15 @@ class TemplateParser:
         # Ensure exactly one newline at end
         return '\n'.join(cleaned).strip() 
         
-    def _parse_for_block(self, block: str) -> tuple:
-        """Parse a for block into loop variable and iterable parts."""
-        parts = block[4:].split(' in ', 1)
-        return parts[0].strip(), parts[1].strip()
-        
-    def _get_iterable(self, iterable: str, context: Dict[str, Any]) -> List[Any]:
-        """Get an iterable from context or evaluate expression."""
-        if iterable in context:
-            return context[iterable]
+    def _get_iterable(self, node: _For, scope: _Scope) -> List[Any]:
+        """Get an iterable from the scope or evaluate the compiled expression."""
+        if node.iterable in scope:
+            return scope[node.iterable]
         try:
-            if not self._is_safe_expression(iterable):
-                raise ValueError("Potentially dangerous expression detected")
-            
-            safe_globals = self._get_safe_globals()
-            return eval(iterable, safe_globals, context)
+            return node.code.eval(scope, self._env)
         except Exception:
             return []
             
-    def _render_parts(self, parts: List[Union[str, None]], context: Dict[str, Any]) -> str:
-        """Render a list of template parts with the given context."""
-        temp_parser = TemplateParser('')
-        temp_parser.compiled = parts
-        return temp_parser.render(context)
-
 
 # Example usage
 if __name__ == '__main__':
@@ -1,6 +1,9 @@
 from  .base import Base,Column,String,Integer,DateTime,Text,DATA_STATUS
+from sqlalchemy import Index
 class ArticleBase(Base):
     __tablename__ = 'articles'
+    # 按公众号分页时(mp_id, publish_time, id)范围扫描，不需要额外排序
+    __table_args__ = (Index('ix_articles_mp_id_publish_time', 'mp_id', 'publish_time', 'id'),)
     id = Column(String(255), primary_key=True)
     mp_id = Column(String(255))
     title = Column(String(1000))
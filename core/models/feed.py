@@ -10,4 +10,7 @@ class Feed(Base):
     update_time = Column(Integer)
     created_at = Column(DateTime) 
     updated_at = Column(DateTime)
-    faker_id = Column(String(255))
\ No newline at end of file
+    faker_id = Column(String(255))
+    # 同步水位：已采集到的最新文章aid及其发布时间，增量采集遇到不晚于该时间的文章即停止翻页
+    last_aid = Column(String(255))
+    last_publish_time = Column(Integer)
\ No newline at end of file
@@ -1,16 +1,21 @@
 # core/models/link_articles.py - 链接文章数据模型
-from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, CHAR, Integer, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from .base import Base
 
 class LinkArticle(Base):
     """链接文章数据模型"""
     __tablename__ = 'link_articles'
+    # 同一来源下URL唯一，按URL的MD5建唯一索引，不受URL长度和MySQL索引前缀长度限制
+    __table_args__ = (
+        Index('uq_link_articles_link_id_url_hash', 'link_id', 'url_hash', unique=True),
+    )
     
     id = Column(String(50), primary_key=True, comment='文章ID')
     link_id = Column(String(50), ForeignKey('links.id'), nullable=False, comment='链接ID')
     title = Column(String(500), nullable=False, comment='文章标题')
     url = Column(String(1000), nullable=False, comment='文章URL')
+    url_hash = Column(CHAR(32), comment='文章URL的MD5')
     description = Column(Text, comment='文章描述')
     pic_url = Column(String(500), comment='文章封面图片URL')
     status = Column(Integer, default=1, comment='状态：1-正常，0-禁用，1000-删除')
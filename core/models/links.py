@@ -14,6 +14,10 @@ class Link(Base):
     description = Column(Text, comment='链接描述')
     status = Column(Integer, default=1, comment='状态：1-启用，0-禁用')
     article_count = Column(Integer, default=0, comment='文章数量')
+    crawl_profile = Column(String(20), default='fast', comment='抓取配置：fast-快速，js-等待JS渲染，full-完整加载')
+    crawl_strategy = Column(String(600), comment='上次成功的抓取方式：feed:地址，sitemap:地址，http，browser')
+    crawl_interval = Column(Integer, comment='当前重新爬取间隔(秒)，有新文章时缩短，否则延长')
+    next_crawl_at = Column(DateTime, comment='下次重新爬取时间')
     created_at = Column(DateTime, default=func.now(), comment='创建时间')
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), comment='更新时间')
     
@@ -28,5 +32,8 @@ class Link(Base):
             'status': self.status,
             'sync_time': self.updated_at.isoformat() if self.updated_at else '',
             'rss_url': f'/feed/{self.id}.rss',
-            'article_count': self.article_count
+            'article_count': self.article_count,
+            'crawl_profile': self.crawl_profile or 'fast',
+            'crawl_strategy': self.crawl_strategy or '',
+            'next_crawl_at': self.next_crawl_at.isoformat() if self.next_crawl_at else ''
         }
\ No newline at end of file
@@ -1,16 +1,21 @@
 # core/models/patent_articles.py - 专利文章数据模型
-from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, CHAR, Integer, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func
 from .base import Base
 
 class PatentArticle(Base):
     """专利检索文章数据模型"""
     __tablename__ = 'patent_articles'
+    # 同一来源下URL唯一，按URL的MD5建唯一索引，不受URL长度和MySQL索引前缀长度限制
+    __table_args__ = (
+        Index('uq_patent_articles_patent_id_url_hash', 'patent_id', 'url_hash', unique=True),
+    )
     
     id = Column(String(50), primary_key=True, comment='文章ID')
     patent_id = Column(String(50), ForeignKey('patents.id'), nullable=False, comment='专利链接ID')
     title = Column(String(500), nullable=False, comment='文章标题')
     url = Column(String(1000), nullable=False, comment='文章URL')
+    url_hash = Column(CHAR(32), comment='文章URL的MD5')
     content = Column(Text, comment='文章内容')
     author = Column(String(100), comment='作者')
     publish_time = Column(Integer, comment='发布时间戳')
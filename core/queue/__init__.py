@@ -1 +1,2 @@
-from .queue import *
\ No newline at end of file
+from .queue import *
+from .durable import *
\ No newline at end of file
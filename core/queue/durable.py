@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import socket
+import sqlite3
+import importlib
+import threading
+from typing import Any, Callable, Optional
+from core.print import print_error, print_warning
+from .queue import TaskQueueManager, _Entry, retry_delay
+
+# 任务租约时长，执行中的任务由心跳续约；进程退出后租约过期的任务会被重新领取
+LEASE_SECONDS = 300
+HEARTBEAT_SECONDS = 60
+
+PENDING = "pending"
+RUNNING = "running"
+DEAD = "dead"
+
+
+def task_path(task: Callable) -> str:
+    """任务函数的导入路径 module:qualname，只有模块级函数可以持久化"""
+    path = f"{getattr(task, '__module__', '')}:{getattr(task, '__qualname__', '')}"
+    if resolve_task(path) is not task:
+        raise TypeError(f"持久化队列只能添加模块级函数，无法添加 {task!r}")
+    return path
+
+
+def resolve_task(path: str) -> Optional[Callable]:
+    module, _, qualname = path.partition(":")
+    if not module or not qualname or "<" in qualname:
+        return None
+    try:
+        obj = importlib.import_module(module)
+        for attr in qualname.split("."):
+            obj = getattr(obj, attr)
+    except (ImportError, AttributeError):
+        return None
+    return obj if callable(obj) else None
+
+
+class DurableTaskQueue(TaskQueueManager):
+    """持久化任务队列
+
+    任务保存在SQLite的jobs表中，记录状态、执行次数、最早执行时间run_after与租约lease_until，
+    进程重启、崩溃或重载任务后未完成的任务会继续执行。
+    - 领取任务在BEGIN IMMEDIATE事务内完成，多个工作线程/进程不会领到同一个任务
+    - 失败后按指数退避重试，超过max_attempts次转入dead状态，可用retry_dead重新排队
+    - 任务以函数导入路径和JSON参数保存，只能添加模块级函数，参数需可JSON序列化
+    """
+    backend = "sqlite"
+
+    def __init__(self, name: str = "default", db_path: str = "data/queue.db", tag: str = "", workers: int = 1):
+        super().__init__(tag=tag, workers=workers)
+        self.name = name
+        self.db_path = os.path.normpath(db_path)
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._claimed = set()
+        self._heartbeat = None
+
+    def _conn(self) -> sqlite3.Connection:
+        """每个线程使用独立连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS jobs ("
+                        "id INTEGER PRIMARY KEY AUTOINCREMENT, queue TEXT NOT NULL, task TEXT NOT NULL, "
+                        "payload TEXT NOT NULL, priority INTEGER NOT NULL, concurrency_key TEXT, coalesce_key TEXT, "
+                        "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, "
+                        "run_after REAL NOT NULL DEFAULT 0, lease_until REAL, worker TEXT, last_error TEXT, "
+                        "created REAL NOT NULL, updated REAL NOT NULL)"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(queue, status, priority, id)")
+                    conn.execute(
+                        "CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_coalesce ON jobs(queue, coalesce_key) "
+                        "WHERE status='pending' AND coalesce_key IS NOT NULL"
+                    )
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """在写事务中执行func，开始事务即取得写锁，保证领取/更新的原子性"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = func(conn)
+            conn.execute("COMMIT")
+            return result
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _enqueue(self, entry: _Entry) -> bool:
+        path = task_path(entry.task)
+        payload = json.dumps({"args": list(entry.args), "kwargs": entry.kwargs}, ensure_ascii=False)
+
+        def insert(conn):
+            now = time.time()
+            if entry.coalesce_key is not None:
+                row = conn.execute(
+                    "SELECT id, priority FROM jobs WHERE queue=? AND coalesce_key=? AND status=?",
+                    (self.name, entry.coalesce_key, PENDING)).fetchone()
+                if row is not None:
+                    if entry.priority < row[1]:
+                        # 提高优先级，参数以新任务为准
+                        conn.execute("UPDATE jobs SET task=?, payload=?, priority=?, updated=? WHERE id=?",
+                                     (path, payload, entry.priority, now, row[0]))
+                    return False
+            conn.execute(
+                "INSERT INTO jobs(queue, task, payload, priority, concurrency_key, coalesce_key, status, "
+                "attempts, max_attempts, run_after, created, updated) VALUES(?,?,?,?,?,?,?,0,?,0,?,?)",
+                (self.name, path, payload, entry.priority, entry.concurrency_key, entry.coalesce_key,
+                 PENDING, entry.max_attempts, now, now))
+            return True
+
+        return self._transaction(insert)
+
+    def _claim(self, worker: str) -> Optional[_Entry]:
+        self._start_heartbeat()
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{worker}"
+
+        def claim(conn):
+            now = time.time()
+            # 租约过期(进程退出或卡死)的任务：未超过次数则重新排队，否则转入死信；
+            # 已有相同合并键的任务在等待时直接删除
+            conn.execute(
+                "DELETE FROM jobs WHERE queue=? AND status=? AND lease_until<? AND coalesce_key IN ("
+                "SELECT coalesce_key FROM jobs WHERE queue=? AND status=? AND coalesce_key IS NOT NULL)",
+                (self.name, RUNNING, now, self.name, PENDING))
+            conn.execute(
+                "UPDATE jobs SET status=CASE WHEN attempts>=max_attempts THEN ? ELSE ? END, "
+                "worker=NULL, lease_until=NULL, last_error='lease expired', updated=? "
+                "WHERE queue=? AND status=? AND lease_until<?",
+                (DEAD, PENDING, now, self.name, RUNNING, now))
+            row = conn.execute(
+                "SELECT id, task, payload, priority, concurrency_key, coalesce_key, attempts, max_attempts "
+                "FROM jobs j WHERE queue=? AND status=? AND run_after<=? AND (concurrency_key IS NULL OR NOT EXISTS ("
+                "SELECT 1 FROM jobs r WHERE r.queue=j.queue AND r.status=? AND r.concurrency_key=j.concurrency_key)) "
+                "ORDER BY priority, id LIMIT 1",
+                (self.name, PENDING, now, RUNNING)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status=?, attempts=attempts+1, lease_until=?, worker=?, updated=? WHERE id=?",
+                (RUNNING, now + LEASE_SECONDS, worker_id, now, row[0]))
+            return row
+
+        row = self._transaction(claim)
+        if row is None:
+            return None
+        job_id, path, payload, priority, concurrency_key, coalesce_key, attempts, max_attempts = row
+        task = resolve_task(path)
+        data = json.loads(payload)
+        if task is None:
+            # 函数已被移除或改名，直接转入死信
+            self._conn().execute("UPDATE jobs SET status=?, last_error=?, updated=? WHERE id=?",
+                                 (DEAD, f"task not found: {path}", time.time(), job_id))
+            print_error(f"{self.tag}任务{path}不存在，转入死信")
+            return None
+        with self._cond:
+            self._claimed.add(job_id)
+        return _Entry(task, tuple(data.get("args", ())), data.get("kwargs", {}), priority, concurrency_key,
+                      coalesce_key, max_attempts, job_id=job_id, attempts=attempts + 1)
+
+    def _finish(self, entry: _Entry, error: Optional[Exception]) -> None:
+        with self._cond:
+            self._claimed.discard(entry.job_id)
+        now = time.time()
+        conn = self._conn()
+        if error is None:
+            conn.execute("DELETE FROM jobs WHERE id=?", (entry.job_id,))
+        elif entry.attempts < entry.max_attempts:
+            try:
+                conn.execute(
+                    "UPDATE jobs SET status=?, run_after=?, lease_until=NULL, worker=NULL, last_error=?, updated=? WHERE id=?",
+                    (PENDING, now + retry_delay(entry.attempts), repr(error), now, entry.job_id))
+            except sqlite3.IntegrityError:
+                # 执行期间已有相同合并键的新任务排队，由新任务代替重试
+                conn.execute("DELETE FROM jobs WHERE id=?", (entry.job_id,))
+            print_warning(f"{self.tag}任务[{entry.name}]第{entry.attempts}次执行失败，{retry_delay(entry.attempts):.0f}秒后重试")
+        else:
+            conn.execute(
+                "UPDATE jobs SET status=?, lease_until=NULL, worker=NULL, last_error=?, updated=? WHERE id=?",
+                (DEAD, repr(error), now, entry.job_id))
+            print_error(f"{self.tag}任务[{entry.name}]已失败{entry.attempts}次，转入死信")
+        with self._cond:
+            self._cond.notify_all()
+
+    def _start_heartbeat(self) -> None:
+        with self._init_lock:
+            if self._heartbeat is not None:
+                return
+            self._heartbeat = threading.Thread(target=self._renew_leases, name=f"{self.tag or 'queue'}-heartbeat", daemon=True)
+            self._heartbeat.start()
+
+    def _renew_leases(self) -> None:
+        """定期为本进程正在执行的任务续约"""
+        while True:
+            time.sleep(HEARTBEAT_SECONDS)
+            with self._cond:
+                ids = list(self._claimed)
+            if not ids:
+                continue
+            try:
+                now = time.time()
+                self._conn().executemany("UPDATE jobs SET lease_until=? WHERE id=? AND status=?",
+                                         [(now + LEASE_SECONDS, job_id, RUNNING) for job_id in ids])
+            except Exception as e:
+                print_error(f"{self.tag}任务续约失败: {e}")
+
+    def _counts(self) -> dict:
+        rows = dict(self._conn().execute(
+            "SELECT status, COUNT(*) FROM jobs WHERE queue=? GROUP BY status", (self.name,)).fetchall())
+        return {'pending_tasks': rows.get(PENDING, 0), 'dead_tasks': rows.get(DEAD, 0)}
+
+    def retry_dead(self) -> int:
+        def requeue(conn):
+            count = 0
+            for (job_id,) in conn.execute("SELECT id FROM jobs WHERE queue=? AND status=?", (self.name, DEAD)).fetchall():
+                try:
+                    conn.execute("UPDATE jobs SET status=?, attempts=0, run_after=0, updated=? WHERE id=?",
+                                 (PENDING, time.time(), job_id))
+                    count += 1
+                except sqlite3.IntegrityError:
+                    # 已有相同合并键的任务在等待执行
+                    conn.execute("DELETE FROM jobs WHERE id=?", (job_id,))
+            return count
+
+        count = self._transaction(requeue)
+        with self._cond:
+            self._cond.notify_all()
+        return count
+
+    def _drop_pending(self) -> None:
+        self._conn().execute("DELETE FROM jobs WHERE queue=? AND status=?", (self.name, PENDING))
@@ -1,121 +1,389 @@
-import queue
+import heapq
+import itertools
 import threading
 import time
 import gc
+from collections import deque
 from typing import Callable, Any, Optional
 from core.print import print_error, print_info, print_warning, print_success
+
+# 任务优先级，数值越小越先执行
+PRIORITY_HIGH = 0     # 交互操作：手动刷新、新增公众号首次采集
+PRIORITY_NORMAL = 5   # 定时采集
+PRIORITY_LOW = 10     # 后台补全等可延后的任务
+
+# 任务失败后的重试次数(含首次执行)与指数退避
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+# 内存队列保留的死信任务数
+MAX_DEAD_TASKS = 100
+
+
+def retry_delay(attempts: int) -> float:
+    """第attempts次执行失败后的等待时间：30秒、60秒、120秒……最长1小时"""
+    return min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+
+
+class _Entry:
+    """队列中的一个任务"""
+    __slots__ = ("task", "args", "kwargs", "priority", "concurrency_key", "coalesce_key",
+                 "cancelled", "added_at", "attempts", "max_attempts", "run_after", "job_id")
+
+    def __init__(self, task, args, kwargs, priority, concurrency_key, coalesce_key,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, job_id=None, attempts=0):
+        self.task = task
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.concurrency_key = concurrency_key
+        self.coalesce_key = coalesce_key
+        self.cancelled = False
+        self.added_at = time.time()
+        self.attempts = attempts
+        self.max_attempts = max(1, max_attempts)
+        self.run_after = 0.0
+        self.job_id = job_id
+
+    @property
+    def name(self) -> str:
+        return getattr(self.task, "__qualname__", None) or getattr(self.task, "__name__", str(self.task))
+
+
 class TaskQueueManager:
-    """任务队列管理器，用于管理和执行排队任务"""
-    
-    def __init__(self,maxsize=0,tag:str=""):
+    """任务队列管理器，用于管理和执行排队任务
+
+    由workers个工作线程按优先级取任务执行：
+    - concurrency_key相同的任务不会同时执行(如同一公众号)，不同key的任务并行执行
+    - coalesce_key相同且尚未开始执行的任务只保留一个，重复添加时合并并取较高的优先级
+    - 任务抛出异常时按指数退避重试，超过max_attempts次后转入死信
+
+    本类把任务保存在内存中，进程重启后待执行任务丢失；需要持久化时使用DurableTaskQueue，
+    两者接口相同，通过create_queue按配置queue.backend创建。
+    """
+    backend = "memory"
+
+    def __init__(self,maxsize=0,tag:str="",workers:int=1):
         """初始化任务队列"""
-        self._queue = queue.Queue(maxsize=maxsize)
+        self._heap = []
+        self._seq = itertools.count()
+        self._pending = {}      # coalesce_key -> _Entry
+        self._running_keys = set()
+        self._dead = deque(maxlen=MAX_DEAD_TASKS)
+        self._size = 0
+        self.maxsize = maxsize
+        self.workers = max(1, int(workers))
         self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
         self._is_running = False
+        self._worker_states = {}
         self.tag=tag
-        
-    def add_task(self, task: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+
+    def add_task(self, task: Callable[..., Any], *args: Any,
+                 priority: int = PRIORITY_NORMAL,
+                 concurrency_key: Optional[str] = None,
+                 coalesce_key: Optional[str] = None,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 **kwargs: Any) -> bool:
         """添加任务到队列
-        
+
         Args:
             task: 要执行的任务函数
             *args: 任务函数的参数
+            priority: 优先级，数值越小越先执行
+            concurrency_key: 并发键，相同键的任务串行执行
+            coalesce_key: 合并键，相同键的待执行任务只保留一个
+            max_attempts: 最多执行次数，失败超过该次数后转入死信
             **kwargs: 任务函数的关键字参数
+
+        Returns:
+            bool: 是否作为新任务加入队列，被合并时返回False
         """
-        with self._lock:
-            self._queue.put((task, args, kwargs))
+        entry = _Entry(task, args, kwargs, priority, concurrency_key, coalesce_key, max_attempts)
+        if not self._enqueue(entry):
+            print_info(f"{self.tag}队列已有相同任务等待执行，已合并")
+            return False
+        with self._cond:
+            self._cond.notify_all()
         print_success(f"{self.tag}队列任务添加成功")
+        return True
+
+    def _enqueue(self, entry: _Entry) -> bool:
+        with self._cond:
+            merged = False
+            if entry.coalesce_key is not None:
+                pending = self._pending.get(entry.coalesce_key)
+                if pending is not None:
+                    if entry.priority >= pending.priority:
+                        return False
+                    # 提高优先级：作废旧条目，以新优先级重新入队，仍视为合并
+                    pending.cancelled = True
+                    self._size -= 1
+                    merged = True
+            while self.maxsize > 0 and self._size >= self.maxsize:
+                self._cond.wait()
+            self._push(entry)
+            if merged:
+                self._cond.notify_all()
+        return not merged
+
+    def _push(self, entry: _Entry) -> None:
+        """任务入堆，需持有锁"""
+        heapq.heappush(self._heap, (entry.priority, next(self._seq), entry))
+        if entry.coalesce_key is not None:
+            self._pending[entry.coalesce_key] = entry
+        self._size += 1
+
     def run_task_background(self)->None:
-        threading.Thread(target=self.run_tasks, daemon=True).start()  
-        print_warning("队列任务后台运行")
+        for n in range(self.workers):
+            threading.Thread(target=self.run_tasks, name=f"{self.tag or 'queue'}-worker-{n}", daemon=True).start()
+        print_warning(f"队列任务后台运行，工作线程数: {self.workers}")
+
+    def _claim(self, worker: str) -> Optional[_Entry]:
+        """取出优先级最高、已到执行时间且并发键空闲的任务"""
+        with self._cond:
+            now = time.time()
+            skipped = []
+            entry = None
+            while self._heap:
+                item = heapq.heappop(self._heap)
+                candidate = item[2]
+                if candidate.cancelled:
+                    continue
+                if candidate.run_after > now or (
+                        candidate.concurrency_key is not None and candidate.concurrency_key in self._running_keys):
+                    skipped.append(item)
+                    continue
+                entry = candidate
+                break
+            for item in skipped:
+                heapq.heappush(self._heap, item)
+            if entry is not None:
+                self._size -= 1
+                if entry.coalesce_key is not None and self._pending.get(entry.coalesce_key) is entry:
+                    del self._pending[entry.coalesce_key]
+                if entry.concurrency_key is not None:
+                    self._running_keys.add(entry.concurrency_key)
+                entry.attempts += 1
+                self._cond.notify_all()
+            return entry
+
+    def _finish(self, entry: _Entry, error: Optional[Exception]) -> None:
+        """任务执行结束：释放并发键，失败时重新排队或转入死信"""
+        with self._cond:
+            if entry.concurrency_key is not None:
+                self._running_keys.discard(entry.concurrency_key)
+            if error is not None:
+                if entry.attempts < entry.max_attempts:
+                    entry.run_after = time.time() + retry_delay(entry.attempts)
+                    self._push(entry)
+                else:
+                    self._dead.append((entry, repr(error), time.time()))
+            self._cond.notify_all()
+        if error is not None:
+            if entry.attempts < entry.max_attempts:
+                print_warning(f"{self.tag}任务[{entry.name}]第{entry.attempts}次执行失败，{retry_delay(entry.attempts):.0f}秒后重试")
+            else:
+                print_error(f"{self.tag}任务[{entry.name}]已失败{entry.attempts}次，转入死信")
+
     def run_tasks(self, timeout: float = 1.0) -> None:
-        """执行队列中的所有任务，并持续运行以接收新任务
-        
+        """作为一个工作线程执行队列中的任务，并持续运行以接收新任务
+
         Args:
             timeout: 等待新任务的超时时间(秒)
         """
-        with self._lock:
-            if self._is_running:
-                return
+        name = threading.current_thread().name
+        with self._cond:
             self._is_running = True
-            
+            self._worker_states[name] = {"name": name, "state": "idle", "task": None, "key": None, "started_at": None}
+
         try:
             while self._is_running:
                 try:
-                    # 阻塞获取任务，避免CPU空转
-                    task, args, kwargs = self._queue.get(timeout=timeout)
-                    
+                    entry = self._claim(name)
+                except Exception as e:
+                    print_error(f"{self.tag}队列取任务失败: {e}")
+                    entry = None
+                if entry is None:
+                    # 阻塞等待新任务，避免CPU空转
+                    with self._cond:
+                        self._cond.wait(timeout)
+                    continue
+                with self._cond:
+                    self._worker_states[name].update(state="running", task=entry.name,
+                                                     key=entry.concurrency_key, started_at=time.time())
+                error = None
+                try:
+                    # 记录任务开始时间
+                    start_time = time.time()
+                    entry.task(*entry.args, **entry.kwargs)
+                    # 记录任务执行时间
+                    duration = time.time() - start_time
+                    print_info(f"\n任务执行完成，耗时: {duration:.2f}秒")
+                except Exception as e:
+                    error = e
+                    print_error(f"队列任务执行失败: {e}")
+                    # raise
+                finally:
+                    with self._cond:
+                        self._worker_states[name].update(state="idle", task=None, key=None, started_at=None)
                     try:
-                        # 记录任务开始时间
-                        start_time = time.time()
-                        task(*args, **kwargs)
-                        # 记录任务执行时间
-                        duration = time.time() - start_time
-                        print_info(f"\n任务执行完成，耗时: {duration:.2f}秒")
+                        self._finish(entry, error)
                     except Exception as e:
-                        print_error(f"队列任务执行失败: {e}")
-                        # raise
-                    finally:
-                        # 确保任务完成标记和资源释放
-                        self._queue.task_done()
-                        # 强制垃圾回收
-                        gc.collect()
-                        
-                except queue.Empty:
-                    # 超时无任务，继续检查运行状态
-                    continue
-                    
+                        print_error(f"{self.tag}队列更新任务状态失败: {e}")
+                    # 强制垃圾回收
+                    gc.collect()
+
         finally:
             # 确保停止状态设置和资源清理
-            with self._lock:
-                self._is_running = False
+            with self._cond:
+                self._worker_states.pop(name, None)
+                if not self._worker_states:
+                    self._is_running = False
             # 清理可能残留的资源
             gc.collect()
-    
+
     def stop(self) -> None:
         """停止任务执行"""
-        with self._lock:
+        with self._cond:
             self._is_running = False
-    
+            self._cond.notify_all()
+
+    def _counts(self) -> dict:
+        """待执行与死信任务数"""
+        with self._cond:
+            return {'pending_tasks': self._size, 'dead_tasks': len(self._dead)}
+
     def get_queue_info(self) -> dict:
         """
         获取队列的当前状态信息
-        
+
         返回:
             dict: 包含队列信息的字典，包括:
                 - is_running: 队列是否正在运行
+                - backend: 队列存储方式 memory/sqlite
                 - pending_tasks: 等待执行的任务数量
+                - running_tasks: 正在执行的任务数量
+                - dead_tasks: 多次失败后转入死信的任务数量
+                - workers: 各工作线程的状态
         """
-        with self._lock:
+        counts = self._counts()
+        with self._cond:
+            now = time.time()
+            workers = []
+            for state in self._worker_states.values():
+                info = dict(state)
+                info["elapsed"] = round(now - state["started_at"], 2) if state["started_at"] else 0
+                del info["started_at"]
+                workers.append(info)
             return {
                 'is_running': self._is_running,
-                'pending_tasks': self._queue.qsize()
+                'backend': self.backend,
+                'pending_tasks': counts['pending_tasks'],
+                'running_tasks': sum(1 for w in workers if w["state"] == "running"),
+                'dead_tasks': counts['dead_tasks'],
+                'workers': workers,
             }
-            
+
+    def retry_dead(self) -> int:
+        """把死信任务重新放回队列，返回数量"""
+        with self._cond:
+            count = len(self._dead)
+            while self._dead:
+                entry = self._dead.popleft()[0]
+                entry.attempts = 0
+                entry.run_after = 0.0
+                self._push(entry)
+            self._cond.notify_all()
+        return count
+
+    def _drop_pending(self) -> None:
+        """丢弃所有待执行任务"""
+        with self._cond:
+            self._heap.clear()
+            self._pending.clear()
+            self._size = 0
+            self._cond.notify_all()
+
     def clear_queue(self) -> None:
         """清空队列中的所有任务"""
-        with self._lock:
-            while not self._queue.empty():
-                try:
-                    self._queue.get_nowait()
-                    self._queue.task_done()
-                except queue.Empty:
-                    break
-            print_success("队列已清空")
-            
+        self._drop_pending()
+        print_success("队列已清空")
+
     def delete_queue(self) -> None:
         """删除队列(停止并清空所有任务)"""
+        self.stop()
+        self._drop_pending()
+        print_success("队列已删除")
+
+
+def create_queue(name: str, tag: str = "", workers: int = 1, maxsize: int = 0) -> TaskQueueManager:
+    """按配置queue.backend创建任务队列：sqlite为持久化队列，memory为内存队列"""
+    from core.config import cfg
+    if str(cfg.get("queue.backend", "sqlite")).lower() == "memory":
+        return TaskQueueManager(maxsize=maxsize, tag=tag, workers=workers)
+    from .durable import DurableTaskQueue
+    return DurableTaskQueue(name, tag=tag, workers=workers)
+
+class LazyQueue:
+    """共享队列的占位对象
+
+    导入模块时不创建队列(不生成data/queue.db、不启动线程)，首次访问属性时才按配置创建；
+    工作线程由应用/定时任务启动时调用start_queues统一启动。
+    """
+
+    def __init__(self, name: str, tag: str = "", workers=1):
+        self._name = name
+        self._tag = tag
+        self._workers = workers
+        self._queue: Optional[TaskQueueManager] = None
+        self._started = False
+        self._lock = threading.Lock()
+
+    @property
+    def queue(self) -> TaskQueueManager:
+        if self._queue is None:
+            with self._lock:
+                if self._queue is None:
+                    workers = self._workers() if callable(self._workers) else self._workers
+                    self._queue = create_queue(self._name, tag=self._tag, workers=workers)
+        return self._queue
+
+    def start(self) -> None:
+        """启动工作线程，重复调用时忽略"""
+        queue = self.queue
         with self._lock:
-            self._is_running = False
-            while not self._queue.empty():
-                try:
-                    self._queue.get_nowait()
-                    self._queue.task_done()
-                except queue.Empty:
-                    break
-            print_success("队列已删除")
-TaskQueue = TaskQueueManager(tag="默认队列")
-TaskQueue.run_task_background()
+            if self._started:
+                return
+            self._started = True
+        queue.run_task_background()
+
+    def __getattr__(self, attr):
+        return getattr(self.queue, attr)
+
+
+_shared_queues = []
+
+
+def shared_queue(name: str, tag: str = "", workers=1) -> LazyQueue:
+    """声明一个共享队列，start_queues时启动"""
+    queue = LazyQueue(name, tag=tag, workers=workers)
+    _shared_queues.append(queue)
+    return queue
+
+
+def start_queues() -> None:
+    """启动所有已声明的共享队列的工作线程"""
+    for queue in list(_shared_queues):
+        queue.start()
+
+
+def _default_workers() -> int:
+    from core.config import cfg
+    return int(cfg.get("gather.concurrency",5))
+
+
+TaskQueue = shared_queue("default",tag="默认队列",workers=_default_workers)
 if __name__ == "__main__":
     def task1():
         print("执行任务1")
@@ -126,4 +394,4 @@ if __name__ == "__main__":
     manager = TaskQueueManager()
     manager.add_task(task1)
     manager.add_task(task2, "测试任务")
-    manager.run_tasks()  # 按顺序执行任务1和任务2
\ No newline at end of file
+    manager.run_tasks()  # 按顺序执行任务1和任务2
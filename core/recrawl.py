@@ -0,0 +1,155 @@
+# core/recrawl.py - 链接/专利/行业来源的定时重新爬取
+import asyncio
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from sqlalchemy import or_
+from core.config import cfg
+from core.crawler import LinkCrawler
+from core.crawl_source import CrawlSource, SOURCES
+from core.db import DB
+from core.print import print_error, print_info
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 每次重新爬取每个来源最多提取的文章数
+RECRAWL_MAX_ARTICLES = 50
+
+
+class DueSource:
+    """一个到期待爬取的来源，只保存爬取需要的字段，不持有数据库会话"""
+    __slots__ = ('kind', 'id', 'url', 'profile', 'strategy', 'interval')
+
+    def __init__(self, kind: CrawlSource, row):
+        self.kind = kind
+        self.id = row.id
+        self.url = row.url
+        self.profile = row.crawl_profile
+        self.strategy = row.crawl_strategy
+        self.interval = row.crawl_interval
+
+    @property
+    def host(self) -> str:
+        host = (urlparse(self.url).hostname or '').lower()
+        return host[4:] if host.startswith('www.') else host
+
+
+class RecrawlEngine:
+    """定时重新爬取所有启用的来源
+
+    - 每轮只处理next_crawl_at已到期的来源，最多concurrency个同时爬取，同一域名同一时间只爬取一个
+    - 有新文章时重爬间隔减半，没有新文章或失败时加倍，限制在min_interval~max_interval分钟之间
+    - 新文章与已有文章按URL一次查询比对，新增的文章一条语句批量插入
+    每轮在独立的事件循环中执行，结束时关闭本轮用到的浏览器和HTTP连接。
+    """
+
+    def __init__(self, concurrency: int = None, min_interval: int = None, max_interval: int = None):
+        self.concurrency = max(1, int(concurrency or cfg.get("crawler.recrawl_concurrency", 4) or 4))
+        self.min_interval = max(1, int(min_interval or cfg.get("crawler.recrawl_min_interval", 60) or 60)) * 60
+        self.max_interval = max(self.min_interval,
+                                int(max_interval or cfg.get("crawler.recrawl_max_interval", 1440) or 1440) * 60)
+        self._crawler: Optional[LinkCrawler] = None
+
+    @property
+    def crawler(self) -> LinkCrawler:
+        if self._crawler is None:
+            self._crawler = LinkCrawler()
+        return self._crawler
+
+    def next_interval(self, interval: Optional[int], changed: bool) -> int:
+        interval = interval or self.min_interval
+        interval = interval // 2 if changed else interval * 2
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def due_sources(self, limit: int = None) -> List[DueSource]:
+        now = datetime.now()
+        due = []
+        session = DB.get_session()
+        try:
+            for kind in SOURCES:
+                model = kind.model
+                query = session.query(model).filter(
+                    model.status == 1,
+                    or_(model.next_crawl_at.is_(None), model.next_crawl_at <= now),
+                ).order_by(model.next_crawl_at)
+                if limit:
+                    query = query.limit(limit)
+                due.extend(DueSource(kind, row) for row in query)
+        finally:
+            session.close()
+        # 从未爬取过的优先，其余按到期时间
+        due.sort(key=lambda s: s.interval is not None)
+        return due[:limit] if limit else due
+
+    def save(self, source: DueSource, result: Dict) -> int:
+        """保存一次爬取结果，返回新增文章数，并安排下次爬取时间"""
+        kind = source.kind
+        session = DB.get_session()
+        try:
+            row = session.get(kind.model, source.id)
+            if row is None:
+                return 0
+            new_count = 0
+            if result['success']:
+                new_count = kind.save_articles(session, source.id, result['articles'])
+                row.article_count = kind.count_articles(session, source.id)
+                row.crawl_strategy = result.get('strategy')
+            row.crawl_interval = self.next_interval(row.crawl_interval, new_count > 0)
+            row.next_crawl_at = datetime.now() + timedelta(seconds=row.crawl_interval)
+            session.commit()
+            return new_count
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    async def run_due(self, limit: int = None) -> Dict[str, int]:
+        """爬取一轮到期的来源，返回统计"""
+        sources = self.due_sources(limit)
+        stats = {'sources': len(sources), 'success': 0, 'failed': 0, 'new_articles': 0}
+        if not sources:
+            return stats
+        semaphore = asyncio.Semaphore(self.concurrency)
+        host_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+        async def crawl(source: DueSource):
+            # 先按域名排队，等待同域名时不占用并发名额
+            async with host_locks[source.host]:
+                async with semaphore:
+                    result = await self.crawler.crawl_website_articles(
+                        source.url, RECRAWL_MAX_ARTICLES, source.profile, source.strategy)
+            try:
+                new_count = self.save(source, result)
+            except Exception as e:
+                print_error(f"保存{source.kind.name}[{source.id}]爬取结果失败: {e}")
+                stats['failed'] += 1
+                return
+            if result['success']:
+                stats['success'] += 1
+                stats['new_articles'] += new_count
+            else:
+                stats['failed'] += 1
+                logger.warning(f"重新爬取{source.url}失败: {result.get('error')}")
+
+        try:
+            await asyncio.gather(*(crawl(source) for source in sources))
+        finally:
+            await self.crawler.pool.close()
+            await self.crawler.http.close()
+        return stats
+
+    def run(self, limit: int = None) -> Dict[str, int]:
+        """同步执行一轮重新爬取"""
+        start = time.perf_counter()
+        stats = asyncio.run(self.run_due(limit))
+        if stats['sources']:
+            print_info(f"重新爬取{stats['sources']}个来源，成功{stats['success']}个，失败{stats['failed']}个，"
+                       f"新增{stats['new_articles']}篇文章，耗时{time.perf_counter() - start:.1f}秒")
+        return stats
+
+
+recrawl_engine = RecrawlEngine()
@@ -2,10 +2,31 @@ import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
 import os
 import json
-from core.content_format import format_content
+import threading
+import zlib
+from typing import Iterable, Iterator, Optional
+from core.content_format import format_content,proxy_images
+from core.cache.content_store import content_store
+from core.cache.content_variants import content_variants
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content-Encoding与预压缩缓存文件扩展名的对应关系
+CONTENT_ENCODING_EXT = {"br": "br", "gzip": "gz"}
+
+class _GzipCompressor:
+    """与brotli.Compressor接口一致的gzip流式压缩器"""
+    def __init__(self, level: int = 9):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    def process(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
 class RSS:
     cache_dir = os.path.normpath("data/cache/rss")
-    content_cache_dir = os.path.normpath("data/cache/content")
     rss_file="all"
     
     def __init__(self, name:str="all",cache_dir: str = None,ext:str="rss"):
@@ -13,7 +34,6 @@ class RSS:
             self.cache_dir = cache_dir
         self.ext=ext    
         os.makedirs(self.cache_dir, exist_ok=True)
-        os.makedirs(self.content_cache_dir, exist_ok=True)
         normalized_path = os.path.normpath(f"{self.cache_dir}/{name}.{ext}")
         if not normalized_path.startswith(self.cache_dir):
             raise ValueError("Invalid file path: Path traversal detected.")
@@ -27,26 +47,24 @@ class RSS:
         return "text/plain"
     
     def cache_content(self, content_id: str, content: dict):
-        """缓存文章内容"""
-        content["content"]=self.add_logo_prefix_to_urls(content["content"])
-        content_path = os.path.normpath(f"{self.content_cache_dir}/{content_id}.json")
-        if not content_path.startswith(self.content_cache_dir):
-            raise ValueError("Invalid content path: Path traversal detected.")
-        
-        with open(content_path, "w", encoding="utf-8") as f:
-            json.dump(content, f, ensure_ascii=False, indent=2)
+        """缓存文章内容，内容未变化时不重复写入"""
+        content["content"]=content_variants.get(content["content"] or "","html")
+        content_store.put(content_id, content)
+
+    def cache_contents(self, contents: list):
+        """批量缓存文章内容[(content_id, content), ...]，在一个事务中写入；同时预生成各种内容格式"""
+        content_variants.put_many(content["content"] for _, content in contents)
+        for _, content in contents:
+            content["content"]=content_variants.get(content["content"] or "","html")
+        content_store.put_many(contents)
+
+    def get_cached_content_meta(self, content_id: str):
+        """获取缓存文章内容的(哈希, 更新时间)，用于生成ETag/Last-Modified"""
+        return content_store.meta(content_id)
 
     def get_cached_content(self, content_id: str) -> dict:
         """获取缓存的文章内容"""
-        content_path = os.path.normpath(f"{self.content_cache_dir}/{content_id}.json")
-        if not content_path.startswith(self.content_cache_dir):
-            raise ValueError("Invalid content path: Path traversal detected.")
-        
-        try:
-            with open(content_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return None
+        return content_store.get(content_id)
     def serialize_datetime(self,obj):
         if isinstance(obj, datetime):
             return obj.isoformat
@@ -66,23 +84,40 @@ class RSS:
         Returns:
             处理后的字符串，所有图片URL前添加了前缀
         """
-        import re
-        try:
-            pattern = re.compile(r'(<img[^>]*src=["\'])(?!\/static\/res\/logo\/)([^"\']*)', re.IGNORECASE)
-            return pattern.sub(r'\1/static/res/logo/\2', text)
-        except:
-            return text
+        return proxy_images(text)
        
-    def generate_rss(self,rss_list: dict, title: str = "Mp-We-Rss", 
+    def _element_to_str(self, element: ET.Element, short_empty_elements: bool = True) -> str:
+        return ET.tostring(element, encoding="utf-8", method="xml", short_empty_elements=short_empty_elements).decode("utf-8")
+
+    def _split_envelope(self, root: ET.Element, container: ET.Element, short_empty_elements: bool = True):
+        """把根元素序列化为(头部,尾部)两段，条目在container的最后一个子元素之后插入"""
+        marker = ET.SubElement(container, "we-rss-items")
+        doc = self._element_to_str(root, short_empty_elements)
+        container.remove(marker)
+        head, tail = doc.split(self._element_to_str(marker, short_empty_elements), 1)
+        return '<?xml version="1.0" encoding="utf-8"?>\r\n' + head, tail
+
+    def _content_text(self, rss_item: dict, cdata: bool) -> str:
+        if cdata:
+            return f"<![CDATA[{str(rss_item['content'])}]]>"  # 使用CDATA包裹内容
+        return str(rss_item['content'])
+
+    def iter_rss(self, rss_list: Iterable[dict], title: str = "Mp-We-Rss",
                     link: str = "https://github.com/rachelos/we-mp-rss",
-                    description: str = "RSS频道", language: str = "zh-CN",image_url:str=""):
+                    description: str = "RSS频道", language: str = "zh-CN", image_url: str = "",
+                    next_url: str = None) -> Iterator[str]:
+        """逐条生成RSS 2.0文档片段，拼接结果与一次性生成的文档完全一致"""
         from core.config import cfg
-        full_context=bool(cfg.get("rss.full_context",False))
-        
+        full_context = bool(cfg.get("rss.full_context", False))
+        add_cover = cfg.get("rss.add_cover", False) == True
+        cdata = cfg.get("rss.cdata", False) == True
+
         # 创建根元素(RSS标准)
         rss = ET.Element("rss", version="2.0")
         if full_context==True:
             rss.attrib["xmlns:content"] = "http://purl.org/rss/1.0/modules/content/"
+        if next_url:
+            rss.attrib["xmlns:atom"] = "http://www.w3.org/2005/Atom"
         channel=ET.SubElement(rss, "channel")
         # 设置渠道信息
         ET.SubElement(channel, "title").text = title
@@ -91,74 +126,59 @@ class RSS:
         ET.SubElement(channel, "language").text = language
         ET.SubElement(channel, "generator").text = "Mp-We-Rss"
         ET.SubElement(channel, "lastBuildDate").text =datetime.now().strftime("%a, %d %b %Y %H:%M:%S %z")
-    
+        # 下一页链接(RFC 5005)
+        if next_url:
+            ET.SubElement(channel, "atom:link", rel="next", href=next_url)
+
         # 设置image子项
-        if cfg.get("rss.add_cover",False)==True and image_url != "":
+        if add_cover and image_url != "":
             image = ET.SubElement(channel, "image")
             ET.SubElement(image, "url").text = image_url
             ET.SubElement(image, "title").text = title
             ET.SubElement(image, "link").text = link
 
+        head, tail = self._split_envelope(rss, channel, short_empty_elements=False)
+        yield head
         for rss_item in rss_list:
-            item = ET.SubElement(channel, "item")
+            item = ET.Element("item")
             ET.SubElement(item, "id").text = rss_item["id"]
             ET.SubElement(item, "title").text = rss_item["title"]
-            ET.SubElement(item, "description").text = rss_item["description"] 
+            ET.SubElement(item, "description").text = rss_item["description"]
             ET.SubElement(item, "guid").text = rss_item["link"]
             # 添加图片封面
-            if cfg.get("rss.add_cover",False)==True:
+            if add_cover:
                 enclosure = ET.SubElement(item, "enclosure")
                 enclosure.set("url", rss_item["image"])
                 enclosure.set("length", "0")
                 enclosure.set("type", "image/jpeg")
             if full_context==True:
                 try:
-                    if cfg.get("rss.cdata",False)==True:
-                        content = f"<![CDATA[{str(rss_item['content'])}]]>"  # 使用CDATA包裹内容
-                    else:
-                        content = str(rss_item['content'])
-                    ET.SubElement(item, "content:encoded").text = content
+                    ET.SubElement(item, "content:encoded").text = self._content_text(rss_item, cdata)
                 except Exception as e:
                     print(f"Error adding content:encoded element: {e}")
-                pass
-            # ET.SubElement(item, "category").text = rss_item["category"]
-            # ET.SubElement(item, "author").text = rss_item["author"]
             ET.SubElement(item, "link").text = rss_item["link"]
             ET.SubElement(item, "pubDate").text = self.datetime_to_rfc822(str(rss_item["updated"]))
+            yield self._element_to_str(item, short_empty_elements=False)
+        yield tail
 
-        # 生成XML字符串(添加声明和美化输出)
-        tree_str = '<?xml version="1.0" encoding="utf-8"?>\r\n' + \
-                ET.tostring(rss, encoding="utf-8", method="xml", short_empty_elements=False).decode("utf-8")
-        
-        if self.rss_file is not None:
-            with open(self.rss_file, "w", encoding="utf-8") as f:
-                f.write(tree_str)
-        return tree_str
-     
-    def generate_atom(self,rss_list: dict, title: str = "Mp-We-Rss", 
+    def iter_atom(self, rss_list: Iterable[dict], title: str = "Mp-We-Rss",
                     link: str = "https://github.com/rachelos/we-mp-rss",
-                    description: str = "RSS频道", language: str = "zh-CN",image_url:str="") -> str:
-        """生成Atom格式的RSS内容
-        
-        Args:
-            rss_list: RSS条目列表
-            title: 频道标题
-            link: 频道链接
-            description: 频道描述
-            language: 语言
-            
-        Returns:
-            Atom格式的XML字符串
-        """
+                    description: str = "RSS频道", language: str = "zh-CN", image_url: str = "",
+                    next_url: str = None) -> Iterator[str]:
+        """逐条生成Atom文档片段，拼接结果与一次性生成的文档完全一致"""
         from core.config import cfg
         full_context = bool(cfg.get("rss.full_context", False))
-        
+        add_cover = cfg.get("rss.add_cover", False) == True
+        cdata = cfg.get("rss.cdata", False) == True
+
         # 创建根元素(Atom标准)
         feed = ET.Element("feed", xmlns="http://www.w3.org/2005/Atom")
         if full_context==True:
             feed.attrib["xmlns:content"] = "http://purl.org/rss/1.0/modules/content/"
         ET.SubElement(feed, "title").text = title
         ET.SubElement(feed, "link",rel="alternate", href=link)
+        if next_url:
+            ET.SubElement(feed, "link",rel="next", href=next_url)
         ET.SubElement(feed, "link",rel="icon", href=image_url)
         ET.SubElement(feed, "logo").text=str(image_url)
         ET.SubElement(feed, "icon").text=str(image_url)
@@ -166,13 +186,16 @@ class RSS:
         ET.SubElement(feed, "id").text = str(link)
         ET.SubElement(feed, "author").text = "Mp-We-Rss"
         # 设置image子项
-        if cfg.get("rss.add_cover",False)==True and image_url != "":
+        if add_cover and image_url != "":
             image = ET.SubElement(feed, "image")
             ET.SubElement(image, "url").text = str(image_url)
             ET.SubElement(image, "title").text = str(title)
             ET.SubElement(image, "link").text = str(link)
+
+        head, tail = self._split_envelope(feed, feed)
+        yield head
         for rss_item in rss_list:
-            entry = ET.SubElement(feed, "entry")
+            entry = ET.Element("entry")
             ET.SubElement(entry, "id").text = rss_item["id"]
             ET.SubElement(entry, "title").text = str(rss_item["title"])
             ET.SubElement(entry, "link", href=str(rss_item["link"]))
@@ -180,33 +203,142 @@ class RSS:
             ET.SubElement(entry, "summary").text = str(rss_item["description"])
             ET.SubElement(entry, "author").text = str(rss_item["mp_name"])
              # 添加图片封面
-            if cfg.get("rss.add_cover",False)==True:
+            if add_cover:
                 enclosure = ET.SubElement(entry, "enclosure")
                 enclosure.set("url", str(rss_item["image"]))
                 enclosure.set("length", "0")
                 enclosure.set("type", "image/jpeg")
-            
+
             if full_context:
-                type=self.get_content_type()
-                # content = ET.SubElement(entry, "content", type=f"{str(type)}") 
-                # content.text = format_content(rss_item["content"],type)
                 try:
-                    if cfg.get("rss.cdata",False)==True:
-                        content = f"<![CDATA[{str(rss_item['content'])}]]>"  # 使用CDATA包裹内容
-                    else:
-                        content = str(rss_item['content'])
-                    ET.SubElement(entry, "content:encoded").text = content
+                    ET.SubElement(entry, "content:encoded").text = self._content_text(rss_item, cdata)
                 except Exception as e:
                     print(f"Error adding content:encoded element: {e}")
-                pass
-        # 生成XML字符串
-        tree_str = '<?xml version="1.0" encoding="utf-8"?>\r\n' + \
-                  ET.tostring(feed, encoding="utf-8", method="xml").decode("utf-8")
+            yield self._element_to_str(entry)
+        yield tail
+
+    def iter_json(self, rss_list: Iterable[dict], title: str = "Mp-We-Rss",
+                    link: str = "https://github.com/rachelos/we-mp-rss",
+                    description: str = "RSS频道", language: str = "zh-CN", image_url: str = "",
+                    next_url: str = None) -> Iterator[str]:
+        """逐条生成JSON文档片段，拼接结果与json.dumps(indent=2)的输出完全一致"""
+        type=self.get_content_type()
+        envelope = {
+            "name":title,
+            "link":link,
+            "description":description,
+            "language": language,
+            "cover":image_url,
+            "items": []
+        }
+        if next_url:
+            # 与JSON Feed一致的下一页字段，放在items之前
+            envelope.pop("items")
+            envelope["next_url"] = next_url
+            envelope["items"] = []
+        doc = json.dumps(envelope, ensure_ascii=False, indent=2, default=self.serialize_datetime)
+        # "items"是最后一个键，空列表序列化为"[]"，在两个括号之间插入条目
+        head, tail = doc[:-len("]\n}")], doc[-len("]\n}"):]
+        yield head
+        first = True
+        for item in rss_list:
+            data = {
+                "id": item["id"],
+                "title": item["title"],
+                "description": item["description"],
+                "link": item["link"],
+                "updated": item["updated"].isoformat() if isinstance(item["updated"], datetime) else item["updated"],
+                "content": format_content(item["content"],type),
+                "channel_name": item.get("mp_name", ""),
+                "feed": item.get("feed")
+            }
+            text = json.dumps(data, ensure_ascii=False, indent=2, default=self.serialize_datetime)
+            text = "\n".join("    " + line for line in text.split("\n"))
+            yield ("\n" if first else ",\n") + text
+            first = False
+        yield tail if first else "\n  " + tail
+
+    def _compressors(self) -> dict:
+        """返回需要同时生成的预压缩版本 {扩展名: 压缩器}"""
+        from core.config import cfg
+        if not cfg.get("rss.precompress", True):
+            return {}
+        compressors = {"gz": _GzipCompressor()}
+        if brotli is not None:
+            compressors["br"] = brotli.Compressor(quality=5)
+        return compressors
+
+    def _write_cache(self, chunks: Iterable[str]) -> Iterator[str]:
+        """边输出边写入缓存文件及其gzip/brotli预压缩版本，全部输出完成后再替换旧缓存"""
+        if self.rss_file is None:
+            yield from chunks
+            return
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        compressors = self._compressors()
+        files = {"": open(self.rss_file + suffix, "wb")}
+        try:
+            for ext in compressors:
+                files[ext] = open(f"{self.rss_file}.{ext}{suffix}", "wb")
+            for chunk in chunks:
+                data = chunk.encode("utf-8")
+                files[""].write(data)
+                for ext, compressor in compressors.items():
+                    files[ext].write(compressor.process(data))
+                yield chunk
+            for ext, compressor in compressors.items():
+                files[ext].write(compressor.finish())
+            for f in files.values():
+                f.close()
+            # 先替换压缩版本，保证命中原文件缓存时压缩版本不会更旧
+            for ext in sorted(files, reverse=True):
+                target = f"{self.rss_file}.{ext}" if ext else self.rss_file
+                os.replace(files[ext].name, target)
+        finally:
+            for f in files.values():
+                f.close()
+                if os.path.exists(f.name):
+                    os.unlink(f.name)
+
+    def get_cache_bytes(self, encoding: str = "") -> Optional[bytes]:
+        """读取缓存文件原始内容，encoding为gzip/br时读取对应的预压缩版本"""
+        if not getattr(self, 'rss_file', None):
+            return None
+        path = self.rss_file
+        if encoding:
+            path = f"{path}.{CONTENT_ENCODING_EXT[encoding]}"
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def cached_encodings(self) -> list:
+        """返回当前缓存文件已有的预压缩编码"""
+        if not getattr(self, 'rss_file', None):
+            return []
+        return [enc for enc, ext in CONTENT_ENCODING_EXT.items() if os.path.exists(f"{self.rss_file}.{ext}")]
+
+    def generate_rss(self,rss_list: dict, title: str = "Mp-We-Rss", 
+                    link: str = "https://github.com/rachelos/we-mp-rss",
+                    description: str = "RSS频道", language: str = "zh-CN",image_url:str=""):
+        return "".join(self._write_cache(self.iter_rss(rss_list, title=title, link=link, description=description, language=language, image_url=image_url)))
+     
+    def generate_atom(self,rss_list: dict, title: str = "Mp-We-Rss", 
+                    link: str = "https://github.com/rachelos/we-mp-rss",
+                    description: str = "RSS频道", language: str = "zh-CN",image_url:str="") -> str:
+        """生成Atom格式的RSS内容
         
-        if self.rss_file is not None:
-            with open(self.rss_file, "w", encoding="utf-8") as f:
-                f.write(tree_str)
-        return tree_str
+        Args:
+            rss_list: RSS条目列表
+            title: 频道标题
+            link: 频道链接
+            description: 频道描述
+            language: 语言
+            
+        Returns:
+            Atom格式的XML字符串
+        """
+        return "".join(self._write_cache(self.iter_atom(rss_list, title=title, link=link, description=description, language=language, image_url=image_url)))
     def set_content_type(self,type:str=None):
         self.content_type=type
     def get_content_type(self)->str:
@@ -229,33 +361,13 @@ class RSS:
         Returns:
             JSON格式的字符串
         """
-        type=self.get_content_type()
-        result = {
-            "name":title,
-            "link":link,
-            "description":description,
-            "language": language,
-            "cover":image_url,
-            "items": [
-                {
-                    "id": item["id"],
-                    "title": item["title"],
-                    "description": item["description"],
-                    "link": item["link"],
-                    "updated": item["updated"].isoformat() if isinstance(item["updated"], datetime) else item["updated"],
-                    "content": format_content(item["content"],type),
-                    "channel_name": item.get("mp_name", ""),
-                    "feed": item.get("feed")
-                } for item in rss_list
-            ]
-        }
-        return json.dumps(result, ensure_ascii=False, indent=2, default=self.serialize_datetime)
+        return "".join(self.iter_json(rss_list, title=title, link=link, description=description, language=language, image_url=image_url))
 
     def get_cache(self):
         if not hasattr(self, 'rss_file') or not self.rss_file:
                return None
         try:
-            with open(self.rss_file, "r", encoding="utf-8") as f:
+            with open(self.rss_file, "r", encoding="utf-8", newline="") as f:
                 return f.read()  
         except FileNotFoundError:
             return None     
@@ -287,10 +399,41 @@ class RSS:
             return self.generate_by_template(rss_list,template, title=title, link=link, description=description,language=language,image_url=image_url)
         else:
             raise ValueError(f"Unsupported extension: {ext}")
-    def generate_by_template(self,rss_list: dict, template: str, title: str = "Mp-We-Rss",link: str = "https://github.com/rachelos/we-mp-rss",description: str = "RSS频道",language: str = "zh-CN",image_url:str=""):
+    def stream(self,rss_list: Iterable[dict],ext=str, title: str = "Mp-We-Rss", 
+                    link: str = "https://github.com/rachelos/we-mp-rss",
+                    description: str = "RSS频道", language: str = "zh-CN",image_url:str="",template:str=None,
+                    next_url:str=None) -> Iterator[str]:
+        """与generate参数相同，按条目逐段输出内容并同时写入缓存文件
+        
+        Args:
+            rss_list: RSS条目列表或按需生成条目的迭代器
+            ext: 文件扩展名(.rss/.xml/.atom/.json)
+            next_url: 下一页地址，为空时不输出
+            
+        Returns:
+            输出文档片段的生成器
+            
+        Raises:
+            ValueError: 当扩展名不支持时
+        """
+        ext = ext.lower().strip('.')
+        self.ext=ext
+        kwargs = dict(title=title, link=link, description=description, language=language, image_url=image_url, next_url=next_url)
+        if ext in ('rss', 'xml'):
+            chunks = self.iter_rss(rss_list, **kwargs)
+        elif ext in ('atom','md','txt'):
+            chunks = self.iter_atom(rss_list, **kwargs)
+        elif ext in ('json','jmd'):
+            chunks = self.iter_json(rss_list, **kwargs)
+        elif template is not None:
+            chunks = iter([self.generate_by_template(list(rss_list), template, **kwargs)])
+        else:
+            raise ValueError(f"Unsupported extension: {ext}")
+        return self._write_cache(chunks)
+    def generate_by_template(self,rss_list: dict, template: str, title: str = "Mp-We-Rss",link: str = "https://github.com/rachelos/we-mp-rss",description: str = "RSS频道",language: str = "zh-CN",image_url:str="",next_url:str=None):
             from core.lax import TemplateParser
             template = TemplateParser(template)
-            return template.render({"articles": rss_list, "title": title,"link":link,"description":description,"language":language,"image_url":image_url})
+            return template.render({"articles": rss_list, "title": title,"link":link,"description":description,"language":language,"image_url":image_url,"next_url":next_url or ""})
             pass
     def clear_cache(self,mp_id:str=""):
 
@@ -0,0 +1,2 @@
+from .tokenizer import *
+from .index import *
@@ -0,0 +1,462 @@
+import math
+import threading
+from collections import defaultdict
+from typing import List, Optional, Tuple
+from sqlalchemy import or_, text, column, case
+from sqlalchemy.dialects.mysql import match as mysql_match
+from core.config import cfg
+from core.models.article import Article
+from core.models.base import DATA_STATUS
+from core.print import print_info, print_error, print_success, print_warning
+from .tokenizer import strip_html, tokenize, split_keywords, is_cjk, is_single_cjk
+
+
+class SearchIndex:
+    """文章全文检索索引基类
+
+    各实现需提供add/remove/rebuild以及criterion/apply，
+    criterion返回可直接用于query.filter的条件，apply在此基础上可按相关度排序。
+    索引未就绪（首次创建后后台重建中）时退回LIKE匹配标题。
+    """
+    name = "like"
+
+    def __init__(self, db):
+        self.db = db
+        self.ready = True
+
+    def add(self, article_id: str, title: str, content: str):
+        pass
+
+    def remove(self, article_id: str):
+        pass
+
+    def rebuild(self) -> int:
+        return 0
+
+    def ensure(self):
+        """检查索引是否存在，不存在则创建并在后台重建"""
+        pass
+
+    def like_criterion(self, keyword: str, content: bool = False):
+        """LIKE匹配标题，content为True时同时匹配正文"""
+        words = keyword.replace("-", " ").replace("|", " ").split(" ")
+        columns = [Article.title, Article.content] if content else [Article.title]
+        return or_(*[c.like(f"%{w}%") for w in words for c in columns])
+
+    def criterion(self, keyword: str):
+        return self.like_criterion(keyword)
+
+    def apply(self, query, keyword: str, rank: bool = False):
+        """为查询添加检索条件，rank为True时按相关度排序"""
+        return query.filter(self.criterion(keyword))
+
+    def add_article(self, art):
+        """根据文章对象更新索引，已删除的文章从索引中移除"""
+        try:
+            if art.status == DATA_STATUS.DELETED:
+                self.remove(art.id)
+            else:
+                self.add(art.id, art.title, getattr(art, "content", None))
+        except Exception as e:
+            print_error(f"更新检索索引失败 {art.id}: {e}")
+
+    def add_articles(self, arts):
+        for art in arts:
+            self.add_article(art)
+
+    def remove_article(self, article_id: str):
+        try:
+            self.remove(article_id)
+        except Exception as e:
+            print_error(f"删除检索索引失败 {article_id}: {e}")
+
+    def _iter_articles(self, batch: int = 1000):
+        """分批读取未删除的文章(id, title, content)，避免一次性加载全部正文"""
+        session = self.db.get_session()
+        last_id = ""
+        while True:
+            rows = session.query(Article.id, Article.title, Article.content)\
+                .filter(Article.status != DATA_STATUS.DELETED, Article.id > last_id)\
+                .order_by(Article.id).limit(batch).all()
+            if not rows:
+                break
+            yield rows
+            last_id = rows[-1][0]
+
+    def _rebuild_background(self):
+        def run():
+            try:
+                count = self.rebuild()
+                print_success(f"检索索引[{self.name}]重建完成，共 {count} 篇文章")
+            except Exception as e:
+                print_error(f"检索索引[{self.name}]重建失败: {e}")
+        self.ready = False
+        threading.Thread(target=run, daemon=True).start()
+
+
+class FtsSearchIndex(SearchIndex):
+    """SQLite FTS5索引
+
+    FTS5自带的unicode61分词会把连续中文当成一个词，
+    因此写入前先用tokenizer切成二元组，再以空格分隔存入，检索时按短语匹配。
+    """
+    name = "fts5"
+    TITLE_WEIGHT = 10.0
+
+    def __init__(self, db):
+        super().__init__(db)
+        self._checked = False
+        self._lock = threading.Lock()
+
+    def _doc(self, title: str, content: str):
+        return " ".join(tokenize(title or "")), " ".join(tokenize(strip_html(content)))
+
+    def ensure(self):
+        if self._checked:
+            return
+        with self._lock:
+            if self._checked:
+                return
+            with self.db.get_engine().begin() as conn:
+                exists = conn.execute(text("SELECT name FROM sqlite_master WHERE name='articles_fts'")).first()
+                if not exists:
+                    conn.execute(text("CREATE TABLE IF NOT EXISTS articles_fts_ids (rowid INTEGER PRIMARY KEY, article_id TEXT UNIQUE NOT NULL)"))
+                    conn.execute(text("CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(title, content)"))
+            self._checked = True
+        if not exists:
+            print_info("检索索引[fts5]已创建，后台开始建立索引")
+            self._rebuild_background()
+
+    def _add(self, conn, article_id: str, title: str, content: str):
+        row = conn.execute(text("SELECT rowid FROM articles_fts_ids WHERE article_id=:id"), {"id": article_id}).first()
+        if row is None:
+            rowid = conn.execute(text("INSERT INTO articles_fts_ids(article_id) VALUES(:id)"), {"id": article_id}).lastrowid
+        else:
+            rowid = row[0]
+            conn.execute(text("DELETE FROM articles_fts WHERE rowid=:rowid"), {"rowid": rowid})
+        title, content = self._doc(title, content)
+        conn.execute(text("INSERT INTO articles_fts(rowid, title, content) VALUES(:rowid, :title, :content)"),
+                     {"rowid": rowid, "title": title, "content": content})
+
+    def add(self, article_id: str, title: str, content: str):
+        self.ensure()
+        with self.db.get_engine().begin() as conn:
+            self._add(conn, article_id, title, content)
+
+    def add_articles(self, arts):
+        """批量写入时在一个事务中更新索引"""
+        try:
+            self.ensure()
+            with self.db.get_engine().begin() as conn:
+                for art in arts:
+                    self._add(conn, art.id, art.title, getattr(art, "content", None))
+        except Exception as e:
+            print_error(f"批量更新检索索引失败: {e}")
+
+    def remove(self, article_id: str):
+        self.ensure()
+        with self.db.get_engine().begin() as conn:
+            row = conn.execute(text("SELECT rowid FROM articles_fts_ids WHERE article_id=:id"), {"id": article_id}).first()
+            if row is not None:
+                conn.execute(text("DELETE FROM articles_fts WHERE rowid=:rowid"), {"rowid": row[0]})
+                conn.execute(text("DELETE FROM articles_fts_ids WHERE rowid=:rowid"), {"rowid": row[0]})
+
+    def rebuild(self) -> int:
+        self._checked = True
+        count = 0
+        with self.db.get_engine().begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS articles_fts"))
+            conn.execute(text("DROP TABLE IF EXISTS articles_fts_ids"))
+            conn.execute(text("CREATE TABLE articles_fts_ids (rowid INTEGER PRIMARY KEY, article_id TEXT UNIQUE NOT NULL)"))
+            conn.execute(text("CREATE VIRTUAL TABLE articles_fts USING fts5(title, content)"))
+        for rows in self._iter_articles():
+            with self.db.get_engine().begin() as conn:
+                for article_id, title, content in rows:
+                    self._add(conn, article_id, title, content)
+            count += len(rows)
+        with self.db.get_engine().begin() as conn:
+            conn.execute(text("INSERT INTO articles_fts(articles_fts) VALUES('optimize')"))
+        self.ready = True
+        return count
+
+    def match_query(self, keyword: str) -> str:
+        """把搜索关键字转换为FTS5查询语句，多个词之间为OR"""
+        phrases = []
+        for tokens in split_keywords(keyword):
+            phrase = '"' + " ".join(tokens) + '"'
+            # 末尾的英文数字按前缀匹配，与原LIKE匹配行为接近
+            if not is_cjk(tokens[-1]):
+                phrase += "*"
+            phrases.append(phrase)
+        return " OR ".join(phrases)
+
+    def _usable(self, keyword: str) -> bool:
+        """单个中文字符无法用二元组索引完整匹配，此时退回LIKE"""
+        self.ensure()
+        words = split_keywords(keyword)
+        return self.ready and bool(words) and not any(is_single_cjk(tokens) for tokens in words)
+
+    def _matches(self, keyword: str):
+        return text(
+            "SELECT m.article_id AS article_id, bm25(articles_fts, :title_weight, 1.0) AS score "
+            "FROM articles_fts JOIN articles_fts_ids m ON m.rowid = articles_fts.rowid "
+            "WHERE articles_fts MATCH :q"
+        ).bindparams(q=self.match_query(keyword), title_weight=self.TITLE_WEIGHT)\
+            .columns(column("article_id"), column("score"))
+
+    def criterion(self, keyword: str):
+        if not self._usable(keyword):
+            return self.like_criterion(keyword)
+        return Article.id.in_(text(
+            "SELECT m.article_id FROM articles_fts JOIN articles_fts_ids m ON m.rowid = articles_fts.rowid "
+            "WHERE articles_fts MATCH :q"
+        ).bindparams(q=self.match_query(keyword)).columns(column("article_id")))
+
+    def apply(self, query, keyword: str, rank: bool = False):
+        if not self._usable(keyword):
+            return query.filter(self.like_criterion(keyword))
+        matches = self._matches(keyword).subquery()
+        query = query.join(matches, matches.c.article_id == Article.id)
+        if rank:
+            # bm25越小越相关
+            query = query.order_by(matches.c.score)
+        return query
+
+
+class MysqlSearchIndex(SearchIndex):
+    """MySQL FULLTEXT索引，使用ngram分词器支持中文，索引由MySQL随写入自动维护"""
+    name = "mysql"
+    INDEX_NAME = "ft_articles_title_content"
+
+    def __init__(self, db):
+        super().__init__(db)
+        self._checked = False
+        self._lock = threading.Lock()
+
+    def ensure(self):
+        if self._checked:
+            return
+        with self._lock:
+            if self._checked:
+                return
+            with self.db.get_engine().begin() as conn:
+                exists = conn.execute(text(
+                    "SELECT 1 FROM information_schema.statistics WHERE table_schema=DATABASE() "
+                    "AND table_name='articles' AND index_name=:name LIMIT 1"
+                ), {"name": self.INDEX_NAME}).first()
+            self._checked = True
+        if not exists:
+            print_info("检索索引[mysql]不存在，后台开始创建FULLTEXT索引")
+            self._rebuild_background()
+
+    def rebuild(self) -> int:
+        self._checked = True
+        with self.db.get_engine().begin() as conn:
+            exists = conn.execute(text(
+                "SELECT 1 FROM information_schema.statistics WHERE table_schema=DATABASE() "
+                "AND table_name='articles' AND index_name=:name LIMIT 1"
+            ), {"name": self.INDEX_NAME}).first()
+            if exists:
+                conn.execute(text(f"ALTER TABLE articles DROP INDEX {self.INDEX_NAME}"))
+            conn.execute(text(f"ALTER TABLE articles ADD FULLTEXT INDEX {self.INDEX_NAME} (title, content) WITH PARSER ngram"))
+            count = conn.execute(text("SELECT COUNT(*) FROM articles")).scalar()
+        self.ready = True
+        return count
+
+    def _match(self, keyword: str):
+        """BOOLEAN MODE查询，每个词作为短语，多个词之间为OR"""
+        words = [w for w in keyword.replace("-", " ").replace("|", " ").split(" ") if w]
+        query = " ".join('"' + w.replace('"', " ") + '"' for w in words)
+        return mysql_match(Article.title, Article.content, against=query).in_boolean_mode()
+
+    def criterion(self, keyword: str):
+        self.ensure()
+        if not self.ready:
+            return self.like_criterion(keyword)
+        return self._match(keyword)
+
+    def apply(self, query, keyword: str, rank: bool = False):
+        query = query.filter(self.criterion(keyword))
+        if rank and self.ready:
+            query = query.order_by(self._match(keyword).desc())
+        return query
+
+
+class MemorySearchIndex(SearchIndex):
+    """纯Python倒排索引，用于没有全文检索能力的数据库
+
+    启动后在后台从数据库建立索引，之后随文章写入增量更新。
+    检索结果按TF-IDF排序；命中数量超过max_hits时不截断结果，改用LIKE匹配标题和正文，
+    避免丢掉最新的文章，也避免生成过长的IN列表。
+    """
+    name = "memory"
+
+    def __init__(self, db, max_hits: int = 5000):
+        super().__init__(db)
+        self.max_hits = max_hits
+        self._lock = threading.RLock()
+        self._started = False
+        self._ids: List[str] = []
+        self._doc_of = {}
+        self._postings = defaultdict(dict)
+        self._doc_tokens = {}
+
+    def ensure(self):
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        self._rebuild_background()
+
+    def _add(self, article_id: str, title: str, content: str):
+        self._remove(article_id)
+        doc = len(self._ids)
+        self._ids.append(article_id)
+        self._doc_of[article_id] = doc
+        tokens = list(tokenize(title or ""))
+        # 标题中的词权重更高
+        weights = defaultdict(float)
+        for token in tokens:
+            weights[token] += 10.0
+        body = list(tokenize(strip_html(content)))
+        for token in body:
+            weights[token] += 1.0
+        self._doc_tokens[doc] = (" ".join(tokens), " ".join(body))
+        for token, weight in weights.items():
+            self._postings[token][doc] = weight
+
+    def _remove(self, article_id: str):
+        doc = self._doc_of.pop(article_id, None)
+        if doc is None:
+            return
+        title, body = self._doc_tokens.pop(doc)
+        for token in set(title.split(" ") + body.split(" ")):
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.pop(doc, None)
+                if not posting:
+                    del self._postings[token]
+        self._ids[doc] = None
+
+    def add(self, article_id: str, title: str, content: str):
+        if not self._started:
+            return
+        with self._lock:
+            self._add(article_id, title, content)
+
+    def remove(self, article_id: str):
+        with self._lock:
+            self._remove(article_id)
+
+    def rebuild(self) -> int:
+        self._started = True
+        self.ready = False
+        with self._lock:
+            self._ids, self._doc_of, self._doc_tokens = [], {}, {}
+            self._postings = defaultdict(dict)
+        count = 0
+        for rows in self._iter_articles():
+            with self._lock:
+                for article_id, title, content in rows:
+                    self._add(article_id, title, content)
+            count += len(rows)
+        self.ready = True
+        return count
+
+    def _match_word(self, tokens: List[str]) -> dict:
+        """返回命中一个词的{文档: 得分}，多个二元组需在标题或正文中连续出现"""
+        if is_single_cjk(tokens):
+            hits = defaultdict(float)
+            for token, posting in self._postings.items():
+                if tokens[0] in token:
+                    for doc, weight in posting.items():
+                        hits[doc] += weight
+            return hits
+        postings = [self._postings.get(t) for t in tokens]
+        if not all(postings):
+            return {}
+        postings.sort(key=len)
+        docs = set(postings[0])
+        for posting in postings[1:]:
+            docs &= posting.keys()
+        if len(tokens) > 1:
+            phrase = " ".join(tokens)
+            docs = {d for d in docs if any(phrase in part for part in self._doc_tokens[d])}
+        total = max(len(self._doc_of), 1)
+        hits = {}
+        for token in tokens:
+            posting = self._postings[token]
+            idf = math.log(1 + total / len(posting))
+            for doc in docs:
+                hits[doc] = hits.get(doc, 0.0) + posting[doc] * idf
+        return hits
+
+    def search(self, keyword: str) -> Tuple[List[str], bool]:
+        """返回(按相关度排序的文章ID, 是否超过max_hits)，超过时只返回最相关的max_hits篇"""
+        scores = defaultdict(float)
+        with self._lock:
+            for tokens in split_keywords(keyword):
+                for doc, score in self._match_word(tokens).items():
+                    scores[doc] += score
+            ranked = sorted(scores, key=scores.get, reverse=True)
+            return [self._ids[doc] for doc in ranked[:self.max_hits]], len(ranked) > self.max_hits
+
+    def _search_or_like(self, keyword: str) -> Optional[List[str]]:
+        """命中的文章ID，索引未就绪或命中过多时返回None，由调用方改用LIKE"""
+        self.ensure()
+        if not self.ready:
+            return None
+        ids, truncated = self.search(keyword)
+        if truncated:
+            print_warning(f"检索[{keyword}]命中超过{self.max_hits}篇文章，改用LIKE匹配")
+            return None
+        return ids
+
+    def criterion(self, keyword: str):
+        ids = self._search_or_like(keyword)
+        if ids is None:
+            return self.like_criterion(keyword, content=self.ready)
+        return Article.id.in_(ids)
+
+    def apply(self, query, keyword: str, rank: bool = False):
+        ids = self._search_or_like(keyword)
+        if ids is None:
+            return query.filter(self.like_criterion(keyword, content=self.ready))
+        query = query.filter(Article.id.in_(ids))
+        if rank and ids:
+            query = query.order_by(case({article_id: i for i, article_id in enumerate(ids)}, value=Article.id))
+        return query
+
+
+def create_search_index(db, engine: str = None) -> SearchIndex:
+    """根据配置search.engine及数据库类型选择检索索引实现"""
+    engine = (engine or cfg.get("search.engine", "auto") or "auto").lower()
+    url = str(cfg.get("db", ""))
+    if engine == "auto":
+        if url.startswith("sqlite"):
+            engine = "fts5"
+        elif url.startswith("mysql"):
+            engine = "mysql"
+        else:
+            engine = "memory"
+    if engine == "fts5":
+        return FtsSearchIndex(db)
+    if engine == "mysql":
+        return MysqlSearchIndex(db)
+    if engine == "memory":
+        return MemorySearchIndex(db)
+    return SearchIndex(db)
+
+
+_search_index: Optional[SearchIndex] = None
+
+
+def get_search_index() -> SearchIndex:
+    """全局检索索引，首次使用时创建"""
+    global _search_index
+    if _search_index is None:
+        from core.db import DB
+        _search_index = create_search_index(DB)
+    return _search_index
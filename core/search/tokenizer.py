@@ -0,0 +1,45 @@
+import re
+import html
+from typing import Iterator, List
+
+# 中日韩文字按二元组切分，其他文字按单词切分
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_CJK_RE = re.compile(f"[{_CJK}]")
+_TOKEN_RE = re.compile(f"[{_CJK}]+|[^\\W{_CJK}_]+")
+_TAG_RE = re.compile(r"<(script|style)[^>]*>.*?</\1>|<[^>]+>", re.S | re.I)
+
+
+def strip_html(text: str) -> str:
+    """去掉HTML标签，只保留正文文字"""
+    if not text:
+        return ""
+    return html.unescape(_TAG_RE.sub(" ", text))
+
+
+def tokenize(text: str) -> Iterator[str]:
+    """把文本切分为检索词：中文二元组（单字片段保留单字），英文数字按单词并转小写"""
+    for match in _TOKEN_RE.finditer(text or ""):
+        word = match.group().lower()
+        if is_cjk(word):
+            if len(word) == 1:
+                yield word
+            else:
+                for i in range(len(word) - 1):
+                    yield word[i:i + 2]
+        else:
+            yield word
+
+
+def split_keywords(keyword: str) -> List[List[str]]:
+    """把搜索关键字拆分为多个词，每个词转换为检索词序列，多个词之间为或关系"""
+    words = keyword.replace("-", " ").replace("|", " ").split(" ")
+    return [tokens for tokens in (list(tokenize(w)) for w in words) if tokens]
+
+
+def is_cjk(token: str) -> bool:
+    return bool(_CJK_RE.match(token))
+
+
+def is_single_cjk(tokens: List[str]) -> bool:
+    """单个中文字符的检索词，需要按前缀匹配二元组"""
+    return len(tokens) == 1 and len(tokens[0]) == 1 and is_cjk(tokens[0])
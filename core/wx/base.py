@@ -1,13 +1,19 @@
 import requests
 import json
+import asyncio
+import httpx
+from collections import deque
 from core.models import Feed
 from driver.wx import DoSuccess
 from core.db import DB
 from core.models.feed import Feed
 from .cfg import cfg,wx_cfg
-from core.print import print_error,print_info
+from core.print import print_error,print_info,print_warning
 from core.rss import RSS
+from core.cache import feed_cache
 from driver.success import WX_LOGIN_ED,WX_LOGIN_INFO
+from .engine import engine
+from .seen import seen_articles
 import random
 # 定义一些常见的 User-Agent
 USER_AGENTS = [
@@ -32,22 +38,29 @@ USER_AGENTS = [
     # iOS 移动端 Safari
     "Mozilla/5.0 (iPhone; CPU iPhone OS 16_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.5 Mobile/15E148 Safari/604.1"
 ]
+# 触发频率限制后该账号暂停请求的秒数
+FREQ_CONTROL_PAUSE = 60
+# 单次采集在内存中保留的文章数(含正文)，超过后只保留最新的，计数不受影响
+MAX_BUFFERED_ARTICLES = 500
 # 定义基类
 class WxGather:
-    articles=[]
-    aids=[]
+    # 采集模式名称、文章列表接口和每页条数，子类按接口覆盖
+    mode_name="Web浏览器模式"
+    list_url="https://mp.weixin.qq.com/cgi-bin/appmsgpublish"
+    page_size=5
+    # 未指定Gather_Content时是否采集内容
+    gather_content=False
     def all_count(self):
-        if getattr(self, 'articles', None) is not None:
-            return len(self.articles)
-        return 0
+        return getattr(self, 'article_count', 0)
     def RecordAid(self,aid:str):
-        self.aids.append(aid)
+        seen_articles.add(getattr(self, 'mp_id', None) or "", aid)
         pass
     def HasGathered(self,aid:str):
-        if aid in self.aids:
-            return True
-        self.RecordAid(aid)
-        return False
+        # 检查并记录，已入库的文章在采集开始时从数据库加载
+        return seen_articles.add(getattr(self, 'mp_id', None) or "", aid)
+    def reset_articles(self):
+        self.articles=deque(maxlen=MAX_BUFFERED_ARTICLES)
+        self.article_count=0
     def Model(self):
         type=cfg.get("gather.model","web")
         
@@ -62,7 +75,7 @@ class WxGather:
             wx=MpsApi()
         return wx
     def __init__(self,is_add:bool=False):
-        self.articles=[]
+        self.reset_articles()
         self.is_add=is_add
         self._cookies={}
         session=  requests.Session()
@@ -81,51 +94,258 @@ class WxGather:
             "Cookie":self.cookies,
             "User-Agent": self.user_agent 
         }
+    @property
+    def account(self) -> str:
+        """限速所用的账号标识，同一token/cookie的请求共用一个令牌桶"""
+        return f"{self.token}|{self.cookies}"
+    def content_headers(self) -> dict:
+        # 随机选择一个 User-Agent
+        user_agent = random.choice(USER_AGENTS)
+        # 更新请求头
+        headers = self.headers.copy()
+        headers.update({
+            "User-Agent": user_agent,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
+            "Accept-Language": "zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7",
+            "Accept-Encoding": "gzip, deflate, br",
+            "Connection": "keep-alive"
+        })
+        return headers
+    def check_content(self, text:str) -> str:
+        if "当前环境异常，完成验证后即可继续访问" in text:
+            print_error("当前环境异常，完成验证后即可继续访问")
+            return ""
+        return text
     def content_extract(self,  url):
         text=""
         try:
-            session=self.session
-            # 随机选择一个 User-Agent
-            user_agent = random.choice(USER_AGENTS)
-            # 更新请求头
-            headers = self.headers.copy()
-            headers.update({
-                "User-Agent": user_agent,
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9",
-                "Accept-Language": "zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7",
-                "Accept-Encoding": "gzip, deflate, br",
-                "Connection": "keep-alive"
-            })
-            r = session.get(url, headers=headers)
+            r = self.session.get(url, headers=self.content_headers())
             if r.status_code == 200:
-                text = r.text
-                if "当前环境异常，完成验证后即可继续访问" in text:
-                    print_error("当前环境异常，完成验证后即可继续访问")
-                    text=""
+                text = self.check_content(r.text)
         except:
             pass
         return text
+    async def async_content_extract(self, url) -> str:
+        """异步获取文章内容，请求经采集引擎按账号限速"""
+        text=""
+        try:
+            r = await engine.request(self.account, "GET", url, headers=self.content_headers())
+            if r.status_code == 200:
+                text = self.check_content(r.text)
+        except Exception:
+            pass
+        return text
+    def list_params(self, faker_id:str, begin:int) -> dict:
+        """文章列表接口的请求参数"""
+        return {
+            "sub": "list",
+            "sub_action": "list_ex",
+            "begin": str(begin),
+            "count": self.page_size,
+            "fakeid": faker_id,
+            "token": self.token,
+            "lang": "zh_CN",
+            "f": "json",
+            "ajax": 1
+        }
+    def parse_list(self, msg:dict):
+        """从文章列表接口的返回中取出文章，没有列表数据时返回None"""
+        if 'publish_page' not in msg:
+            return None
+        items=[]
+        publish_page=json.loads(msg['publish_page'])
+        for item in publish_page['publish_list']:
+            if "publish_info" in item:
+                publish_info= json.loads(item['publish_info'])
+                if "appmsgex" in publish_info:
+                    items.extend(publish_info["appmsgex"])
+        return items
+    def check_list(self, msg:dict, begin:int) -> list:
+        """检查文章列表接口的返回，出错时调用Error结束采集"""
+        # 流量控制了, 退出
+        if msg['base_resp']['ret'] == 200013:
+            self.Error("frequencey control, stop at {}".format(str(begin)))
+        if msg['base_resp']['ret'] == 200003:
+            self.Error("Invalid Session, stop at {}".format(str(begin)),code="Invalid Session")
+        if msg['base_resp']['ret'] != 0:
+            self.Error("错误原因:{}:代码:{}".format(msg['base_resp']['err_msg'],msg['base_resp']['ret']),code="Invalid Session")
+        items=self.parse_list(msg)
+        # 如果返回的内容中为空则结束
+        if items is None:
+            self.Error("all ariticle parsed")
+        return items
+    def get_Articles(self, faker_id:str=None,Mps_id:str=None,Mps_title="",CallBack=None,start_page:int=0,MaxPage:int=1,interval=10,Gather_Content=None,Item_Over_CallBack=None,Over_CallBack=None,deep:bool=False,BatchCallBack=None):
+        """采集公众号文章，在采集引擎中执行并等待完成
+        interval仅为兼容保留，请求间隔由按账号的令牌桶控制(gather.rate/gather.burst)
+        deep为True时忽略同步水位，完整翻页到MaxPage
+        BatchCallBack接收一页文章的列表并返回实际新增的文章ID集合(写入失败时返回None)，指定后优先于逐篇的CallBack
+        """
+        return engine.run(self.get_Articles_async(faker_id=faker_id,Mps_id=Mps_id,Mps_title=Mps_title,CallBack=CallBack,
+                                                  start_page=start_page,MaxPage=MaxPage,Gather_Content=Gather_Content,
+                                                  Item_Over_CallBack=Item_Over_CallBack,Over_CallBack=Over_CallBack,deep=deep,
+                                                  BatchCallBack=BatchCallBack))
+    async def get_Articles_async(self, faker_id:str=None,Mps_id:str=None,Mps_title="",CallBack=None,start_page:int=0,MaxPage:int=1,Gather_Content=None,Item_Over_CallBack=None,Over_CallBack=None,deep:bool=False,BatchCallBack=None):
+        """异步采集公众号文章，多个公众号可在同一事件循环中并发执行
+
+        增量采集时跳过不晚于同步水位的文章，一页中已没有新文章时停止翻页
+        只有翻页到了原水位(或列表末尾)、中途没有请求失败且文章都已写入时才推进水位，
+        否则下次采集仍从原水位开始，不会漏掉没翻到的文章
+        """
+        await engine.call(self.Start, mp_id=Mps_id)
+        await engine.call(seen_articles.load, Mps_id)
+        old_watermark = await engine.call(self.get_watermark, Mps_id)
+        watermark = None if deep else old_watermark
+        newest = None
+        # 没有水位的公众号首次采集，不存在需要衔接的旧水位
+        reached = old_watermark is None
+        failed = False
+        if Gather_Content is None:
+            Gather_Content=self.gather_content
+        if self.Gather_Content:
+            Gather_Content=True
+        print(f"{self.mode_name},是否采集[{Mps_title}]内容：{Gather_Content}\n")
+        ext_data={"mp_title":Mps_title,"mp_id":Mps_id}
+        # 起始页数
+        i = start_page
+        while i < MaxPage:
+            begin = i * self.page_size
+            print(f"第{i+1}页开始爬取\n")
+            try:
+                resp = await engine.request(self.account, "GET", self.list_url, headers=self.headers, params=self.list_params(faker_id, begin))
+                msg = resp.json()
+                self._cookies = resp.cookies.jar
+                if msg['base_resp']['ret'] == 200013:
+                    engine.pause(self.account, FREQ_CONTROL_PAUSE)
+                items = await engine.call(self.check_list, msg, begin)
+                last_page = False
+                if not items or (old_watermark is not None
+                                 and any(self.watermark_key(item) <= old_watermark for item in items)):
+                    reached = True
+                if watermark is not None:
+                    known = [item for item in items if self.watermark_key(item) <= watermark]
+                    # 列表按发布时间倒序，本页最后一篇已采集过则后续页都已采集
+                    last_page = bool(items) and self.watermark_key(items[-1]) <= watermark
+                    if known:
+                        items = [item for item in items if self.watermark_key(item) > watermark]
+                        print(f"第{i+1}页跳过{len(known)}篇已采集文章\n")
+                    if not items:
+                        print(f"第{i+1}页没有新文章，停止翻页\n")
+                        break
+                for item in items:
+                    if newest is None or self.watermark_key(item) > self.watermark_key(newest):
+                        newest = item
+                if Gather_Content:
+                    # 同一页的文章内容并发获取，速率由令牌桶控制
+                    pending = [item for item in items if not self.HasGathered(item["aid"])]
+                    contents = await asyncio.gather(*(self.async_content_extract(item['link']) for item in pending))
+                    for item, content in zip(pending, contents):
+                        item["content"] = content
+                else:
+                    for item in items:
+                        item["content"] = ""
+                for item in items:
+                    item["id"] = item["aid"]
+                    item["mp_id"] = Mps_id
+                if CallBack is not None or BatchCallBack is not None:
+                    if not await engine.call(self.FillPage, CallBack, items, ext_data, BatchCallBack):
+                        failed = True
+                print(f"第{i+1}页爬取成功\n")
+                if last_page:
+                    break
+                # 翻页
+                i += 1
+            except httpx.TimeoutException:
+                print("Request timed out")
+                failed = True
+                break
+            except httpx.HTTPError as e:
+                print(f"Request error: {e}")
+                failed = True
+                break
+            except (ValueError, KeyError) as e:
+                # 响应不是JSON或缺少字段（如登录失效），本轮不算采集完整
+                print(f"Response error: {e}")
+                failed = True
+                break
+            finally:
+                await engine.call(self.Item_Over, item={"mps_id":Mps_id,"mps_title":Mps_title}, CallBack=Item_Over_CallBack)
+        if newest is not None:
+            if reached and not failed:
+                await engine.call(self.update_watermark, Mps_id, newest)
+            else:
+                print_warning(f"[{Mps_title}]本次采集未完整衔接上次的同步水位，保留原水位")
+        await engine.call(self.Over, CallBack=Over_CallBack)
+    def publish_time(self, item:dict) -> int:
+        try:
+            return int(item.get("update_time") or 0)
+        except (TypeError, ValueError):
+            return 0
+    def watermark_key(self, item:dict) -> tuple:
+        """文章在同步水位中的位置：(发布时间, aid)，同一秒发布的多篇文章按aid区分"""
+        return (self.publish_time(item), str(item.get("aid") or ""))
+    def get_watermark(self, mp_id:str):
+        """读取公众号的同步水位(最新文章的发布时间, aid)，没有记录时返回None"""
+        try:
+            session = DB.get_session()
+            row = session.query(Feed.last_publish_time, Feed.last_aid).filter(Feed.id == mp_id).first()
+            if row is None or row.last_publish_time is None:
+                return None
+            return (row.last_publish_time, row.last_aid or "")
+        except Exception as e:
+            print_error(f"读取同步水位失败: {e}")
+            return None
+    def update_watermark(self, mp_id:str, item:dict):
+        """采集完成后推进同步水位，只前进不后退"""
+        try:
+            session = DB.get_session()
+            feed = session.query(Feed).filter(Feed.id == mp_id).first()
+            if feed and self.watermark_key(item) > (feed.last_publish_time or 0, feed.last_aid or ""):
+                feed.last_aid = str(item["aid"])
+                feed.last_publish_time = self.publish_time(item)
+                session.commit()
+        except Exception as e:
+            print_error(f"更新同步水位失败: {e}")
+    def FillPage(self,CallBack,items:list,Ext_Data=None,BatchCallBack=None) -> bool:
+        """写入一页文章，BatchCallBack返回None表示写入失败，此时返回False"""
+        if BatchCallBack is None:
+            for item in items:
+                self.FillBack(CallBack=CallBack,data=item,Ext_Data=Ext_Data)
+            return True
+        # 整页一次写入，只保留实际新增的文章
+        arts=[self.make_art(item) for item in items]
+        new_ids=BatchCallBack(arts)
+        if new_ids is None:
+            return False
+        for art in arts:
+            if DB.article_id(art["mp_id"], art["id"]) in new_ids:
+                art["ext"]=Ext_Data
+                self.articles.append(art)
+                self.article_count+=1
+        return True
+    def make_art(self,data:dict) -> dict:
+        """把接口返回的文章转换为入库所需的字段"""
+        art={
+            "id":str(data['id']),
+            "mp_id":data['mp_id'],
+            "title":data['title'],
+            "url":data['link'],
+            "pic_url":data['cover'],
+            "content":data.get("content",""),
+            "publish_time":data['update_time'],
+        }
+        if 'digest' in data:
+            art['description']=data['digest']
+        return art
     def FillBack(self,CallBack=None,data=None,Ext_Data=None):
         if CallBack is not None:
             if data is not  None:
                 WX_LOGIN_ED=True
-                from core.models import Article
-                from datetime import datetime
-                art={
-                    "id":str(data['id']),
-                    "mp_id":data['mp_id'],
-                    "title":data['title'],
-                    "url":data['link'],
-                    "pic_url":data['cover'],
-                    "content":data.get("content",""),
-                    "publish_time":data['update_time'],
-                }
-                if 'digest' in data:
-                    art['description']=data['digest']
+                art=self.make_art(data)
                 if CallBack(art):
                     art["ext"]=Ext_Data
                     # art.pop("content")
                     self.articles.append(art)
+                    self.article_count+=1
 
 
     #通过公众号码平台接口查询公众号
@@ -176,7 +396,8 @@ class WxGather:
     
     
     def Start(self,mp_id=None):
-        self.articles=[]
+        self.reset_articles()
+        self.mp_id=mp_id
         self.get_token()
         if self.token=="" or self.token is None:
              self.Error("请先扫码登录公众号平台")
@@ -208,14 +429,17 @@ class WxGather:
 
     def Over(self,CallBack=None):
         if getattr(self, 'articles', None) is not None:
-            print(f"成功{len(self.articles)}条")
-            rss=RSS()
-            mp_id=""
+            print(f"成功{self.all_count()}条")
+            mp_id=getattr(self, 'mp_id', None) or ""
             try:
                 mp_id=self.articles[0]['mp_id']
             except:
                 pass
-            rss.clear_cache(mp_id=mp_id)  
+            if mp_id:
+                # 采集结束，更新RSS缓存版本并清理失效的缓存文件
+                feed_cache.bump(mp_id, purge=True)
+            else:
+                RSS().clear_cache(mp_id=mp_id)
         if CallBack is not None:
             CallBack(self)
 
@@ -0,0 +1,134 @@
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional
+import httpx
+from core.config import cfg
+from core.print import print_warning
+
+# 共享客户端的最大连接数
+MAX_CONNECTIONS = 20
+
+
+class TokenBucket:
+    """令牌桶限速器
+
+    rate为每秒补充的令牌数，capacity为允许的突发请求数。
+    同一账号的所有采集请求共用一个桶，多个公众号的请求在同一预算内穿插执行。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(capacity, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        """取得一个令牌，令牌不足时等待；按到达顺序依次放行"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """触发频率限制时暂停该账号的所有请求"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = 0
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+class GatherEngine:
+    """异步采集引擎
+
+    在后台线程运行一个事件循环，所有采集请求共用一个带连接池的httpx.AsyncClient，
+    并按账号(token/cookie)使用令牌桶限速。同步代码通过run()/submit()提交协程。
+    """
+
+    def __init__(self, rate: float = None, burst: float = None):
+        # 未指定时使用配置gather.rate/gather.burst
+        self.rate = rate
+        self.burst = burst
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="gather-engine", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """共享的异步HTTP客户端，只能在引擎事件循环内使用"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(10, connect=5),
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS,
+                                    max_keepalive_connections=MAX_CONNECTIONS),
+                follow_redirects=True,
+                verify=cfg.get("gather.verify_ssl", True) is not False,
+            )
+        return self._client
+
+    def submit(self, coro: Awaitable) -> Future:
+        """把协程提交到引擎事件循环，返回concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable, timeout: float = None) -> Any:
+        """在引擎事件循环中执行协程并阻塞等待结果"""
+        if threading.current_thread().name == "gather-engine":
+            raise RuntimeError("GatherEngine.run() cannot be called from the engine loop")
+        return self.submit(coro).result(timeout)
+
+    def bucket(self, account: str) -> TokenBucket:
+        """获取账号对应的令牌桶，账号以token/cookie区分"""
+        key = hashlib.md5((account or "").encode("utf-8")).hexdigest()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate = self.rate or float(cfg.get("gather.rate", 0.5))
+            burst = self.burst or float(cfg.get("gather.burst", 3))
+            bucket = TokenBucket(rate, burst)
+            self._buckets[key] = bucket
+        return bucket
+
+    async def request(self, account: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """按账号限速后发出请求"""
+        await self.bucket(account).acquire()
+        return await self.client.request(method, url, **kwargs)
+
+    async def call(self, func: Callable, *args, **kwargs) -> Any:
+        """在线程池中执行同步函数(数据库写入、回调等)，不阻塞事件循环"""
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    def pause(self, account: str, seconds: float) -> None:
+        print_warning(f"采集请求触发频率限制，暂停{seconds}秒")
+        self.bucket(account).pause(seconds)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+engine = GatherEngine()
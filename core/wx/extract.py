@@ -0,0 +1,103 @@
+import re
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from core.log import logger
+from core.print import print_warning
+from core.html_content import parse_js_content, fix_content
+
+# 微信判定访问异常时返回的验证页面
+VERIFY_PAGE_MARKER = "当前环境异常"
+# 已删除/审核中的文章，无需再用浏览器重试
+DELETED_MARKERS = ("该内容已被发布者删除", "The content has been deleted by the author.", "内容审核中")
+
+
+class TierStats:
+    """单个获取层级的调用次数、成功次数与耗时"""
+    __slots__ = ("attempts", "success", "seconds")
+
+    def __init__(self):
+        self.attempts = 0
+        self.success = 0
+        self.seconds = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "success": self.success,
+            "success_rate": round(self.success / self.attempts, 4) if self.attempts else 0,
+            "avg_ms": round(self.seconds * 1000 / self.attempts, 1) if self.attempts else 0,
+        }
+
+
+class ContentExtractor:
+    """分层获取文章正文
+
+    先用带连接池的HTTP请求获取页面并解析#js_content，只有解析不到正文(需要执行JS)
+    或遇到验证页面时才交给浏览器实例池，并按层级记录成功率与耗时。
+    """
+    TIERS = ("http", "browser")
+
+    def __init__(self, timeout=(5, 10), pool_size: int = 10):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._stats = {tier: TierStats() for tier in self.TIERS}
+        self._lock = threading.Lock()
+
+    def _record(self, tier: str, ok: bool, start: float) -> None:
+        with self._lock:
+            stats = self._stats[tier]
+            stats.attempts += 1
+            stats.success += ok
+            stats.seconds += time.perf_counter() - start
+
+    def fetch_http(self, url: str, headers: dict = None) -> str:
+        """HTTP获取并解析正文；文章已删除返回DELETED，需要浏览器时返回空字符串"""
+        start = time.perf_counter()
+        content = ""
+        try:
+            r = self.session.get(url, headers=headers, timeout=self.timeout)
+            if r.status_code == 200 and VERIFY_PAGE_MARKER not in r.text:
+                content = parse_js_content(r.text)
+                if not content and any(marker in r.text for marker in DELETED_MARKERS):
+                    content = "DELETED"
+        except Exception as e:
+            logger.error(f"HTTP获取文章内容失败 {url}: {e}")
+        self._record("http", bool(content), start)
+        return content
+
+    def fetch_browser(self, url: str) -> str:
+        """浏览器获取正文，返回整理后的正文HTML或DELETED"""
+        start = time.perf_counter()
+        content = ""
+        try:
+            from driver.wxarticle import get_fetcher
+            text = get_fetcher().get_article_content(url).get("content", "")
+            if text == "DELETED":
+                content = text
+            elif text and VERIFY_PAGE_MARKER not in text:
+                content = fix_content(text)
+            elif text:
+                print_warning("当前环境异常，完成验证后即可继续访问")
+        except Exception as e:
+            logger.error(f"浏览器获取文章内容失败 {url}: {e}")
+        self._record("browser", bool(content), start)
+        return content
+
+    def extract(self, url: str, headers: dict = None, browser: bool = True) -> str:
+        """先HTTP后浏览器获取正文，browser为False时只使用HTTP"""
+        content = self.fetch_http(url, headers)
+        if content or not browser:
+            return content
+        return self.fetch_browser(url)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {tier: stats.to_dict() for tier, stats in self._stats.items()}
+
+
+content_extractor = ContentExtractor()
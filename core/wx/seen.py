@@ -0,0 +1,140 @@
+import hashlib
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Iterable, Optional
+from core.print import print_error
+
+# 每个公众号最多记录的文章数，超过后丢弃最早记录的MERGE_THRESHOLD篇
+MAX_SEEN_PER_FEED = 2000
+# 最多同时记录的公众号数，超过后淘汰最久未使用的公众号
+MAX_SEEN_FEEDS = 1000
+# 新记录先放入集合，积累到一定数量后合并进有序数组
+MERGE_THRESHOLD = 256
+
+
+def aid_key(aid) -> int:
+    """把文章aid压缩为64位整数"""
+    return int.from_bytes(hashlib.blake2b(str(aid).encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+
+class _FeedSeen:
+    """单个公众号的已采集记录：有序的64位整数数组 + 少量待合并的新记录
+
+    order按记录先后保存同样的整数，用于超出上限时丢弃最早的记录。
+    """
+    __slots__ = ("keys", "order", "recent")
+
+    def __init__(self, keys: Iterable[int] = ()):
+        """keys按从早到晚的顺序传入"""
+        self.order = array("q", dict.fromkeys(keys))
+        self.keys = array("q", sorted(self.order))
+        self.recent = {}
+
+    def __contains__(self, key: int) -> bool:
+        if key in self.recent:
+            return True
+        i = bisect_left(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def __len__(self) -> int:
+        return len(self.keys) + len(self.recent)
+
+    def add(self, key: int) -> None:
+        self.recent[key] = None
+        if len(self.recent) >= MERGE_THRESHOLD:
+            self._merge()
+
+    def _merge(self) -> None:
+        self.order.extend(self.recent)
+        self.keys = array("q", sorted(self.order))
+        self.recent = {}
+
+    def trim(self, limit: int) -> None:
+        """丢弃最早的记录，只保留最近的limit条"""
+        self._merge()
+        drop = len(self.order) - limit
+        if drop > 0:
+            del self.order[:drop]
+            self.keys = array("q", sorted(self.order))
+
+
+class SeenArticles:
+    """已采集文章记录，按公众号分组，内存有上限
+
+    采集开始时按公众号从articles表懒加载，进程重启后不会重复获取已入库文章的内容。
+    """
+
+    def __init__(self, max_feeds: int = MAX_SEEN_FEEDS, max_per_feed: int = MAX_SEEN_PER_FEED):
+        self.max_feeds = max_feeds
+        self.max_per_feed = max_per_feed
+        self._feeds: "OrderedDict[str, _FeedSeen]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def keep_per_feed(self) -> int:
+        """加载和裁剪后保留的记录数，低于上限，留出新文章的空间"""
+        return max(1, self.max_per_feed - MERGE_THRESHOLD)
+
+    def _feed(self, mp_id: str) -> Optional[_FeedSeen]:
+        feed = self._feeds.get(mp_id)
+        if feed is not None:
+            self._feeds.move_to_end(mp_id)
+        return feed
+
+    def _put(self, mp_id: str, feed: _FeedSeen) -> _FeedSeen:
+        self._feeds[mp_id] = feed
+        while len(self._feeds) > self.max_feeds:
+            self._feeds.popitem(last=False)
+        return feed
+
+    def load(self, mp_id: str) -> None:
+        """从数据库加载公众号最近的文章记录，已加载时不重复查询"""
+        with self._lock:
+            if self._feed(mp_id) is not None:
+                return
+        try:
+            from core.db import DB
+            from core.models.article import Article
+            prefix = f"{mp_id}-".replace("MP_WXS_", "")
+            session = DB.get_session()
+            rows = session.query(Article.id).filter(Article.mp_id == mp_id) \
+                .order_by(Article.publish_time.desc()).limit(self.keep_per_feed).all()
+            keys = [aid_key(row.id[len(prefix):] if row.id.startswith(prefix) else row.id) for row in reversed(rows)]
+        except Exception as e:
+            print_error(f"加载已采集文章记录失败: {e}")
+            keys = []
+        with self._lock:
+            if mp_id not in self._feeds:
+                self._put(mp_id, _FeedSeen(keys))
+
+    def has(self, mp_id: str, aid) -> bool:
+        with self._lock:
+            feed = self._feed(mp_id)
+            return feed is not None and aid_key(aid) in feed
+
+    def add(self, mp_id: str, aid) -> bool:
+        """记录文章，返回记录前是否已存在"""
+        key = aid_key(aid)
+        with self._lock:
+            feed = self._feed(mp_id)
+            if feed is None:
+                feed = self._put(mp_id, _FeedSeen())
+            if key in feed:
+                return True
+            feed.add(key)
+            if len(feed) > self.max_per_feed:
+                feed.trim(self.keep_per_feed)
+            return False
+
+    def forget(self, mp_id: str = None) -> None:
+        """清除某个公众号(不传则全部)的记录"""
+        with self._lock:
+            if mp_id is None:
+                self._feeds.clear()
+            else:
+                self._feeds.pop(mp_id, None)
+
+
+seen_articles = SeenArticles()
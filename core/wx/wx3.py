@@ -6,6 +6,8 @@ import yaml
 import re
 from bs4 import BeautifulSoup
 from .base import WxGather
+from .engine import engine
+from core.html_content import parse_js_content
 from core.print import print_error
 from core.log import logger
 # 继承 BaseGather 类
@@ -13,115 +15,10 @@ class MpsAppMsg(WxGather):
 
     # 重写 content_extract 方法
     def content_extract(self,  url):
-        try:
-            text = super().content_extract(url)
-            if text is not None:
-                soup = BeautifulSoup(text, 'html.parser')
-                # 找到内容
-                js_content_div = soup.find('div', {'id': 'js_content'})
-                # 移除style属性中的visibility: hidden;
-                if js_content_div is None:
-                    return ""
-                js_content_div.attrs.pop('style', None)
-                # 找到所有的img标签
-                img_tags = js_content_div.find_all('img')
-                # 遍历每个img标签并修改属性，设置宽度为1080p
-                for img_tag in img_tags:
-                    if 'data-src' in img_tag.attrs:
-                        img_tag['src'] = img_tag['data-src']
-                        del img_tag['data-src']
-                    if 'style' in img_tag.attrs:
-                        style = img_tag['style']
-                        # 使用正则表达式替换width属性
-                        style = re.sub(r'width\s*:\s*\d+\s*px', 'width: 1080px', style)
-                        img_tag['style'] = style
-                return  js_content_div.prettify()
-        except Exception as e:
-                logger.error(e)
-        return ""
-    # 重写 get_Articles 方法
-    def get_Articles(self, faker_id:str=None,Mps_id:str=None,Mps_title="",CallBack=None,start_page:int=0,MaxPage:int=1,interval=10,Gather_Content=False,Item_Over_CallBack=None,Over_CallBack=None):
-        super().Start(mp_id=Mps_id)
-        if self.Gather_Content:
-            Gather_Content=True
-        print(f"Web浏览器模式,是否采集[{Mps_title}]内容：{Gather_Content}\n")
-        # 请求参数
-        url = "https://mp.weixin.qq.com/cgi-bin/appmsgpublish"
-        count=5
-        params = {
-        "sub": "list",
-        "sub_action": "list_ex",
-        "begin":start_page,
-        "count": count,
-        "fakeid": faker_id,
-        "token": self.token,
-        "lang": "zh_CN",
-        "f": "json",
-        "ajax": 1
-    }
-        # 连接超时
-        session=self.session
-        # 起始页数
-        i = start_page
-        while True:
-            if i >= MaxPage:
-                break
-            begin = i * count
-            params["begin"] = str(begin)
-            print(f"第{i+1}页开始爬取\n")
-            # 随机暂停几秒，避免过快的请求导致过快的被查到
-            time.sleep(random.randint(0,interval))
-            try:
-                resp = session.get(url, headers=self.headers, params = params, verify=False)
-                
-                msg = resp.json()
-                self._cookies =resp.cookies
-                # 流量控制了, 退出
-                if msg['base_resp']['ret'] == 200013:
-                    super().Error("frequencey control, stop at {}".format(str(begin)))
-                    break
-                
-                if msg['base_resp']['ret'] == 200003:
-                    super().Error("Invalid Session, stop at {}".format(str(begin)),code="Invalid Session")
-                    break
-                if msg['base_resp']['ret'] != 0:
-                    super().Error("错误原因:{}:代码:{}".format(msg['base_resp']['err_msg'],msg['base_resp']['ret']),code="Invalid Session")
-                    break    
-                # 如果返回的内容中为空则结束
-                if 'publish_page' not in msg:
-                    super().Error("all ariticle parsed")
-                    break
-                if msg['base_resp']['ret'] != 0:
-                    super().Error("错误原因:{}:代码:{}".format(msg['base_resp']['err_msg'],msg['base_resp']['ret']))
-                    break  
-                if "publish_page" in msg:
-                    msg["publish_page"]=json.loads(msg['publish_page'])
-                    for item in msg["publish_page"]['publish_list']:
-                        if "publish_info" in item:
-                            publish_info= json.loads(item['publish_info'])
-                       
-                            if "appmsgex" in publish_info:
-                                # info = '"{}","{}","{}","{}"'.format(str(item["aid"]), item['title'], item['link'], str(item['create_time']))
-                                for item in publish_info["appmsgex"]:
-                                    if Gather_Content:
-                                        if not super().HasGathered(item["aid"]):
-                                            item["content"] = self.content_extract(item['link'])
-                                    else:
-                                        item["content"] = ""
-                                    item["id"] = item["aid"]
-                                    item["mp_id"] = Mps_id
-                                    if CallBack is not None:
-                                        super().FillBack(CallBack=CallBack,data=item,Ext_Data={"mp_title":Mps_title,"mp_id":Mps_id})
-                    print(f"第{i+1}页爬取成功\n")
-                # 翻页
-                i += 1
-            except requests.exceptions.Timeout:
-                print("Request timed out")
-                break
-            except requests.exceptions.RequestException as e:
-                print(f"Request error: {e}")
-                break
-            finally:
-                super().Item_Over(item={"mps_id":Mps_id,"mps_title":Mps_title},CallBack=Item_Over_CallBack)
-        super().Over(CallBack=Over_CallBack)
-        pass
\ No newline at end of file
+        return self.parse_content(super().content_extract(url))
+    # 重写 async_content_extract 方法，解析在线程池中进行，不阻塞采集引擎
+    async def async_content_extract(self, url):
+        text = await super().async_content_extract(url)
+        return await engine.call(self.parse_content, text)
+    def parse_content(self, text):
+        return parse_js_content(text)
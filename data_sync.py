@@ -1,12 +1,26 @@
 import os
+import hashlib
 import importlib
 from typing import Dict, Type
-from sqlalchemy import create_engine, MetaData, inspect
+from sqlalchemy import create_engine, MetaData, inspect, text, bindparam
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 
+# 分页排序字段为NULL的行无法用游标定位，同步时补为默认值(SQL表达式)
+SORT_COLUMN_DEFAULTS = {
+    "publish_time": "0",
+    "updated_at": "created_at",
+}
+
+# 已被模型中其他索引代替的旧索引，同步时删除
+REPLACED_INDEXES = {
+    "link_articles": ["uq_link_articles_link_id_url"],
+    "patent_articles": ["uq_patent_articles_patent_id_url"],
+    "industry_articles": ["uq_industry_articles_industry_id_url"],
+}
+
 class DatabaseSynchronizer:
     """数据库模型同步器"""
     
@@ -99,6 +113,86 @@ class DatabaseSynchronizer:
                 column.type = Text()
                 self.logger.debug(f"已将列 {column.name} 的类型从 MEDIUMTEXT 映射为 Text")
     
+    def _add_missing_columns(self, model):
+        """为已存在的表补充模型中新增的列(仅新增，不修改或删除已有列)"""
+        existing = {c["name"] for c in inspect(self.engine).get_columns(model.__tablename__)}
+        preparer = self.engine.dialect.identifier_preparer
+        with self.engine.begin() as conn:
+            for column in model.__table__.columns:
+                if column.name in existing or column.primary_key:
+                    continue
+                col_type = column.type.compile(dialect=self.engine.dialect)
+                conn.execute(text(f"ALTER TABLE {preparer.quote(model.__tablename__)} "
+                                  f"ADD COLUMN {preparer.quote(column.name)} {col_type}"))
+                self.logger.info(f"新增列: {model.__tablename__}.{column.name}")
+
+    def _add_missing_indexes(self, model):
+        """为已存在的表补充模型中新增的索引，已有重复数据导致唯一索引创建失败时跳过"""
+        existing = {i["name"] for i in inspect(self.engine).get_indexes(model.__tablename__)}
+        for index in model.__table__.indexes:
+            if index.name in existing:
+                continue
+            try:
+                index.create(self.engine)
+                self.logger.info(f"新增索引: {model.__tablename__}.{index.name}")
+            except SQLAlchemyError as e:
+                self.logger.warning(f"创建索引{index.name}失败，请先清理重复数据: {e}")
+
+    def _drop_replaced_indexes(self, model):
+        """删除已被新索引代替的旧索引"""
+        names = REPLACED_INDEXES.get(model.__tablename__)
+        if not names:
+            return
+        existing = {i["name"] for i in inspect(self.engine).get_indexes(model.__tablename__)}
+        for index in model.__table__.indexes:
+            existing.discard(index.name)
+        preparer = self.engine.dialect.identifier_preparer
+        for name in names:
+            if name not in existing:
+                continue
+            if self.engine.dialect.name in ("mysql", "mariadb"):
+                sql = f"DROP INDEX {preparer.quote(name)} ON {preparer.quote(model.__tablename__)}"
+            else:
+                sql = f"DROP INDEX {preparer.quote(name)}"
+            with self.engine.begin() as conn:
+                conn.execute(text(sql))
+            self.logger.info(f"删除旧索引: {model.__tablename__}.{name}")
+
+    def _backfill_url_hash(self, model, batch_size: int = 1000):
+        """为已有文章补充url_hash，之后才能建立(来源ID, url_hash)唯一索引"""
+        if "url_hash" not in model.__table__.columns:
+            return
+        table = model.__table__
+        count = 0
+        with self.engine.begin() as conn:
+            while True:
+                rows = conn.execute(table.select().with_only_columns(table.c.id, table.c.url)
+                                    .where(table.c.url_hash.is_(None)).limit(batch_size)).fetchall()
+                if not rows:
+                    break
+                conn.execute(table.update().where(table.c.id == bindparam("_id")).values(url_hash=bindparam("_hash")),
+                             [{"_id": id, "_hash": hashlib.md5((url or "").encode("utf-8")).hexdigest()}
+                              for id, url in rows])
+                count += len(rows)
+        if count:
+            self.logger.info(f"补充url_hash: {model.__tablename__} {count}行")
+
+    def _backfill_sort_columns(self, model):
+        """把分页排序字段中的NULL补为默认值"""
+        columns = model.__table__.columns
+        preparer = self.engine.dialect.identifier_preparer
+        table = preparer.quote(model.__tablename__)
+        with self.engine.begin() as conn:
+            for name, default in SORT_COLUMN_DEFAULTS.items():
+                if name not in columns or (default != "0" and default not in columns):
+                    continue
+                where = f"{preparer.quote(name)} IS NULL"
+                if default != "0":
+                    where += f" AND {default} IS NOT NULL"
+                result = conn.execute(text(f"UPDATE {table} SET {preparer.quote(name)}={default} WHERE {where}"))
+                if result.rowcount:
+                    self.logger.info(f"补充排序字段: {model.__tablename__}.{name} {result.rowcount}行")
+
     def sync(self):
         """同步模型到数据库"""
         try:
@@ -135,6 +229,11 @@ class DatabaseSynchronizer:
                     self.logger.info(f"创建表: {model.__tablename__}")
                 else:
                     self.logger.info(f"表已存在: {model.__tablename__}")
+                    self._add_missing_columns(model)
+                    self._drop_replaced_indexes(model)
+                    self._backfill_url_hash(model)
+                    self._add_missing_indexes(model)
+                    self._backfill_sort_columns(model)
                     
             self.logger.info("模型同步完成")
             return True
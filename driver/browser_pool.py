@@ -0,0 +1,162 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+from selenium.common.exceptions import WebDriverException
+from .firefox_driver import FirefoxController
+from core.print import print_error, print_info, print_warning
+
+# 微信判定访问异常时返回的验证页面
+VERIFY_PAGE_MARKERS = ("当前环境异常", "完成验证后即可继续访问")
+
+
+def is_verify_page(text: str) -> bool:
+    return bool(text) and any(marker in text for marker in VERIFY_PAGE_MARKERS)
+
+
+class BrowserSession:
+    """一个常驻的Firefox实例，同一时间只交给一个调用方使用"""
+
+    def __init__(self, index: int, max_pages: int):
+        self.index = index
+        self.max_pages = max_pages
+        self.controller: Optional[FirefoxController] = None
+        self.pages = 0
+        self.broken = False
+        self.in_use = False
+        self.last_used = time.time()
+
+    @property
+    def driver(self):
+        if self.controller is None:
+            # 每次启动使用新的控制器，避免启动参数重复追加
+            self.controller = FirefoxController()
+            self.controller.start_browser()
+            self.pages = 0
+            self.broken = False
+            print_info(f"浏览器实例{self.index}已启动")
+        return self.controller.driver
+
+    def healthy(self) -> bool:
+        """浏览器进程仍可响应、未触发验证页且未达到页面数上限"""
+        if self.controller is None:
+            return True
+        if self.broken or self.pages >= self.max_pages:
+            return False
+        try:
+            self.controller.driver.current_url
+            return True
+        except (WebDriverException, AttributeError):
+            return False
+
+    def mark_broken(self, reason: str = "") -> None:
+        """标记实例需要重启，归还时关闭"""
+        if not self.broken:
+            print_warning(f"浏览器实例{self.index}将重启: {reason}")
+        self.broken = True
+
+    def close(self) -> None:
+        if self.controller is None:
+            return
+        try:
+            self.controller.Close()
+        except Exception as e:
+            print_error(f"关闭浏览器实例{self.index}失败: {e}")
+        self.controller = None
+        self.pages = 0
+
+
+class BrowserPool:
+    """Firefox实例池
+
+    保持size个浏览器实例常驻，按需启动；每个实例打开max_pages个页面后、崩溃或遇到验证页时重启，
+    空闲超过idle_timeout秒的实例自动关闭。通过session()取得独占的实例。
+    """
+
+    def __init__(self, size: int = 1, max_pages: int = 50, idle_timeout: float = 300):
+        self.size = max(1, int(size))
+        self.max_pages = max(1, int(max_pages))
+        self.idle_timeout = idle_timeout
+        self._sessions: List[BrowserSession] = [BrowserSession(i, self.max_pages) for i in range(self.size)]
+        self._cond = threading.Condition()
+        self._reaper = None
+
+    @contextmanager
+    def session(self, timeout: float = None):
+        """取得一个空闲实例，用完自动归还；实例上抛出WebDriverException时视为崩溃并重启"""
+        browser = self._acquire(timeout)
+        try:
+            if not browser.healthy():
+                browser.close()
+            yield browser
+            browser.pages += 1
+        except WebDriverException as e:
+            browser.mark_broken(f"浏览器异常 {e.__class__.__name__}")
+            raise
+        finally:
+            self._release(browser)
+
+    def _acquire(self, timeout: float = None) -> BrowserSession:
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while True:
+                idle = [s for s in self._sessions if not s.in_use]
+                if idle:
+                    # 优先使用已启动的实例
+                    browser = max(idle, key=lambda s: (s.controller is not None, s.last_used))
+                    browser.in_use = True
+                    self._start_reaper()
+                    return browser
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("等待浏览器实例超时")
+                self._cond.wait(remaining)
+
+    def _release(self, browser: BrowserSession) -> None:
+        if not browser.healthy():
+            browser.close()
+        with self._cond:
+            browser.in_use = False
+            browser.last_used = time.time()
+            self._cond.notify()
+
+    def _start_reaper(self) -> None:
+        if self._reaper is None and self.idle_timeout and self.idle_timeout > 0:
+            self._reaper = threading.Thread(target=self._reap, name="browser-pool-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap(self) -> None:
+        """关闭空闲超时的实例"""
+        while True:
+            time.sleep(min(self.idle_timeout, 60))
+            now = time.time()
+            with self._cond:
+                idle = [s for s in self._sessions
+                        if not s.in_use and s.controller is not None and now - s.last_used > self.idle_timeout]
+                for s in idle:
+                    s.in_use = True
+            for s in idle:
+                s.close()
+                print_info(f"浏览器实例{s.index}空闲超时，已关闭")
+            with self._cond:
+                for s in idle:
+                    s.in_use = False
+                self._cond.notify_all()
+
+    def close(self) -> None:
+        """关闭所有空闲实例，使用中的实例归还后按需重新启动"""
+        with self._cond:
+            idle = [s for s in self._sessions if not s.in_use]
+            for s in idle:
+                s.in_use = True
+        for s in idle:
+            s.close()
+        with self._cond:
+            for s in idle:
+                s.in_use = False
+            self._cond.notify_all()
+
+    def info(self) -> list:
+        with self._cond:
+            return [{"index": s.index, "started": s.controller is not None, "in_use": s.in_use,
+                     "pages": s.pages} for s in self._sessions]
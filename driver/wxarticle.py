@@ -1,4 +1,4 @@
-from .firefox_driver import FirefoxController
+from .browser_pool import BrowserPool,is_verify_page
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -6,26 +6,30 @@ from typing import Dict
 from core.print import print_error,print_info,print_success,print_warning
 import time
 import re
+import threading
 from core.config import cfg
 
 class WXArticleFetcher:
     """微信公众号文章获取器
     
-    基于WX_API登录状态获取文章内容
+    基于WX_API登录状态获取文章内容，浏览器实例由BrowserPool复用，不再每篇文章启动一次Firefox
     
     Attributes:
         wait_timeout: 显式等待超时时间(秒)
+        pool: 浏览器实例池
     """
     
-    def __init__(self, wait_timeout: int = 300):
+    def __init__(self, wait_timeout: int = 300, pool: BrowserPool = None):
         """初始化文章获取器"""
         self.wait_timeout = wait_timeout
-        self.controller = FirefoxController()
-        if not self.controller:
-            raise Exception("WebDriver未初始化或未登录")
+        self.pool = pool or BrowserPool(
+            size=int(cfg.get("browser.pool_size", 1)),
+            max_pages=int(cfg.get("browser.max_pages", 50)),
+            idle_timeout=float(cfg.get("browser.idle_timeout", 300)),
+        )
        
         
-    def extract_biz_from_source(self,url:str) -> str:
+    def extract_biz_from_source(self,url:str,driver=None) -> str:
         """从URL或页面源码中提取biz参数
         
         1. 首先尝试从URL参数中提取__biz
@@ -39,7 +43,7 @@ class WXArticleFetcher:
         # 从页面源码中提取
         try:
             # 从页面源码中查找biz信息
-            page_source = self.driver.page_source
+            page_source = driver.page_source
             biz_match = re.search(r'var biz = "([^"]+)"', page_source)
             if biz_match:
                 return biz_match.group(1)
@@ -82,20 +86,28 @@ class WXArticleFetcher:
                 "biz": "",
                 }
             }
-        self.controller.start_browser()    
-        self.driver = self.controller.driver
-        print_warning(f"Get:{url} Wait:{self.wait_timeout}")
-        self.controller.open_url(url)
-        driver=self.driver
+        with self.pool.session() as browser:
+            print_warning(f"Get:{url} Wait:{self.wait_timeout}")
+            self._fetch(browser, url, info)
+        return info
+
+    def _fetch(self, browser, url: str, info: Dict) -> None:
+        """在取得的浏览器实例中打开文章并填充info"""
+        driver=browser.driver
         wait = WebDriverWait(driver, self.wait_timeout)
+        body=""
         try:
            
             driver.get(url)
               # 等待页面加载
             body=driver.find_element(By.TAG_NAME,"body").text
             info["content"]=body
+            if is_verify_page(body):
+                # 验证页面不会出现正文，重启该实例后再采集
+                browser.mark_broken("当前环境异常")
+                raise Exception("当前环境异常，完成验证后即可继续访问")
             if cfg.get("export.pdf",False):
-                self.export_to_pdf(f"./data/{url}.pdf")
+                self.export_to_pdf(f"./data/{url}.pdf",driver)
                 pass
             if "该内容已被发布者删除" in body or "The content has been deleted by the author." in body:
                 info["content"]="DELETED"
@@ -146,6 +158,8 @@ class WXArticleFetcher:
             print(f"文章内容获取失败: {str(e)}")
             print_warning(f"\n\n{body}")
             # raise
+            if browser.broken:
+                return
 
         try:
             # 等待关键元素加载
@@ -161,26 +175,17 @@ class WXArticleFetcher:
             info["mp_info"]={
                 "mp_name":title,
                 "logo":logo_src,
-                "biz": self.extract_biz_from_source(url), 
+                "biz": self.extract_biz_from_source(url,driver), 
             }
         except Exception as e:
             # raise Exception(f"文章内容获取失败: {str(e)}")
             # print(f"获取公众号信息失败: {str(e)}")    
             pass
-        self.Close()
-        return info
     def Close(self):
-        """关闭浏览器"""
-        if hasattr(self, 'controller'):
-            self.controller.Close()
-        else:
-            print("WXArticleFetcher未初始化或已销毁")
-    def __del__(self):
-        """销毁文章获取器"""
-        if hasattr(WXArticleFetcher, 'controller'):
-            WXArticleFetcher.controller.close()
+        """关闭空闲的浏览器实例，下次获取文章时重新启动"""
+        self.pool.close()
 
-    def export_to_pdf(self, output_path=None):
+    def export_to_pdf(self, output_path=None, driver=None):
         """将文章内容导出为 PDF 文件
         
         Args:
@@ -191,13 +196,27 @@ class WXArticleFetcher:
             if output_path:
                 import os
                 output_path=os.path.abspath(output_path)
-                self.driver.execute_script(f"window.print({{'printBackground': true, 'destination': 'save-as-pdf', 'outputPath': '{output_path}'}});")
+                driver.execute_script(f"window.print({{'printBackground': true, 'destination': 'save-as-pdf', 'outputPath': '{output_path}'}});")
                 time.sleep(3)
             else:
-                self.driver.execute_script("window.print();")
+                driver.execute_script("window.print();")
             print_success(f"PDF 文件已生成{output_path}")
         except Exception as e:
             print_error(f"生成 PDF 失败: {str(e)}")
 
     
-Web=WXArticleFetcher()
\ No newline at end of file
+_web = None
+_web_lock = threading.Lock()
+def get_fetcher() -> WXArticleFetcher:
+    """共享的文章获取器，首次使用时创建"""
+    global _web
+    with _web_lock:
+        if _web is None:
+            _web = WXArticleFetcher()
+        return _web
+
+def __getattr__(name):
+    # 兼容 from driver.wxarticle import Web，导入时才创建实例池
+    if name == "Web":
+        return get_fetcher()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
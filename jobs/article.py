@@ -11,6 +11,8 @@ def delete_article(id:str):
         article = session.query(Article).filter(Article.id == id).first()
         session.delete(article)
         session.commit()
+        from core.search import get_search_index
+        get_search_index().remove_article(id)
     except Exception as e:
         print(e)
         pass
@@ -26,6 +28,9 @@ def UpdateArticle(art:dict):
         mps_count=mps_count+1
         return True
     return False
+def UpdateArticles(arts:list):
+    """批量写入一页文章，返回实际新增的文章ID集合，写入失败时返回None"""
+    return DB.add_articles(arts)
 def Update_Over(data=None):
     print("更新完成",data)
     pass
\ No newline at end of file
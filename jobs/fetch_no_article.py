@@ -4,7 +4,9 @@ from core.wx.base import WxGather
 from time import sleep
 from core.print import print_success,print_error
 import random
-from driver.wxarticle import Web
+from core.wx.extract import content_extractor
+from core.search import get_search_index
+from core.cache import feed_cache
 DB=db.Db(tag="内容修正")
 def fetch_articles_without_content():
     """
@@ -12,6 +14,8 @@ def fetch_articles_without_content():
     """
     session = DB.get_session()
     ga=WxGather().Model()
+    # 补全了内容的文章，结束后写入内容存储并使其公众号的RSS缓存失效
+    updated=[]
     try:
         # 查询content为空的文章
         from sqlalchemy import or_
@@ -30,11 +34,9 @@ def fetch_articles_without_content():
             
             print(f"正在处理文章: {article.title}, URL: {url}")
             
-            # 获取内容
-            if cfg.get("gather.content_mode","web"):
-                content=Web.get_article_content(url).get("content")
-            else:
-                content = ga.content_extract(url)
+            # 获取内容：先HTTP获取，web模式下获取不到正文时再使用浏览器
+            content_mode=str(cfg.get("gather.content_mode","web")).lower()
+            content=content_extractor.extract(url,headers=ga.content_headers(),browser=content_mode=="web")
             sleep(random.randint(3,10))
             if content:
                 # 更新内容
@@ -43,6 +45,8 @@ def fetch_articles_without_content():
                     print_error(f"获取文章 {article.title} 内容已被发布者删除")
                     article.status = DATA_STATUS.DELETED
                 session.commit()
+                updated.append(article)
+                get_search_index().add_article(article)
                 print_success(f"成功更新文章 {article.title} 的内容")
             else:
                 print_error(f"获取文章 {article.title} 内容失败")
@@ -50,12 +54,14 @@ def fetch_articles_without_content():
     except Exception as e:
         print(f"处理过程中发生错误: {e}")
     finally:
-        Web.Close()
+        if updated:
+            DB.store_contents(session, updated)
+        for mp_id in {article.mp_id for article in updated}:
+            feed_cache.bump(mp_id)
 from core.task import TaskScheduler
-from core.queue import TaskQueueManager
+from core.queue import shared_queue,start_queues
 scheduler=TaskScheduler()
-task_queue=TaskQueueManager()
-task_queue.run_task_background()
+task_queue=shared_queue("content",tag="内容同步")
 from core.config import cfg
 from core.print import print_success,print_warning
 def start_sync_content():
@@ -64,10 +70,11 @@ def start_sync_content():
         return
     interval=int(cfg.get("gather.content_auto_interval",1)) # 每隔多少分钟
     cron_exp=f"*/{interval} * * * *"
-    task_queue.clear_queue()
     scheduler.clear_all_jobs()
+    start_queues()
     def do_sync():
-        task_queue.add_task(fetch_articles_without_content)
+        # 上一次同步尚未开始时不重复排队
+        task_queue.add_task(fetch_articles_without_content,coalesce_key="sync_content")
     job_id=scheduler.add_cron_job(do_sync,cron_expr=cron_exp)
     print_success(f"已添自动同步文章内容任务: {job_id}")
     scheduler.start()
@@ -1,6 +1,6 @@
 from datetime import datetime
 from core.models.article import Article
-from .article import UpdateArticle,Update_Over
+from .article import UpdateArticle,UpdateArticles,Update_Over
 import core.db as db
 from core.wx import WxGather
 from core.log import logger
@@ -19,7 +19,7 @@ def fetch_all_article():
         mps=db.DB.get_all_mps()
         for item in mps:
             try:
-                wx.get_Articles(item.faker_id,CallBack=UpdateArticle,Mps_id=item.id,Mps_title=item.mp_name, MaxPage=1)
+                wx.get_Articles(item.faker_id,BatchCallBack=UpdateArticles,Mps_id=item.id,Mps_title=item.mp_name, MaxPage=1)
             except Exception as e:
                 print(e)
         print(wx.articles) 
@@ -43,7 +43,7 @@ def do_job(mp=None,task:MessageTask=None):
         all_count=0
         wx=WxGather().Model()
         try:
-            wx.get_Articles(mp.faker_id,CallBack=UpdateArticle,Mps_id=mp.id,Mps_title=mp.mp_name, MaxPage=1,Over_CallBack=Update_Over,interval=interval)
+            wx.get_Articles(mp.faker_id,BatchCallBack=UpdateArticles,Mps_id=mp.id,Mps_title=mp.mp_name, MaxPage=1,Over_CallBack=Update_Over,interval=interval)
         except Exception as e:
             print_error(e)
             # raise
@@ -55,12 +55,42 @@ def do_job(mp=None,task:MessageTask=None):
             web_hook(tms)
             print_success(f"任务[{mp.mp_name}]执行成功,{count}成功条数")
 
-from core.queue import TaskQueue
+def gather_feed(mp_id:str,task_id:str=None):
+    """队列任务：按ID重新加载公众号和消息任务后采集，参数可持久化"""
+    mp=wx_db.get_mps(mp_id)
+    if not mp:
+        print_error(f"公众号[{mp_id}]不存在，跳过采集")
+        return
+    task=None
+    if task_id:
+        from .taskmsg import get_message_task
+        tasks=get_message_task(task_id)
+        if not tasks:
+            print_error(f"消息任务[{task_id}]不存在或已停用，跳过采集")
+            return
+        task=tasks[0]
+    do_job(mp,task)
+
+def update_feed(mp_id:str,start_page:int=0,end_page:int=1,deep:bool=False):
+    """队列任务：手动更新或新增公众号后首次采集"""
+    mp=wx_db.get_mps(mp_id)
+    if not mp:
+        print_error(f"公众号[{mp_id}]不存在，跳过采集")
+        return
+    wx=WxGather().Model()
+    wx.get_Articles(mp.faker_id,Mps_id=mp.id,Mps_title=mp.mp_name,BatchCallBack=UpdateArticles,start_page=start_page,MaxPage=end_page,deep=deep)
+
+from core.queue import TaskQueue,PRIORITY_NORMAL
 def add_job(feeds:list[Feed]=None,task:MessageTask=None,isTest=False):
+    """每个公众号作为一个队列任务，由队列工作线程并发采集，请求由采集引擎按账号令牌桶统一限速。
+    同一公众号不会同时采集；同一消息任务对同一公众号尚未执行的采集会被合并"""
     if isTest:
         TaskQueue.clear_queue()
+        feeds=feeds[:1]
     for feed in feeds:
-        TaskQueue.add_task(do_job,feed,task)
+        TaskQueue.add_task(gather_feed,feed.id,task.id if task else None,priority=PRIORITY_NORMAL,
+                           concurrency_key=f"feed:{feed.id}",
+                           coalesce_key=f"job:{task.id if task else ''}:{feed.id}")
         if isTest:
             print(f"测试任务，{feed.mp_name}，加入队列成功")
             reload_job()
@@ -80,7 +110,7 @@ scheduler=TaskScheduler()
 def reload_job():
     print_success("重载任务")
     scheduler.clear_all_jobs()
-    TaskQueue.clear_queue()
+    # 不清空队列：已排队的采集继续执行，重复的由合并键去重，已删除的任务执行时跳过
     start_job()
 
 def run(job_id:str=None,isTest=False):
@@ -98,6 +128,8 @@ def run(job_id:str=None,isTest=False):
     return tasks
 def start_job(job_id:str=None):
     from .taskmsg import get_message_task
+    from core.queue import start_queues
+    start_queues()
     tasks=get_message_task(job_id)
     if not tasks:
         print("没有任务")
@@ -119,6 +151,8 @@ def start_all_task():
       #开启自动同步未同步 文章任务
     from jobs.fetch_no_article import start_sync_content
     start_sync_content()
+    from jobs.recrawl import start_recrawl
+    start_recrawl()
     start_job()
 if __name__ == '__main__':
     # do_job()
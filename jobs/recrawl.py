@@ -0,0 +1,26 @@
+from core.task import TaskScheduler
+from core.queue import shared_queue,start_queues
+from core.config import cfg
+from core.print import print_success,print_warning
+scheduler=TaskScheduler()
+task_queue=shared_queue("crawl",tag="链接爬取")
+def recrawl_due_sources():
+    """重新爬取所有到期的链接/专利/行业来源"""
+    from core.recrawl import recrawl_engine
+    recrawl_engine.run()
+def start_recrawl():
+    if not cfg.get("crawler.recrawl",False):
+        print_warning("定时重新爬取链接功能未启用")
+        return
+    interval=int(cfg.get("crawler.recrawl_check",10)) # 每隔多少分钟
+    cron_exp=f"*/{interval} * * * *"
+    scheduler.clear_all_jobs()
+    start_queues()
+    def do_recrawl():
+        # 上一轮尚未开始时不重复排队
+        task_queue.add_task(recrawl_due_sources,coalesce_key="recrawl")
+    job_id=scheduler.add_cron_job(do_recrawl,cron_expr=cron_exp)
+    print_success(f"已添加定时重新爬取链接任务: {job_id}")
+    scheduler.start()
+if __name__ == "__main__":
+    recrawl_due_sources()
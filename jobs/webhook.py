@@ -18,17 +18,8 @@ class MessageWebHook:
     articles: list[Article]
     pass
 
-def send_message(hook: MessageWebHook) -> str:
-    """
-    发送格式化消息
-    
-    参数:
-        hook: MessageWebHook对象，包含任务、订阅源和文章信息
-        
-    返回:
-        str: 格式化后的消息内容
-    """
-    template = hook.task.message_template if hook.task.message_template else """
+# 默认消息模板
+DEFAULT_MESSAGE_TEMPLATE = """
 ### {{feed.mp_name}} 订阅消息：
 {% if articles %}
 {% for article in articles %}
@@ -38,33 +29,9 @@ def send_message(hook: MessageWebHook) -> str:
 - 暂无文章\n
 {% endif %}
     """
-    parser = TemplateParser(template)
-    data = {
-        "feed": hook.feed,
-        "articles": hook.articles,
-        "task": hook.task,
-        'now': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
-    message = parser.render(data)
-    # 这里可以添加发送消息的具体实现
-    print("发送消息:", message)
-    notice(hook.task.web_hook_url, hook.task.name, message)
-    return message
 
-def call_webhook(hook: MessageWebHook) -> str:
-    """
-    调用webhook接口发送数据
-    
-    参数:
-        hook: MessageWebHook对象，包含任务、订阅源和文章信息
-        
-    返回:
-        str: 调用结果信息
-        
-    异常:
-        ValueError: 当webhook调用失败时抛出
-    """
-    template = hook.task.message_template if hook.task.message_template else """{
+# 默认WebHook模板
+DEFAULT_WEBHOOK_TEMPLATE = """{
   "feed": {
     "id": "{{ feed.id }}",
     "name": "{{ feed.mp_name }}"
@@ -91,6 +58,45 @@ def call_webhook(hook: MessageWebHook) -> str:
   "now": "{{ now }}"
 }
 """
+
+def send_message(hook: MessageWebHook) -> str:
+    """
+    发送格式化消息
+    
+    参数:
+        hook: MessageWebHook对象，包含任务、订阅源和文章信息
+        
+    返回:
+        str: 格式化后的消息内容
+    """
+    template = hook.task.message_template if hook.task.message_template else DEFAULT_MESSAGE_TEMPLATE
+    parser = TemplateParser(template)
+    data = {
+        "feed": hook.feed,
+        "articles": hook.articles,
+        "task": hook.task,
+        'now': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    }
+    message = parser.render(data)
+    # 这里可以添加发送消息的具体实现
+    print("发送消息:", message)
+    notice(hook.task.web_hook_url, hook.task.name, message)
+    return message
+
+def call_webhook(hook: MessageWebHook) -> str:
+    """
+    调用webhook接口发送数据
+    
+    参数:
+        hook: MessageWebHook对象，包含任务、订阅源和文章信息
+        
+    返回:
+        str: 调用结果信息
+        
+    异常:
+        ValueError: 当webhook调用失败时抛出
+    """
+    template = hook.task.message_template if hook.task.message_template else DEFAULT_WEBHOOK_TEMPLATE
     
     # 检查template是否需要content
     template_needs_content = "content" in template.lower()
@@ -0,0 +1,114 @@
+# test_queue.py - 任务队列测试(内存队列与持久化队列)
+import pytest
+import core.queue.queue as queue_module
+import core.queue.durable as durable_module
+from core.queue import TaskQueueManager, DurableTaskQueue, PRIORITY_HIGH, PRIORITY_LOW
+
+
+def noop(*args, **kwargs):
+    pass
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def queue(request, tmp_path):
+    if request.param == "memory":
+        return TaskQueueManager(tag="测试")
+    return DurableTaskQueue("test", db_path=str(tmp_path / "queue.db"), tag="测试")
+
+
+@pytest.fixture
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(queue_module, "retry_delay", lambda attempts: 0)
+    monkeypatch.setattr(durable_module, "retry_delay", lambda attempts: 0)
+
+
+def test_coalesce_keeps_one_pending_task(queue):
+    assert queue.add_task(noop, "a", coalesce_key="mp1", priority=PRIORITY_LOW)
+    assert not queue.add_task(noop, "b", coalesce_key="mp1", priority=PRIORITY_LOW)
+    # 优先级更高的重复任务提升已有任务的优先级，参数以新任务为准
+    assert not queue.add_task(noop, "c", coalesce_key="mp1", priority=PRIORITY_HIGH)
+    assert queue.get_queue_info()["pending_tasks"] == 1
+
+    entry = queue._claim("w")
+    assert entry.priority == PRIORITY_HIGH and entry.args == ("c",)
+    assert queue._claim("w") is None
+    # 已开始执行的任务不再合并
+    assert queue.add_task(noop, "d", coalesce_key="mp1")
+
+
+def test_same_concurrency_key_runs_serially(queue):
+    queue.add_task(noop, 1, concurrency_key="mp1")
+    queue.add_task(noop, 2, concurrency_key="mp1")
+    queue.add_task(noop, 3, concurrency_key="mp2")
+
+    first = queue._claim("w1")
+    assert first.args == (1,)
+    second = queue._claim("w2")
+    assert second.args == (3,)
+    assert queue._claim("w3") is None
+
+    queue._finish(first, None)
+    third = queue._claim("w3")
+    assert third.args == (2,)
+
+
+def test_failed_task_retries_then_goes_dead(queue, no_retry_delay):
+    queue.add_task(noop, max_attempts=2)
+
+    entry = queue._claim("w")
+    assert entry.attempts == 1
+    queue._finish(entry, RuntimeError("boom"))
+    assert queue.get_queue_info()["dead_tasks"] == 0
+
+    entry = queue._claim("w")
+    assert entry.attempts == 2
+    queue._finish(entry, RuntimeError("boom"))
+    info = queue.get_queue_info()
+    assert info["dead_tasks"] == 1 and info["pending_tasks"] == 0
+    assert queue._claim("w") is None
+
+    assert queue.retry_dead() == 1
+    entry = queue._claim("w")
+    assert entry.attempts == 1
+
+
+def test_retry_waits_for_backoff(queue):
+    queue.add_task(noop)
+    queue._finish(queue._claim("w"), RuntimeError("boom"))
+    assert queue._claim("w") is None
+    assert queue.get_queue_info()["pending_tasks"] == 1
+
+
+def test_expired_lease_is_reclaimed(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "queue.db")
+    crashed = DurableTaskQueue("test", db_path=db_path)
+    crashed.add_task(noop, "x", concurrency_key="mp1")
+    # 领取后立即过期，相当于执行任务的进程已退出
+    monkeypatch.setattr(durable_module, "LEASE_SECONDS", -1)
+    entry = crashed._claim("w")
+    assert entry.attempts == 1
+
+    monkeypatch.setattr(durable_module, "LEASE_SECONDS", 300)
+    other = DurableTaskQueue("test", db_path=db_path)
+    entry = other._claim("w")
+    assert entry is not None and entry.args == ("x",) and entry.attempts == 2
+    # 重新领取后租约有效，不会被再次领取
+    assert DurableTaskQueue("test", db_path=db_path)._claim("w") is None
+
+
+def test_expired_lease_past_max_attempts_goes_dead(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "queue.db")
+    crashed = DurableTaskQueue("test", db_path=db_path)
+    crashed.add_task(noop, max_attempts=1)
+    monkeypatch.setattr(durable_module, "LEASE_SECONDS", -1)
+    crashed._claim("w")
+
+    other = DurableTaskQueue("test", db_path=db_path)
+    assert other._claim("w") is None
+    assert other.get_queue_info()["dead_tasks"] == 1
+
+
+def test_durable_queue_rejects_local_functions(tmp_path):
+    queue = DurableTaskQueue("test", db_path=str(tmp_path / "queue.db"))
+    with pytest.raises(TypeError):
+        queue.add_task(lambda: None)
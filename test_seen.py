@@ -0,0 +1,26 @@
+# test_seen.py - 已采集文章记录测试
+from core.wx.seen import SeenArticles, _FeedSeen, aid_key
+
+
+def test_add_over_limit_keeps_old_articles():
+    """加载满2000条记录后再新增文章，只丢弃最早的记录"""
+    seen = SeenArticles(max_per_feed=2000)
+    aids = [f"aid{i}" for i in range(2000)]
+    seen._put("MP_WXS_1", _FeedSeen(aid_key(aid) for aid in aids))
+
+    assert seen.add("MP_WXS_1", "new") is False
+    assert seen.has("MP_WXS_1", "new")
+    assert seen.has("MP_WXS_1", aids[-1])
+    assert seen.has("MP_WXS_1", aids[1000])
+    assert not seen.has("MP_WXS_1", aids[0])
+    assert len(seen._feed("MP_WXS_1")) == seen.keep_per_feed
+
+
+def test_trim_after_many_adds():
+    seen = SeenArticles(max_per_feed=300)
+    for i in range(1000):
+        assert seen.add("MP_WXS_1", f"aid{i}") is False
+    assert len(seen._feed("MP_WXS_1")) <= 300
+    assert seen.has("MP_WXS_1", "aid999")
+    assert not seen.has("MP_WXS_1", "aid0")
+    assert seen.add("MP_WXS_1", "aid999") is True
@@ -0,0 +1,74 @@
+# tools/bench_article_insert.py - 文章入库性能对比（逐条提交 vs 批量INSERT忽略冲突）
+# 用法: python -m tools.bench_article_insert [文章数] [MySQL连接串]
+# 不传MySQL连接串时只测试SQLite，也可通过环境变量BENCH_MYSQL_URL指定
+import os
+import sys
+import time
+import tempfile
+from core.db import Db
+from core.models.article import Article
+
+
+class BenchDb(Db):
+    """只测量articles表写入，不触发RSS缓存、内容存储和检索索引"""
+
+    def __init__(self, url: str):
+        super().__init__(tag="入库测试")
+        self.init(url)
+        self.create_tables()
+
+    def _after_insert(self, session, arts):
+        pass
+
+
+def make_articles(count: int, offset: int = 0) -> list:
+    """构造与采集回调相同结构的文章数据"""
+    return [{
+        "id": str(100000 + i),
+        "mp_id": f"MP_WXS_{i % 20}",
+        "title": f"测试文章 {i}",
+        "url": f"https://mp.weixin.qq.com/s/{i}",
+        "pic_url": "https://mmbiz.qpic.cn/cover.jpg",
+        "content": "<p>" + "正文内容" * 500 + "</p>",
+        "publish_time": 1704067200 + i,
+        "description": f"摘要 {i}",
+    } for i in range(offset, offset + count)]
+
+
+def bench(db: BenchDb, count: int):
+    session = db.get_session()
+    results = []
+    for label, batched in (("逐条提交", False), ("批量写入", True)):
+        session.query(Article).delete()
+        session.commit()
+        for phase in ("新文章", "全部重复"):
+            articles = make_articles(count)
+            start = time.perf_counter()
+            if batched:
+                added = len(db.add_articles(articles))
+            else:
+                added = sum(1 for art in articles if db.add_article(art))
+            results.append((label, phase, time.perf_counter() - start, added))
+    return results
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    mysql_url = sys.argv[2] if len(sys.argv) > 2 else os.getenv("BENCH_MYSQL_URL", "")
+    targets = [("SQLite", f"sqlite:///{tempfile.mkdtemp()}/bench.db")]
+    if mysql_url:
+        targets.append(("MySQL", mysql_url))
+    rows = []
+    for name, url in targets:
+        for label, phase, seconds, added in bench(BenchDb(url), count):
+            rows.append((name, label, phase, seconds, added))
+    print(f"\n文章数: {count}")
+    print(f"{'数据库':<8}{'方式':<10}{'数据':<10}{'耗时(s)':>10}{'条/秒':>10}{'新增':>8}")
+    for name, label, phase, seconds, added in rows:
+        print(f"{name:<8}{label:<10}{phase:<10}{seconds:>10.2f}{count / seconds:>10.0f}{added:>8}")
+    if not mysql_url:
+        print("未指定MySQL连接串，跳过MySQL测试")
+
+
+if __name__ == "__main__":
+    main()
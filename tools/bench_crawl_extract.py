@@ -0,0 +1,129 @@
+# tools/bench_crawl_extract.py - 链接爬虫文章提取性能对比（逐元素读取 vs 单次page.evaluate）
+# 用法: python -m tools.bench_crawl_extract [页面HTML目录] [轮数]
+# 目录中为保存的网站列表页(*.html)，通过本地HTTP服务提供给浏览器；不指定时生成一批模拟新闻列表页
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from core.crawler import LinkCrawler, ARTICLE_SELECTORS
+from core.crawler_pool import CrawlerPool
+
+
+async def legacy_extract(crawler: LinkCrawler, page, base_url: str, max_articles: int) -> list:
+    """改造前LinkCrawler._extract_articles的实现：每个元素两次inner_text/get_attribute往返"""
+    articles = []
+    found_urls = set()
+    for selector in ARTICLE_SELECTORS:
+        try:
+            links = await page.query_selector_all(selector)
+            if not links:
+                continue
+            for link in links:
+                if len(articles) >= max_articles:
+                    break
+                try:
+                    title = (await link.inner_text()).strip()
+                    href = await link.get_attribute('href')
+                    if not title or not href or len(title) < 5:
+                        continue
+                    full_url = crawler._normalize_url(href, base_url)
+                    if not full_url or full_url in found_urls:
+                        continue
+                    if not crawler._is_valid_article_url(full_url, base_url):
+                        continue
+                    found_urls.add(full_url)
+                    articles.append({'title': title[:200], 'url': full_url,
+                                     'extracted_at': time.strftime('%Y-%m-%d %H:%M:%S')})
+                except Exception:
+                    continue
+            if len(articles) >= min(max_articles, 10):
+                break
+        except Exception:
+            continue
+    return articles
+
+
+def make_page(n: int) -> str:
+    """生成新闻站首页结构：导航菜单、约500个链接的列表区、隐藏的下拉菜单和页脚"""
+    rnd = random.Random(n)
+    nav = "".join(f'<li><a href="/category/{i}">栏目{i}</a></li>' for i in range(20))
+    hidden = "".join(f'<li><a href="/news/hidden-{i}.html">隐藏菜单中的新闻链接{i}</a></li>' for i in range(40))
+    items = []
+    for i in range(rnd.randint(400, 600)):
+        kind = rnd.choice(["news", "article", "post"])
+        items.append(f'<li><a href="/{kind}/{n}-{i}.html" title="标题{i}">第{n}页第{i}条新闻标题，' +
+                     "内容" * rnd.randint(2, 10) + '</a><span>2024-01-01</span></li>')
+    footer = "".join(f'<a href="/about/{i}">关于我们{i}</a>' for i in range(30))
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>新闻站{n}</title>'
+            f'<meta name="description" content="模拟新闻列表页{n}"></head><body>'
+            f'<ul class="nav">{nav}</ul><ul style="display:none">{hidden}</ul>'
+            f'<div class="list"><ul>{"".join(items)}</ul></div><footer>{footer}</footer></body></html>')
+
+
+def load_fixtures(path: str = None) -> tuple:
+    if path is None:
+        path = tempfile.mkdtemp()
+        for n in range(10):
+            with open(os.path.join(path, f"{n}.html"), "w", encoding="utf-8") as f:
+                f.write(make_page(n))
+        print(f"未指定页面目录，已生成10个模拟列表页: {path}")
+    names = sorted(name for name in os.listdir(path) if name.endswith((".html", ".htm")))
+    return path, names
+
+
+def serve(path: str) -> ThreadingHTTPServer:
+    class QuietHandler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=path))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def bench(crawler: LinkCrawler, urls: list, rounds: int, max_articles: int) -> dict:
+    results = {"legacy": [0.0, []], "evaluate": [0.0, []]}
+    async with crawler.pool.page() as page:
+        for _ in range(rounds):
+            for url in urls:
+                await page.goto(url, wait_until="load")
+                for name, extract in (("legacy", partial(legacy_extract, crawler)),
+                                      ("evaluate", crawler._extract_articles)):
+                    start = time.perf_counter()
+                    articles = await extract(page, url, max_articles)
+                    results[name][0] += time.perf_counter() - start
+                    results[name][1].append([(a['title'], a['url']) for a in articles])
+    return results
+
+
+async def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    max_articles = 50
+    path, names = load_fixtures(path)
+    server = serve(path)
+    base = f"http://127.0.0.1:{server.server_address[1]}/"
+    urls = [base + name for name in names]
+    crawler = LinkCrawler(pool=CrawlerPool(size=1))
+    try:
+        results = await bench(crawler, urls, rounds, max_articles)
+    finally:
+        await crawler.pool.close()
+        server.shutdown()
+    total = len(urls) * rounds
+    print(f"页面数: {len(urls)}, 轮数: {rounds}, 每页最多提取: {max_articles}")
+    print(f"{'提取方式':<12}{'平均耗时(ms)':>14}{'平均文章数':>12}")
+    for name, (seconds, outputs) in results.items():
+        count = sum(len(out) for out in outputs) / max(total, 1)
+        print(f"{name:<12}{seconds * 1000 / max(total, 1):>14.1f}{count:>12.1f}")
+    same = sum(a == b for a, b in zip(*(outputs for _, outputs in results.values())))
+    print(f"结果一致: {same}/{total}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+# tools/bench_extract.py - 文章正文解析性能对比（BeautifulSoup+prettify vs lxml）
+# 用法: python -m tools.bench_extract [文章HTML目录] [轮数]
+# 目录中为保存的微信文章页面(*.html)，不指定时生成一批结构相同的模拟页面
+import os
+import re
+import sys
+import time
+import random
+import tempfile
+from bs4 import BeautifulSoup
+from core import html_content
+from core.html_content import parse_js_content, html_to_text
+
+
+def legacy_parse(text: str) -> str:
+    """改造前MpsApi.parse_content的实现"""
+    soup = BeautifulSoup(text, 'html.parser')
+    js_content_div = soup.find('div', {'id': 'js_content'})
+    if js_content_div is None:
+        return ""
+    js_content_div.attrs.pop('style', None)
+    for img_tag in js_content_div.find_all('img'):
+        if 'data-src' in img_tag.attrs:
+            img_tag['src'] = img_tag['data-src']
+            del img_tag['data-src']
+        if 'style' in img_tag.attrs:
+            img_tag['style'] = re.sub(r'width\s*:\s*\d+\s*px', 'width: 1080px', img_tag['style'])
+    return js_content_div.prettify()
+
+
+def soup_parse(text: str) -> str:
+    """未安装lxml时的回退实现"""
+    lxml = html_content.lxml
+    html_content.lxml = None
+    try:
+        return parse_js_content(text)
+    finally:
+        html_content.lxml = lxml
+
+
+def make_page(n: int) -> str:
+    """生成与微信文章页面结构相近的HTML：大段内联脚本 + 带样式的正文段落和图片"""
+    rnd = random.Random(n)
+    scripts = "".join(f"<script>var v{i}={rnd.random()};function f{i}(a){{return a*{i};}}</script>" for i in range(400))
+    blocks = []
+    for i in range(rnd.randint(30, 80)):
+        blocks.append(f'<section style="margin: 0px 8px; line-height: 1.75em;"><p style="text-align: justify;">'
+                      f'<span style="font-size: 15px; color: rgb(62, 62, 62);">第{i}段正文，' + "内容" * rnd.randint(20, 120) +
+                      '</span></p></section>')
+        if i % 4 == 0:
+            blocks.append(f'<p><img class="rich_pages wxw-img" data-src="https://mmbiz.qpic.cn/{n}_{i}.jpg" '
+                          f'data-ratio="0.56" style="width: {rnd.randint(300, 677)}px !important; height: auto;"></p>')
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"><meta property="og:title" content="文章{n}">{scripts}</head>'
+            f'<body><div id="page-content"><h1 id="activity-name">文章{n}</h1>'
+            f'<div class="rich_media_content" id="js_content" style="visibility: hidden;">{"".join(blocks)}</div>'
+            f'</div><script>{"var x=1;" * 2000}</script></body></html>')
+
+
+def load_corpus(path: str = None) -> list:
+    if path is None:
+        path = tempfile.mkdtemp()
+        for n in range(50):
+            with open(os.path.join(path, f"{n}.html"), "w", encoding="utf-8") as f:
+                f.write(make_page(n))
+        print(f"未指定文章目录，已生成50篇模拟页面: {path}")
+    pages = []
+    for name in sorted(os.listdir(path)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(path, name), "r", encoding="utf-8", errors="ignore") as f:
+                pages.append(f.read())
+    return pages
+
+
+def normalize(html: str) -> str:
+    return re.sub(r"\s+", "", html_to_text(html))
+
+
+def bench(name: str, parse, pages: list, rounds: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        outputs = [parse(page) for page in pages]
+    seconds = time.perf_counter() - start
+    size = sum(len(out.encode("utf-8")) for out in outputs)
+    return name, len(pages) * rounds / seconds, size / max(len(pages), 1), outputs
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else None
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    pages = load_corpus(path)
+    page_size = sum(len(page.encode("utf-8")) for page in pages) / max(len(pages), 1)
+    print(f"文章数: {len(pages)}, 平均页面大小: {page_size / 1024:.1f}KB, 轮数: {rounds}")
+    results = [bench("bs4+prettify", legacy_parse, pages, rounds),
+               bench("bs4", soup_parse, pages, rounds)]
+    if html_content.lxml is not None:
+        results.append(bench("lxml", parse_js_content, pages, rounds))
+    else:
+        print("未安装lxml，跳过lxml测试")
+    baseline = [normalize(out) for out in results[0][3]]
+    print(f"{'解析方式':<16}{'篇/秒':>10}{'平均输出(KB)':>14}{'正文一致':>10}")
+    for name, rate, size, outputs in results:
+        same = sum(normalize(out) == base for out, base in zip(outputs, baseline))
+        print(f"{name:<16}{rate:>10.1f}{size / 1024:>14.1f}{same:>7}/{len(outputs)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# tools/bench_feed_compress.py - RSS压缩传输对比（不压缩 vs 实时压缩 vs 预压缩）
+# 用法: python -m tools.bench_feed_compress [条目数] [单篇正文KB] [格式] [请求次数]
+import gzip
+import sys
+import time
+import tempfile
+from core.rss import RSS, brotli
+from tools.bench_feed_render import make_item
+
+
+def cpu_per_request(func, rounds: int) -> float:
+    """返回单次调用的平均CPU耗时（毫秒）"""
+    start = time.process_time()
+    for _ in range(rounds):
+        func()
+    return (time.process_time() - start) * 1000 / rounds
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    content_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    ext = sys.argv[3] if len(sys.argv) > 3 else "rss"
+    rounds = int(sys.argv[4]) if len(sys.argv) > 4 else 20
+    with tempfile.TemporaryDirectory() as cache_dir:
+        rss = RSS(name="bench_compress", cache_dir=cache_dir, ext=ext)
+        # 渲染一次，同时生成原文件和预压缩文件
+        start = time.process_time()
+        for _ in rss.stream((make_item(i, content_kb) for i in range(count)), ext=ext):
+            pass
+        render_cpu = (time.process_time() - start) * 1000
+        raw = rss.get_cache_bytes()
+        rows = [
+            ("不压缩", len(raw), cpu_per_request(lambda: rss.get_cache_bytes(), rounds)),
+            # GZipMiddleware默认压缩级别为9
+            ("实时gzip", len(gzip.compress(raw, 9)), cpu_per_request(lambda: gzip.compress(rss.get_cache_bytes(), 9), rounds)),
+            ("预压缩gzip", len(rss.get_cache_bytes("gzip")), cpu_per_request(lambda: rss.get_cache_bytes("gzip"), rounds)),
+        ]
+        if brotli is not None:
+            rows.insert(2, ("实时br", len(brotli.compress(raw, quality=5)), cpu_per_request(lambda: brotli.compress(rss.get_cache_bytes(), quality=5), rounds)))
+            rows.append(("预压缩br", len(rss.get_cache_bytes("br")), cpu_per_request(lambda: rss.get_cache_bytes("br"), rounds)))
+        same = gzip.decompress(rss.get_cache_bytes("gzip")) == raw
+        if brotli is not None:
+            same = same and brotli.decompress(rss.get_cache_bytes("br")) == raw
+    print(f"条目数: {count}  单篇正文: {content_kb}KB  格式: {ext}  渲染并预压缩CPU: {render_cpu:.1f}ms")
+    print(f"{'模式':<10}{'传输大小(KB)':>14}{'压缩率':>8}{'单次CPU(ms)':>14}")
+    for name, size, cpu in rows:
+        print(f"{name:<10}{size / 1024:>14.1f}{size / len(raw):>8.1%}{cpu:>14.2f}")
+    print(f"预压缩内容一致: {same}")
+
+
+if __name__ == "__main__":
+    main()
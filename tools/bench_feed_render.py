@@ -0,0 +1,78 @@
+# tools/bench_feed_render.py - RSS渲染性能对比（整体生成 vs 流式生成）
+# 用法: python -m tools.bench_feed_render [条目数] [单篇正文KB] [格式]
+import re
+import sys
+import time
+import tracemalloc
+import tempfile
+from datetime import datetime
+from core.rss import RSS
+
+
+def make_item(i: int, content_kb: int) -> dict:
+    """构造一条带全文内容的测试条目"""
+    return {
+        "id": str(i),
+        "title": f"测试文章 {i}",
+        "link": f"https://mp.weixin.qq.com/s/{i}",
+        "description": f"摘要 {i}",
+        "content": "<p>" + ("正文内容 & <b>加粗</b> " * 64 * content_kb) + "</p>",
+        "image": "https://mmbiz.qpic.cn/cover.jpg",
+        "mp_name": "测试公众号",
+        "updated": datetime(2024, 1, 1, 8, 0, 0),
+        "feed": {"id": "MP_WXS_1", "name": "测试公众号", "cover": "", "intro": ""},
+    }
+
+
+def bench_buffered(count: int, content_kb: int, ext: str, cache_dir: str):
+    """旧路径：先构造完整条目列表，再一次性生成整个文档"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    rss_list = [make_item(i, content_kb) for i in range(count)]
+    doc = RSS(name="bench_buffered", cache_dir=cache_dir, ext=ext).generate(rss_list, ext=ext)
+    ttfb = time.perf_counter() - start
+    total = ttfb
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ttfb, total, peak, doc
+
+
+def bench_stream(count: int, content_kb: int, ext: str, cache_dir: str):
+    """新路径：条目按需生成，逐段输出并同时写入缓存"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = (make_item(i, content_kb) for i in range(count))
+    chunks = RSS(name="bench_stream", cache_dir=cache_dir, ext=ext).stream(items, ext=ext)
+    ttfb = None
+    size = 0
+    for chunk in chunks:
+        if ttfb is None:
+            ttfb = time.perf_counter() - start
+        size += len(chunk)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return ttfb, total, peak, size
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    content_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    ext = sys.argv[3] if len(sys.argv) > 3 else "rss"
+    with tempfile.TemporaryDirectory() as cache_dir:
+        b_ttfb, b_total, b_peak, doc = bench_buffered(count, content_kb, ext, cache_dir)
+        s_ttfb, s_total, s_peak, size = bench_stream(count, content_kb, ext, cache_dir)
+        with open(f"{cache_dir}/bench_stream.{ext}", encoding="utf-8", newline="") as f:
+            cached = f.read()
+    # 频道级生成时间精确到秒，两次生成可能跨秒，比较前去掉
+    build_date = re.compile(r"<(lastBuildDate|updated)>[^<]*</\1>")
+    same = build_date.sub("", doc, count=1) == build_date.sub("", cached, count=1)
+    print(f"条目数: {count}  单篇正文: {content_kb}KB  格式: {ext}  文档大小: {len(doc) / 1024 / 1024:.1f}MB")
+    print(f"{'模式':<10}{'首字节(ms)':>12}{'总耗时(ms)':>12}{'内存峰值(MB)':>14}")
+    print(f"{'整体生成':<10}{b_ttfb * 1000:>12.1f}{b_total * 1000:>12.1f}{b_peak / 1024 / 1024:>14.1f}")
+    print(f"{'流式生成':<10}{s_ttfb * 1000:>12.1f}{s_total * 1000:>12.1f}{s_peak / 1024 / 1024:>14.1f}")
+    print(f"输出一致: {same and size == len(doc)}")
+
+
+if __name__ == "__main__":
+    main()
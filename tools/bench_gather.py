@@ -0,0 +1,129 @@
+# tools/bench_gather.py - 公众号采集吞吐对比（逐个休眠采集 vs 采集引擎逐个 vs 采集引擎并发）
+# 用法: python -m tools.bench_gather [公众号数] [接口延迟ms] [每秒请求数]
+# 使用本地桩服务模拟文章列表接口和文章页面，休眠时间与请求速率均按10倍缩短
+import json
+import random
+import sys
+import threading
+import time
+import asyncio
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from core.wx import MpsApi
+from core.wx.engine import engine
+from core.wx.seen import seen_articles
+
+SCALE = 0.1
+PAGE_SIZE = 5
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.3
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        url = urlparse(self.path)
+        if url.path == "/cgi-bin/appmsg":
+            query = parse_qs(url.query)
+            fakeid, begin = query["fakeid"][0], int(query["begin"][0])
+            host = f"http://{self.headers['Host']}"
+            body = json.dumps({
+                "base_resp": {"ret": 0, "err_msg": "ok"},
+                "app_msg_list": [{
+                    "aid": f"{fakeid}_{begin + n}",
+                    "title": f"文章{begin + n}",
+                    "link": f"{host}/s/{fakeid}_{begin + n}",
+                    "cover": "",
+                    "digest": "",
+                    "update_time": 1704067200,
+                } for n in range(PAGE_SIZE)],
+            }).encode("utf-8")
+            content_type = "application/json"
+        else:
+            body = ("<html><body><div id=\"js_content\"><p>" + "正文" * 2000 + "</p></div></body></html>").encode("utf-8")
+            content_type = "text/html; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class BenchApi(MpsApi):
+    """指向桩服务的采集器，跳过登录检查和数据库写入"""
+
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.list_url = f"{base_url}/cgi-bin/appmsg"
+
+    def get_token(self):
+        self.Gather_Content = True
+        self.user_agent = "bench"
+        self.cookies = "bench"
+        self.token = "bench"
+        self.headers = {"Cookie": self.cookies, "User-Agent": self.user_agent}
+
+    def update_mps(self, mp_id, mp):
+        pass
+
+    def Item_Over(self, item=None, CallBack=None):
+        pass
+
+    def Over(self, CallBack=None):
+        if CallBack is not None:
+            CallBack(self)
+
+    def old_get_Articles(self, faker_id: str, interval: int = 10):
+        """改造前的采集方式：同步请求，每页随机休眠0~interval秒，每篇文章随机休眠1~3秒"""
+        session = requests.Session()
+        time.sleep(random.randint(0, interval) * SCALE)
+        msg = session.get(self.list_url, headers=self.headers, params=self.list_params(faker_id, 0)).json()
+        for item in msg["app_msg_list"]:
+            time.sleep(random.randint(1, 3) * SCALE)
+            item["content"] = self.parse_content(session.get(item["link"], headers=self.content_headers()).text)
+            self.FillBack(CallBack=lambda art: True, data={**item, "id": item["aid"], "mp_id": faker_id})
+
+
+def run_feeds(base_url: str, feeds: int, mode: str) -> float:
+    """采集feeds个公众号各一页，返回耗时（秒）"""
+    start = time.perf_counter()
+    if mode == "sleep":
+        for n in range(feeds):
+            BenchApi(base_url).old_get_Articles(f"feed{n}")
+    elif mode == "serial":
+        for n in range(feeds):
+            BenchApi(base_url).get_Articles(f"feed{n}", Mps_id=f"feed{n}", CallBack=lambda art: True, MaxPage=1)
+    else:
+        async def gather_all():
+            await asyncio.gather(*(BenchApi(base_url).get_Articles_async(f"feed{n}", Mps_id=f"feed{n}", CallBack=lambda art: True, MaxPage=1)
+                                   for n in range(feeds)))
+        engine.run(gather_all())
+    return time.perf_counter() - start
+
+
+def main():
+    feeds = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    StubHandler.latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 300) / 1000
+    engine.rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.5 / SCALE
+    engine.burst = 3
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    print(f"公众号数: {feeds}, 每个公众号1页{PAGE_SIZE}篇, 接口延迟: {StubHandler.latency * 1000:.0f}ms, "
+          f"限速: {engine.rate}次/秒 突发{engine.burst} (时间按{1 / SCALE:.0f}倍缩短)")
+    print(f"{'模式':<12}{'耗时(s)':>10}{'公众号/分钟':>14}")
+    for mode in ("sleep", "serial", "concurrent"):
+        engine._buckets.clear()
+        # 各模式之间清空已采集记录，以免跳过内容请求
+        seen_articles.forget()
+        seconds = run_feeds(base_url, feeds, mode)
+        print(f"{mode:<12}{seconds:>10.2f}{feeds * 60 / seconds:>14.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
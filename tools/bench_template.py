@@ -0,0 +1,60 @@
+# tools/bench_template.py - WebHook模板渲染性能对比（每次重新编译 vs 缓存编译结果）
+# 用法: python -m tools.bench_template [文章数] [轮数]
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from core.lax import TemplateParser
+from core.lax.template_parser import compile_template
+from jobs.webhook import DEFAULT_MESSAGE_TEMPLATE, DEFAULT_WEBHOOK_TEMPLATE
+
+
+def make_context(count: int) -> dict:
+    """构造与任务执行时相同结构的渲染上下文"""
+    feed = SimpleNamespace(id="MP_WXS_1", mp_name="测试公众号", mp_cover="", mp_intro="")
+    articles = [SimpleNamespace(
+        id=f"1-{i}",
+        mp_id="MP_WXS_1",
+        title=f"测试文章 {i}",
+        pic_url="https://mmbiz.qpic.cn/cover.jpg",
+        url=f"https://mp.weixin.qq.com/s/{i}",
+        description=f"摘要 {i}",
+        publish_time=1704067200 + i,
+        content="<p>正文内容</p>",
+    ) for i in range(count)]
+    return {
+        "feed": feed,
+        "articles": articles,
+        "task": SimpleNamespace(name="bench"),
+        "now": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def bench(template: str, context: dict, rounds: int, cached: bool) -> float:
+    """返回单次渲染的平均耗时（毫秒），每次渲染都新建解析器，与任务执行时一致"""
+    compile_template.cache_clear()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        if not cached:
+            compile_template.cache_clear()
+        TemplateParser(template).render(context)
+    return (time.perf_counter() - start) * 1000 / rounds
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    context = make_context(count)
+    print(f"文章数: {count}, 轮数: {rounds}")
+    print(f"{'模板':<10}{'每次编译(ms)':>14}{'缓存编译(ms)':>14}{'输出(KB)':>10}")
+    for name, template in (("webhook", DEFAULT_WEBHOOK_TEMPLATE), ("message", DEFAULT_MESSAGE_TEMPLATE)):
+        size = len(TemplateParser(template).render(context).encode("utf-8")) / 1024
+        cold = bench(template, context, rounds, cached=False)
+        warm = bench(template, context, rounds, cached=True)
+        print(f"{name:<10}{cold:>14.2f}{warm:>14.2f}{size:>10.1f}")
+    info = compile_template.cache_info()
+    print(f"编译缓存: hits={info.hits} misses={info.misses}")
+
+
+if __name__ == "__main__":
+    main()
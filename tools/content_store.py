@@ -0,0 +1,40 @@
+# tools/content_store.py - 文章内容存储维护
+# 用法: python -m tools.content_store migrate|compact|variants|stats [--days N] [--max N] [--orphans]
+# variants: 为已有文章补齐预生成的内容格式(图片代理HTML/纯文本/Markdown)
+import os
+import argparse
+from core.cache import content_store, content_variants
+from core.print import print_success
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文章内容存储维护")
+    parser.add_argument("action", choices=["migrate", "compact", "variants", "stats"])
+    parser.add_argument("--days", type=float, default=None, help="删除超过N天未更新的内容")
+    parser.add_argument("--max", type=int, default=None, help="最多保留N条内容")
+    parser.add_argument("--orphans", action="store_true", help="删除数据库中已不存在的文章内容及其预生成格式")
+    args, _ = parser.parse_known_args()
+    if args.action == "migrate":
+        print_success(f"已导入 {content_store.migrate()} 篇文章内容")
+    elif args.action == "compact":
+        keep_ids = keep_hashes = None
+        if args.orphans:
+            from core.db import DB
+            from core.models.article import Article
+            from core.content_format import content_hash
+            keep_ids = [row[0] for row in DB.get_session().query(Article.id).yield_per(1000)]
+            keep_hashes = [content_hash(row[0]) for row in DB.get_session().query(Article.content).yield_per(200)]
+        removed = content_store.compact(args.days, args.max, keep_ids, keep_hashes)
+        print_success(f"已清理 {removed} 篇文章内容，剩余 {content_store.count()} 篇")
+    elif args.action == "variants":
+        import time
+        start = time.perf_counter()
+        count = content_variants.backfill()
+        print_success(f"已生成 {count} 篇文章的内容格式，耗时 {time.perf_counter() - start:.1f}s")
+    else:
+        size = os.path.getsize(content_store.db_path) if os.path.exists(content_store.db_path) else 0
+        print(f"内容数量: {content_store.count()}  文件大小: {size / 1024 / 1024:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
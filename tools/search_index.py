@@ -0,0 +1,28 @@
+# tools/search_index.py - 重建文章全文检索索引
+# 用法: python -m tools.search_index [关键字]
+import sys
+import time
+from core.search import get_search_index
+from core.print import print_success
+
+
+def main():
+    index = get_search_index()
+    if len(sys.argv) > 1:
+        # 指定关键字时只做检索测试
+        from core.db import DB
+        from core.models.article import Article
+        start = time.perf_counter()
+        query = index.apply(DB.get_session().query(Article.id, Article.title), sys.argv[1], rank=True)
+        rows = query.limit(10).all()
+        print(f"[{index.name}] 检索耗时: {(time.perf_counter() - start) * 1000:.1f}ms")
+        for article_id, title in rows:
+            print(f"{article_id}\t{title}")
+        return
+    start = time.perf_counter()
+    count = index.rebuild()
+    print_success(f"检索索引[{index.name}]重建完成，共 {count} 篇文章，耗时 {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
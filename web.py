@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Request, APIRouter, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import mimetypes
@@ -23,9 +24,22 @@ from apis.patents import router as patents_router
 from apis.industries import router as industries_router
 import apis
 import os
+from contextlib import asynccontextmanager
 from core.config import cfg,VERSION,API_BASE
+from core.crawler import start_crawler,stop_crawler
+from core.queue import start_queues
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 队列随应用启动开始执行(包括上次未完成的持久化任务)
+    start_queues()
+    # 链接爬虫的浏览器随应用启动常驻，退出时关闭
+    await start_crawler()
+    yield
+    await stop_crawler()
 
 app = FastAPI(
+    lifespan=lifespan,
     title="WeRSS API",
     description="微信公众号RSS生成服务API文档",
     version="1.0.0",
@@ -58,6 +72,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# 响应压缩，已带Content-Encoding的预压缩RSS不会被重复压缩
+gzip_min_size=int(cfg.get("server.gzip_min_size",1024) or 0)
+if gzip_min_size>0:
+    app.add_middleware(GZipMiddleware, minimum_size=gzip_min_size)
 @app.middleware("http")
 async def add_custom_header(request: Request, call_next):
     response = await call_next(request)